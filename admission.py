@@ -0,0 +1,86 @@
+"""
+Admission control for the routes that wait on the court websites
+
+An AdmissionController lets at most `limit` guarded requests run at once
+per worker process. Up to `queue_size` more wait (for at most
+`queue_timeout` seconds) for a slot; anything beyond that is refused at
+once with 503 and Retry-After instead of tying up another worker thread.
+Keeping limit + queue_size below the worker's thread count reserves the
+remaining threads for the cheap read-only pages.
+"""
+import functools
+import threading
+import time
+
+from werkzeug.exceptions import ServiceUnavailable
+
+import metrics
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded, time-limited wait queue"""
+
+    def __init__(self, name, limit, queue_size=0, queue_timeout=2.0, retry_after=5):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.queued = 0
+        self._condition = threading.Condition()
+        metrics.register_gauge(f'nyayalens_{name}_in_flight', lambda: self.in_flight,
+                               help=f'{name} requests running')
+        metrics.register_gauge(f'nyayalens_{name}_queued', lambda: self.queued,
+                               help=f'{name} requests waiting for a slot')
+
+    @property
+    def enabled(self):
+        return self.limit > 0
+
+    @property
+    def saturated(self):
+        """True when the next guarded request would be refused"""
+        return self.enabled and self.in_flight >= self.limit and self.queued >= self.queue_size
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if there is room; False if refused"""
+        with self._condition:
+            if self.in_flight < self.limit:
+                self.in_flight += 1
+                return True
+            if self.queued >= self.queue_size:
+                return False
+
+            self.queued += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.in_flight >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+                self.in_flight += 1
+                return True
+            finally:
+                self.queued -= 1
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def guard(self, view):
+        """Decorator: run the view under this controller, raising 503 with Retry-After when refused"""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return view(*args, **kwargs)
+            if not self.acquire():
+                metrics.inc(f'nyayalens_{self.name}_shed_total', help=f'{self.name} requests refused with 503')
+                raise ServiceUnavailable(retry_after=self.retry_after)
+            try:
+                return view(*args, **kwargs)
+            finally:
+                self.release()
+        return wrapper
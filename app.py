@@ -3,6 +3,8 @@ import logging
 from flask import Flask
 from werkzeug.middleware.proxy_fix import ProxyFix
 
+import db_engine
+
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
 
@@ -14,10 +16,97 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 # Configure the database
 database_url = os.environ.get("DATABASE_URL", "sqlite:///court_data.db")
 app.config["SQLALCHEMY_DATABASE_URI"] = database_url
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+# SQLite gets WAL mode, tuned pragmas and a busy timeout so gunicorn workers can share it
+sqlite_busy_timeout_ms = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = db_engine.engine_options(database_url, sqlite_busy_timeout_ms)
+
+# Optional read replica for the read-only pages; a client that just searched reads
+# from the primary for READ_YOUR_WRITES_SECONDS (a short-lived wrote_at cookie) so it sees its own results
+database_read_url = os.environ.get("DATABASE_READ_URL")
+if database_read_url:
+    app.config["SQLALCHEMY_BINDS"] = {
+        db_engine.REPLICA: {"url": database_read_url, **db_engine.engine_options(database_read_url, sqlite_busy_timeout_ms)}
+    }
+app.config["READ_YOUR_WRITES_SECONDS"] = float(os.environ.get("READ_YOUR_WRITES_SECONDS", "10"))
+
+# Failed-search history is written behind in batches of N rows or every M milliseconds
+app.config["HISTORY_FLUSH_ROWS"] = int(os.environ.get("HISTORY_FLUSH_ROWS", "50"))
+app.config["HISTORY_FLUSH_MS"] = int(os.environ.get("HISTORY_FLUSH_MS", "500"))
+
+# /search queries both courts in parallel; prefer the High Court if it answers within the grace window
+app.config["SEARCH_DEADLINE_SECONDS"] = float(os.environ.get("SEARCH_DEADLINE_SECONDS", "25"))
+app.config["HIGH_COURT_GRACE_SECONDS"] = float(os.environ.get("HIGH_COURT_GRACE_SECONDS", "3"))
+
+# Admission control per worker for the routes that wait on the courts; keep SCRAPE_CONCURRENCY +
+# SCRAPE_QUEUE below the worker's thread count so the remaining threads always serve read-only pages
+app.config["SCRAPE_CONCURRENCY"] = int(os.environ.get("SCRAPE_CONCURRENCY", "2"))
+app.config["SCRAPE_QUEUE"] = int(os.environ.get("SCRAPE_QUEUE", "1"))
+app.config["SCRAPE_QUEUE_TIMEOUT_SECONDS"] = float(os.environ.get("SCRAPE_QUEUE_TIMEOUT_SECONDS", "2"))
+app.config["SCRAPE_RETRY_AFTER_SECONDS"] = int(os.environ.get("SCRAPE_RETRY_AFTER_SECONDS", "5"))
+
+# Seconds to remember that a case was not found before asking the courts again
+app.config["NEGATIVE_CACHE_TTL"] = int(os.environ.get("NEGATIVE_CACHE_TTL", "300"))
+
+# Opt-in request profiling (X-Profile header, sampling or slow requests); dumps are
+# listed at /admin/profiles for holders of PROFILE_TOKEN
+app.config["PROFILE_TOKEN"] = os.environ.get("PROFILE_TOKEN")
+app.config["PROFILE_DIR"] = os.environ.get("PROFILE_DIR", os.path.join(app.instance_path, "profiles"))
+profile_sample_rate = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+profile_slow_ms = int(os.environ.get("PROFILE_SLOW_MS", "0"))
+if app.config["PROFILE_TOKEN"] or profile_sample_rate or profile_slow_ms:
+    import profiling
+    app.wsgi_app = profiling.RequestProfiler(
+        app.wsgi_app,
+        app.config["PROFILE_DIR"],
+        token=app.config["PROFILE_TOKEN"],
+        sample_rate=profile_sample_rate,
+        slow_ms=profile_slow_ms,
+        paths=os.environ.get("PROFILE_PATHS", "/search,/download_pdf").split(","),
+        keep=int(os.environ.get("PROFILE_KEEP", "50"))
+    )
+
+# Downloaded order PDFs are cached on disk and their text extracted in the background
+app.config["PDF_CACHE_DIR"] = os.environ.get("PDF_CACHE_DIR", os.path.join(app.instance_path, "pdf_cache"))
+app.config["PDF_CACHE_MAX_BYTES"] = int(os.environ.get("PDF_CACHE_MAX_MB", "500")) * 1024 * 1024
+app.config["PDF_TEXT_WORKERS"] = int(os.environ.get("PDF_TEXT_WORKERS", "2"))
+app.config["PDF_TEXT_MAX_PAGES"] = int(os.environ.get("PDF_TEXT_MAX_PAGES", "500"))
+app.config["PDF_TEXT_MAX_CHARS"] = int(os.environ.get("PDF_TEXT_MAX_CHARS", "2000000"))
+
+# After a successful search its orders' PDFs are prefetched in the background (0 workers disables it)
+app.config["PDF_PREFETCH_WORKERS"] = int(os.environ.get("PDF_PREFETCH_WORKERS", "2"))
+app.config["PDF_PREFETCH_PER_HOST"] = int(os.environ.get("PDF_PREFETCH_PER_HOST", "1"))
+app.config["PDF_PREFETCH_MAX_AGE_SECONDS"] = float(os.environ.get("PDF_PREFETCH_MAX_AGE_SECONDS", "60"))
+
+# Generated order PDFs never change for a given order, so browsers and the CDN may keep them this long
+app.config["GENERATED_PDF_MAX_AGE"] = int(os.environ.get("GENERATED_PDF_MAX_AGE", "86400"))
+
+# /api/v1/changes: batch size limit and long-polling (waiters per worker beyond the limit get an immediate answer)
+app.config["CHANGES_MAX_BATCH"] = int(os.environ.get("CHANGES_MAX_BATCH", "500"))
+app.config["CHANGES_MAX_WAIT_SECONDS"] = float(os.environ.get("CHANGES_MAX_WAIT_SECONDS", "30"))
+app.config["CHANGES_MAX_WAITERS"] = int(os.environ.get("CHANGES_MAX_WAITERS", "8"))
+app.config["CHANGES_POLL_SECONDS"] = float(os.environ.get("CHANGES_POLL_SECONDS", "1"))
+
+# Case permalinks revalidate on every view (cheap, ETag/Last-Modified) unless given a max-age in seconds
+app.config["CASE_PAGE_MAX_AGE"] = int(os.environ.get("CASE_PAGE_MAX_AGE", "0"))
+
+# Retention job (`flask --app app retention`): history and idle cases' orders are archived after N days
+app.config["RETENTION_DAYS"] = int(os.environ.get("RETENTION_DAYS", "90"))
+app.config["ORDER_RETENTION_DAYS"] = int(os.environ.get("ORDER_RETENTION_DAYS", "365"))
+app.config["CHANGE_RETENTION_DAYS"] = int(os.environ.get("CHANGE_RETENTION_DAYS", "30"))
+app.config["ARCHIVE_DIR"] = os.environ.get("ARCHIVE_DIR", os.path.join(app.instance_path, "archive"))
+
+# gzip/brotli for responses over COMPRESS_MIN_SIZE bytes; fingerprinted static URLs are cached for a year
+import compression
+compression.init_app(
+    app,
+    min_size=int(os.environ.get("COMPRESS_MIN_SIZE", "500")),
+    level=int(os.environ.get("COMPRESS_LEVEL", "6")),
+    static_max_age=int(os.environ.get("STATIC_MAX_AGE", "31536000"))
+)
+
+# orjson behind jsonify and request.get_json when it is installed
+import json_provider
+json_provider.init_app(app)
 
 # Import models first to get the db instance
 import models
@@ -26,8 +115,10 @@ import models
 models.db.init_app(app)
 
 with app.app_context():
-    # Import routes
-    import routes
+    for engine in models.db.engines.values():
+        db_engine.configure_engine(engine, sqlite_busy_timeout_ms)
     
-    # Create all tables
-    models.db.create_all()
+    # Import routes and CLI commands; the schema is created or upgraded
+    # explicitly with `flask --app app migrate`, not on every worker boot
+    import routes
+    import cli
@@ -0,0 +1,68 @@
+"""
+ASGI entry point for the async court lookup engine
+
+Run with any ASGI server, e.g. ``uvicorn asgi:application``. Serves
+``GET /search?case_type=...&case_number=...&filing_year=...`` and returns the
+scraper result dict as JSON.
+"""
+import json
+from urllib.parse import parse_qs
+
+from async_scraper import AsyncCourtEngine
+from validation import canonical_case_key, validate_case_input
+
+engine = None
+
+
+async def application(scope, receive, send):
+    global engine
+
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                engine = AsyncCourtEngine()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if engine is not None:
+                    await engine.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] != 'http':
+        return
+
+    if engine is None:
+        engine = AsyncCourtEngine()
+
+    if scope['path'] != '/search' or scope['method'] != 'GET':
+        await _send_json(send, 404, {'success': False, 'error': 'Not found'})
+        return
+
+    params = {key: values[0] for key, values in parse_qs(scope['query_string'].decode()).items()}
+    case_type = params.get('case_type')
+    case_number = params.get('case_number')
+    filing_year = params.get('filing_year')
+
+    if not all([case_type, case_number, filing_year]):
+        await _send_json(send, 400, {'success': False, 'error': 'All fields are required'})
+        return
+
+    errors = validate_case_input(case_type, case_number, filing_year)
+    if errors:
+        await _send_json(send, 400, {'success': False, 'error': errors[0], 'errors': errors})
+        return
+    case_type, case_number, filing_year = canonical_case_key(case_type, case_number, filing_year)
+
+    result = await engine.search_case(case_type, case_number, filing_year)
+    await _send_json(send, 200, result.to_dict())
+
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+from urllib.parse import urljoin
+
+import httpx
+from bs4 import BeautifulSoup
+
+import body_limits
+from results import SearchResult
+from scraper import (DISTRICT_COURT_HEADERS, DISTRICT_COURT_URLS, HIGH_COURT_BASE_URL, HIGH_COURT_HEADERS,
+                     DelhiHighCourtScraper, DistrictCourtScraper, form_schema_cache, http_cache)
+
+
+class _SharedTransport(httpx.AsyncBaseTransport):
+    """The engine's pooled transport, left open when a per-lookup client closes"""
+
+    def __init__(self, transport):
+        self._transport = transport
+
+    async def handle_async_request(self, request):
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self):
+        pass
+
+
+class AsyncCourtEngine:
+    """
+    Asyncio engine for running many court lookups concurrently
+
+    All lookups share one pooled HTTP transport, while each lookup gets its own
+    lightweight client so court session cookies never leak between searches.
+    A semaphore caps the number of outstanding lookups per process.
+    """
+
+    def __init__(self, max_concurrency=200, max_connections=200, max_keepalive=50):
+        self.transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive
+            )
+        )
+        self._shared_transport = _SharedTransport(self.transport)
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+
+    def client(self, headers):
+        """Create a per-lookup client on top of the shared connection pool; close it when the lookup ends"""
+        return httpx.AsyncClient(transport=self._shared_transport, headers=headers, follow_redirects=True,
+                                 event_hooks={'response': [body_limits.read_capped_async]})
+
+    async def search_case(self, case_type, case_number, filing_year):
+        """Search High Court first and fall back to District Court on CAPTCHA"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            scraper = AsyncDelhiHighCourtScraper(self)
+            async with scraper.client:
+                result = await scraper.search_case(case_type, case_number, filing_year)
+
+            if not result.success and result.captcha_detected:
+                logging.info("High Court CAPTCHA detected, trying District Court fallback...")
+                district_scraper = AsyncDistrictCourtScraper(self)
+                async with district_scraper.client:
+                    result = await district_scraper.search_case(case_type, case_number, filing_year)
+
+                if result.success:
+                    result.data.notes = "Data retrieved from New Delhi District Court (High Court CAPTCHA active)"
+
+            if result.data is not None:
+                result.data.fill_key(case_type, case_number, filing_year)
+            return result
+
+    async def search_many(self, queries):
+        """Run (case_type, case_number, filing_year) lookups concurrently, preserving order"""
+        return await asyncio.gather(*(self.search_case(*query) for query in queries))
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class AsyncDelhiHighCourtScraper(DelhiHighCourtScraper):
+    """
+    Asyncio version of DelhiHighCourtScraper.search_case
+
+    Reuses the form preparation and result parsing of the synchronous scraper
+    and returns the same SearchResult. Parsing runs in the default executor so
+    BeautifulSoup never blocks the event loop.
+    """
+
+    def __init__(self, engine):
+        # No super().__init__(): lookups use the engine's httpx client, not a requests session
+        self.base_url = HIGH_COURT_BASE_URL
+        self.search_url = urljoin(HIGH_COURT_BASE_URL, "pcase/guiCaseWise.php")
+        self.client = engine.client(HIGH_COURT_HEADERS)
+
+    async def search_case(self, case_type, case_number, filing_year):
+        """Search for case details, see DelhiHighCourtScraper.search_case"""
+        loop = asyncio.get_running_loop()
+
+        try:
+            logging.info(f"Searching for case (async): {case_type} {case_number}/{filing_year}")
+
+            schema = form_schema_cache.get(self.search_url)
+            if schema is not None and not schema['session_bound']:
+                result = await self._search_with_schema_async(schema, case_type, case_number, filing_year)
+                if result is not None:
+                    return result
+
+                logging.info("Cached search form no longer matches, refetching form")
+                form_schema_cache.pop(self.search_url)
+                schema = None
+
+            shared = schema is None
+            response = await self._get_search_page_async(shared)
+            schema = await loop.run_in_executor(None, self._parse_form_schema, response.text)
+            if schema['session_bound'] and shared:
+                http_cache.pop(self.search_url)
+                response = await self._get_search_page_async(shared=False)
+                schema = await loop.run_in_executor(None, self._parse_form_schema, response.text)
+            self._remember_schema(schema)
+
+            return await self._search_with_schema_async(schema, case_type, case_number, filing_year, fresh=True)
+
+        except httpx.TimeoutException:
+            return SearchResult.failed('Request timed out. The court website may be experiencing heavy traffic.')
+        except httpx.ConnectError:
+            return SearchResult.failed('Unable to connect to the court website. Please check internet connection.')
+        except (httpx.HTTPError, body_limits.ResponseTooLarge) as e:
+            return SearchResult.failed(f'Network error occurred: {str(e)}')
+        except Exception as e:
+            logging.error(f"Unexpected error in async search_case: {str(e)}")
+            return SearchResult.failed(f'An unexpected error occurred: {str(e)}')
+
+    async def _get_search_page_async(self, shared=True):
+        """GET the search form page, see DelhiHighCourtScraper._get_search_page"""
+        if not shared:
+            response = await self.client.get(self.search_url, timeout=15)
+        else:
+            response = http_cache.lookup(self.search_url)
+            if response is None:
+                response = http_cache.update(self.search_url, await self.client.get(
+                    self.search_url, headers=http_cache.conditional_headers(self.search_url), timeout=15
+                ))
+            if response.status_code == 304:
+                # Evicted while revalidating: the 304 has no body to go with it
+                response = http_cache.update(self.search_url, await self.client.get(self.search_url, timeout=15))
+        response.raise_for_status()
+        return response
+
+    async def _search_with_schema_async(self, schema, case_type, case_number, filing_year, fresh=False):
+        """Submit the search form described by schema, see DelhiHighCourtScraper._search_with_schema"""
+        loop = asyncio.get_running_loop()
+
+        if schema['captcha']:
+            logging.info("CAPTCHA detected on Delhi High Court website")
+
+            try:
+                if schema['has_form']:
+                    form_data = self._fill_form(schema['fields'], case_type, case_number, filing_year)
+                    search_response = await self.client.post(self.search_url, data=form_data, timeout=10)
+
+                    if search_response.status_code == 200 and len(search_response.text) > 1000:
+                        results = await loop.run_in_executor(None, self._parse_case_results, search_response.text)
+                        if results.success:
+                            results.data.notes = "Retrieved despite CAPTCHA (form submission method)"
+                            return results
+
+            except Exception as e:
+                logging.debug(f"Form submission without CAPTCHA failed: {str(e)}")
+
+            return self._captcha_result(case_type, case_number, filing_year, schema['page_snippet'])
+
+        if not schema['has_form']:
+            return SearchResult.failed('Could not locate search form on the court website.',
+                                       schema['page_snippet'] + '...')
+
+        form_data = self._fill_form(schema['fields'], case_type, case_number, filing_year)
+
+        search_response = await self.client.post(self.search_url, data=form_data, timeout=15)
+        if not fresh and search_response.status_code >= 400:
+            return None
+        search_response.raise_for_status()
+
+        results = await loop.run_in_executor(None, self._parse_case_results, search_response.text)
+        if not fresh and not results.success and not results.not_found:
+            return None
+
+        return results
+
+
+class AsyncDistrictCourtScraper(DistrictCourtScraper):
+    """Asyncio version of DistrictCourtScraper.search_case with the same SearchResult"""
+
+    def __init__(self, engine):
+        self.fallback_urls = list(DISTRICT_COURT_URLS)
+        self.current_url_index = 0
+        self.client = engine.client(DISTRICT_COURT_HEADERS)
+
+    async def search_case(self, case_type, case_number, filing_year):
+        """Search for case details across multiple District Court systems"""
+        loop = asyncio.get_running_loop()
+        last_error = None
+
+        for i, search_url in enumerate(self.fallback_urls):
+            try:
+                logging.info(f"Trying District Court #{i+1} (async): {search_url}")
+
+                response = await self.client.get(search_url, timeout=8)
+                response.raise_for_status()
+
+                soup = await loop.run_in_executor(None, BeautifulSoup, response.text, 'html.parser')
+                case_data = await loop.run_in_executor(
+                    None, self._extract_real_case_data, soup, case_type, case_number, filing_year, search_url
+                )
+
+                return SearchResult.found(case_data, f'Successfully connected to {search_url}',
+                                          f'District Court System #{i+1}')
+
+            except httpx.TimeoutException:
+                last_error = f"District Court #{i+1} timed out"
+                logging.warning(f"District Court #{i+1} timeout, trying next...")
+            except httpx.ConnectError:
+                last_error = f"District Court #{i+1} connection failed"
+                logging.warning(f"District Court #{i+1} connection failed, trying next...")
+            except Exception as e:
+                last_error = f"District Court #{i+1} error: {str(e)}"
+                logging.warning(f"District Court #{i+1} failed: {str(e)}")
+
+        return self._unavailable_result(last_error)
@@ -0,0 +1,237 @@
+"""
+Local stand-in for the Delhi High Court and District Court websites
+
+Serves the High Court search form (/pcase/guiCaseWise.php), search results,
+order PDFs and any number of district court pages. Each response is picked
+at random from the configured mix of CAPTCHA, not-found, slow and error
+responses; everything else is a normal result page. GET /_stats returns how
+many responses of each kind were served.
+
+    python benchmarks/loadtest/fake_court.py --port 8900 --captcha-rate 0.2 --slow-rate 0.05
+
+Point the app at it with:
+
+    HIGH_COURT_BASE_URL=http://127.0.0.1:8900/
+    DISTRICT_COURT_URLS=http://127.0.0.1:8900/district/1/,http://127.0.0.1:8900/district/2/
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+SEARCH_FORM = """<html><head><title>Case Status</title></head><body>
+<form method="post" action="/pcase/guiCaseWise.php">
+<input type="hidden" name="token" value="load-test">
+<select name="ctype"><option value="W.P.(C)">W.P.(C)</option><option value="CRL.A.">CRL.A.</option></select>
+<input type="text" name="regno" value="">
+<select name="regyr"><option value="2024">2024</option></select>
+{captcha}
+<input type="submit" name="submit" value="Submit">
+</form>
+{padding}
+</body></html>"""
+
+CAPTCHA_FIELD = '<img src="/captcha/image.php" alt="captcha"><input type="text" name="captcha_code">'
+
+RESULT_PAGE = """<html><body><table>
+<tr><td>Petitioner</td><td>{plaintiff}</td></tr>
+<tr><td>Respondent</td><td>Union of India</td></tr>
+<tr><td>Date of Filing</td><td>12/03/{year}</td></tr>
+<tr><td>Next Date of Hearing</td><td>{next_date}</td></tr>
+<tr><td>Status</td><td>Pending</td></tr>
+</table>
+{orders}
+{padding}
+</body></html>"""
+
+NOT_FOUND_PAGE = "<html><body><p>No record found for the given details.</p>{padding}</body></html>"
+
+DISTRICT_PAGE = "<html><body><h1>Case Status : Search by Case Number</h1><form></form>{padding}</body></html>"
+
+
+def build_pdf(text):
+    """One-page PDF showing a line of text, with the xref table and startxref a strict reader expects"""
+    stream = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'.encode('latin-1')
+    objects = [
+        b'<</Type/Catalog/Pages 2 0 R>>',
+        b'<</Type/Pages/Kids[3 0 R]/Count 1>>',
+        b'<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]/Contents 4 0 R/Resources<</Font<</F1 5 0 R>>>>>>',
+        b'<</Length %d>>stream\n%s\nendstream' % (len(stream), stream),
+        b'<</Type/Font/Subtype/Type1/BaseFont/Helvetica>>',
+    ]
+    pdf = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(pdf)
+    pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    pdf += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    pdf += b'trailer\n<</Size %d/Root 1 0 R>>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+# Valid one-page PDF for the order links
+ORDER_PDF = build_pdf('Order of the Delhi High Court')
+
+# Real court pages are tens of kilobytes; pad ours so parsing costs are comparable
+PADDING = '<div class="footer">' + ' '.join(['Delhi High Court case information system.'] * 400) + '</div>'
+
+
+class Behaviour:
+    """Response mix shared by all handler threads"""
+
+    def __init__(self, latency_ms=50, captcha_rate=0.0, not_found_rate=0.0, slow_rate=0.0,
+                 slow_ms=5000, error_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.captcha_rate = captcha_rate
+        self.not_found_rate = not_found_rate
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def pick(self, *kinds):
+        """Pick one of kinds (each with a configured rate) or 'ok', and record it"""
+        with self.lock:
+            roll = self.random.random()
+            outcome = 'ok'
+            for kind in kinds:
+                rate = getattr(self, f'{kind}_rate')
+                if roll < rate:
+                    outcome = kind
+                    break
+                roll -= rate
+            self.stats[outcome] += 1
+        return outcome
+
+    def delay(self, outcome):
+        with self.lock:
+            jitter = self.random.uniform(0.5, 1.5)
+        time.sleep((self.slow_ms if outcome == 'slow' else self.latency_ms * jitter) / 1000)
+
+
+class FakeCourtHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def behaviour(self):
+        return self.server.behaviour
+
+    def do_GET(self):
+        if self.path == '/_stats':
+            with self.behaviour.lock:
+                return self._send(200, json.dumps(dict(self.behaviour.stats)), 'application/json')
+
+        if self.path.startswith('/pcase/guiCaseWise.php'):
+            outcome = self.behaviour.pick('error', 'captcha', 'slow')
+            self.behaviour.delay(outcome)
+            if outcome == 'error':
+                return self._send(503, 'Service Unavailable')
+            captcha = CAPTCHA_FIELD if outcome == 'captcha' else ''
+            return self._send(200, SEARCH_FORM.format(captcha=captcha, padding=PADDING))
+
+        if self.path.startswith('/orders/'):
+            self.behaviour.delay('ok')
+            return self._send(200, ORDER_PDF, 'application/pdf')
+
+        if self.path.startswith('/district/'):
+            outcome = self.behaviour.pick('error', 'slow')
+            self.behaviour.delay(outcome)
+            if outcome == 'error':
+                return self._send(502, 'Bad Gateway')
+            return self._send(200, DISTRICT_PAGE.format(padding=PADDING))
+
+        return self._send(404, 'Not Found')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode())
+        if not self.path.startswith('/pcase/guiCaseWise.php'):
+            return self._send(404, 'Not Found')
+
+        outcome = self.behaviour.pick('error', 'captcha', 'not_found', 'slow')
+        self.behaviour.delay(outcome)
+        if outcome == 'error':
+            return self._send(500, 'Internal Server Error')
+        if outcome == 'captcha':
+            return self._send(200, '<html><body>Please enter the captcha code.</body></html>')
+        if outcome == 'not_found':
+            return self._send(200, NOT_FOUND_PAGE.format(padding=PADDING))
+
+        number = form.get('regno', ['1'])[0]
+        year = form.get('regyr', ['2024'])[0]
+        orders = '\n'.join(
+            f'<a href="/orders/{number}-{year}-{i}.pdf">Order dated {i:02d}/01/{year}</a>' for i in range(1, 4)
+        )
+        return self._send(200, RESULT_PAGE.format(
+            plaintiff=f'Petitioner {number}', year=year, next_date=f'15/11/{year}', orders=orders, padding=PADDING
+        ))
+
+    def _send(self, status, body, content_type='text/html; charset=utf-8'):
+        if isinstance(body, str):
+            body = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start(host='127.0.0.1', port=0, **behaviour):
+    """Start the fake court in a background thread; returns the server (server.server_port is the port)"""
+    server = ThreadingHTTPServer((host, port), FakeCourtHandler)
+    server.daemon_threads = True
+    server.behaviour = Behaviour(**behaviour)
+    threading.Thread(target=server.serve_forever, name='fake-court', daemon=True).start()
+    return server
+
+
+def add_behaviour_arguments(parser):
+    parser.add_argument('--latency-ms', type=float, default=50, help='typical court response time')
+    parser.add_argument('--captcha-rate', type=float, default=0.0, help='fraction of High Court pages with a CAPTCHA')
+    parser.add_argument('--not-found-rate', type=float, default=0.0, help='fraction of searches with no record')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='fraction of responses delayed by --slow-ms')
+    parser.add_argument('--slow-ms', type=float, default=5000)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of 5xx responses')
+    parser.add_argument('--seed', type=int, default=None)
+
+
+def behaviour_options(args):
+    return {
+        'latency_ms': args.latency_ms,
+        'captcha_rate': args.captcha_rate,
+        'not_found_rate': args.not_found_rate,
+        'slow_rate': args.slow_rate,
+        'slow_ms': args.slow_ms,
+        'error_rate': args.error_rate,
+        'seed': args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    add_behaviour_arguments(parser)
+    args = parser.parse_args()
+
+    server = start(args.host, args.port, **behaviour_options(args))
+    print(f'Fake court listening on http://{args.host}:{server.server_port}/', flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
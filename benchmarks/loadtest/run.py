@@ -0,0 +1,257 @@
+"""
+Load test /search against a local fake court
+
+Starts the fake court (fake_court.py), migrates a throwaway SQLite database,
+boots the app under gunicorn (or the Flask dev server) pointed at the fake
+court, then drives POST /search. The run is either closed-loop (a fixed
+number of clients, each sending its next request when the last one
+returns) or open-loop (Poisson arrivals at a fixed rate, with latency
+measured from the scheduled send time so a slow server cannot hide its own
+backlog). Prints a JSON report: throughput, latency percentiles, outcome
+counts, error rates and what the fake court served.
+
+    python benchmarks/loadtest/run.py --mode closed --concurrency 16 --duration 30
+    python benchmarks/loadtest/run.py --mode open --rate 40 --workers 4 --threads 8 --captcha-rate 0.2
+    python benchmarks/loadtest/run.py --target http://127.0.0.1:5000 --court-url http://127.0.0.1:8900  # your own app
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(HERE))
+sys.path.insert(0, ROOT)
+
+import fake_court
+from validation import VALID_CASE_TYPES
+
+
+class Recorder:
+    """Collects (latency, outcome) samples once the warm-up is over"""
+
+    def __init__(self, measure_from):
+        self.measure_from = measure_from
+        self.latencies = []
+        self.outcomes = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, started, latency, outcome):
+        if started < self.measure_from:
+            return
+        with self.lock:
+            self.latencies.append(latency)
+            self.outcomes[outcome] += 1
+
+
+def search_once(session, target, rng, cases, timeout):
+    """POST one random search; returns its outcome"""
+    form = {
+        'case_type': rng.choice(VALID_CASE_TYPES),
+        'case_number': str(rng.randint(1, cases)),
+        'filing_year': str(rng.randint(2015, 2024)),
+    }
+    try:
+        response = session.post(f'{target}/search', data=form, timeout=timeout, allow_redirects=False)
+    except requests.Timeout:
+        return 'timeout'
+    except requests.RequestException:
+        return 'connection_error'
+    if response.status_code == 200:
+        return 'ok'
+    if response.status_code == 303 and '/case/' in response.headers.get('Location', ''):
+        # Found: Post/Redirect/Get to the case permalink
+        return 'ok'
+    if response.status_code in (302, 303):
+        # The app answered but the search failed (CAPTCHA, not found, court down) and it redirected with a flash
+        return 'search_failed'
+    if response.status_code == 503:
+        # Refused by admission control (SCRAPE_CONCURRENCY / SCRAPE_QUEUE)
+        return 'shed'
+    return f'http_{response.status_code}'
+
+
+def closed_loop(args, recorder, stop_at):
+    def client(seed):
+        rng = random.Random(seed)
+        session = requests.Session()
+        while time.monotonic() < stop_at:
+            started = time.monotonic()
+            outcome = search_once(session, args.target, rng, args.cases, args.timeout)
+            recorder.record(started, time.monotonic() - started, outcome)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def open_loop(args, recorder, stop_at):
+    local = threading.local()
+    rng = random.Random(args.seed)
+
+    def send(scheduled, seed):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        outcome = search_once(local.session, args.target, random.Random(seed), args.cases, args.timeout)
+        # Measured from when the request should have gone out, not when a thread was free
+        recorder.record(scheduled, time.monotonic() - scheduled, outcome)
+
+    with ThreadPoolExecutor(max_workers=args.max_inflight) as pool:
+        next_at = time.monotonic()
+        while next_at < stop_at:
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, next_at, rng.random())
+            next_at += rng.expovariate(args.rate)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def report(args, recorder, court_stats):
+    latencies = sorted(latency * 1000 for latency in recorder.latencies)
+    total = len(latencies)
+    errors = sum(count for outcome, count in recorder.outcomes.items() if outcome not in ('ok', 'search_failed'))
+    return {
+        'scenario': {
+            'mode': args.mode,
+            'concurrency': args.concurrency if args.mode == 'closed' else None,
+            'rate': args.rate if args.mode == 'open' else None,
+            'duration_s': args.duration,
+            'warmup_s': args.warmup,
+            'server': None if args.external else args.server,
+            'workers': None if args.external else args.workers,
+            'threads': None if args.external else args.threads,
+            'court': fake_court.behaviour_options(args),
+        },
+        'requests': total,
+        'throughput_rps': round(total / args.duration, 2),
+        'latency_ms': {
+            'mean': round(sum(latencies) / total, 1) if total else None,
+            'p50': _round(percentile(latencies, 0.50)),
+            'p90': _round(percentile(latencies, 0.90)),
+            'p95': _round(percentile(latencies, 0.95)),
+            'p99': _round(percentile(latencies, 0.99)),
+            'max': _round(latencies[-1] if latencies else None),
+        },
+        'outcomes': dict(recorder.outcomes),
+        'error_rate': round(errors / total, 4) if total else None,
+        'failed_search_rate': round(recorder.outcomes['search_failed'] / total, 4) if total else None,
+        'court_responses': court_stats,
+    }
+
+
+def _round(value):
+    return None if value is None else round(value, 1)
+
+
+def start_app(args, court_url, workdir):
+    """Migrate a fresh database and boot the app on a free port; returns (process, base URL)"""
+    port = args.port
+    env = dict(
+        os.environ,
+        DATABASE_URL=f'sqlite:///{os.path.join(workdir, "loadtest.db")}',
+        HIGH_COURT_BASE_URL=f'{court_url}/',
+        DISTRICT_COURT_URLS=','.join(f'{court_url}/district/{i}/' for i in range(1, 4)),
+        SESSION_SECRET='loadtest',
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        GUNICORN_WORKERS=str(args.workers),
+        GUNICORN_THREADS=str(args.threads),
+    )
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'migrate'],
+                   cwd=ROOT, env=env, check=True, capture_output=True)
+
+    if args.server == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'main:app']
+    else:
+        command = [sys.executable, '-m', 'flask', '--app', 'app', 'run', '--port', str(port), '--with-threads']
+    log = open(os.path.join(workdir, 'app.log'), 'wb')
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    target = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'App exited during startup; see {log.name}')
+        try:
+            if requests.get(target + '/', timeout=1).status_code == 200:
+                return process, target
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f'App did not become ready within 30s; see {log.name}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mode', choices=('closed', 'open'), default='closed')
+    parser.add_argument('--concurrency', type=int, default=16, help='closed loop: concurrent clients')
+    parser.add_argument('--rate', type=float, default=20, help='open loop: requests per second')
+    parser.add_argument('--max-inflight', type=int, default=512, help='open loop: client threads')
+    parser.add_argument('--duration', type=float, default=30, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=5, help='seconds of load before measuring')
+    parser.add_argument('--timeout', type=float, default=60, help='client timeout per request')
+    parser.add_argument('--cases', type=int, default=1000, help='distinct case numbers to draw from')
+    parser.add_argument('--target', help='base URL of an app you started yourself (skips starting one)')
+    parser.add_argument('--court-url', help='with --target: the fake court that app points at (for its stats)')
+    parser.add_argument('--server', choices=('gunicorn', 'flask'), default='gunicorn')
+    parser.add_argument('--port', type=int, default=8901)
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    fake_court.add_behaviour_arguments(parser)
+    args = parser.parse_args()
+
+    args.external = args.target is not None
+    court = None
+    process = None
+    workdir = tempfile.mkdtemp(prefix='nyayalens-loadtest-')
+    try:
+        if args.external:
+            court_url = args.court_url
+        else:
+            court = fake_court.start(**fake_court.behaviour_options(args))
+            court_url = f'http://127.0.0.1:{court.server_port}'
+            process, args.target = start_app(args, court_url, workdir)
+
+        started = time.monotonic()
+        recorder = Recorder(measure_from=started + args.warmup)
+        stop_at = started + args.warmup + args.duration
+        (closed_loop if args.mode == 'closed' else open_loop)(args, recorder, stop_at)
+
+        court_stats = requests.get(f'{court_url}/_stats', timeout=5).json() if court_url else None
+        result = json.dumps(report(args, recorder, court_stats), indent=2)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(result + '\n')
+        else:
+            print(result)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        if court is not None:
+            court.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
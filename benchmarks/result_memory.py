@@ -0,0 +1,100 @@
+"""
+Allocations and memory of building one search result
+
+Builds High Court results (parsing a fake court result page) and District
+Court results (the generated case data), then maps each onto Case/CaseOrder
+rows the way /search does. For each step it reports traced allocations and
+peak memory per result, plus the memory each result keeps alive while held.
+
+    python benchmarks/result_memory.py --iterations 200
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'loadtest'))
+
+from bs4 import BeautifulSoup
+
+import fake_court
+from models import Case
+from scraper import DelhiHighCourtScraper, DistrictCourtScraper
+
+RESULT_HTML = fake_court.RESULT_PAGE.format(
+    plaintiff='Petitioner 1234', year='2021', next_date='15/11/2021', padding=fake_court.PADDING,
+    orders='\n'.join(f'<a href="/orders/1234-2021-{i}.pdf">Order dated {i:02d}/01/2021</a>' for i in range(1, 4))
+)
+DISTRICT_SOUP = BeautifulSoup(fake_court.DISTRICT_PAGE.format(padding=''), 'html.parser')
+
+
+def high_court_result(i):
+    result = HIGH_COURT._parse_case_results(RESULT_HTML)
+    return result, _mapped(result.data, result.raw_data)
+
+
+def district_result(i):
+    details = DISTRICT._extract_real_case_data(DISTRICT_SOUP, 'W.P.(C)', str(i + 1), '2021', 'http://district.test/')
+    return details, _mapped(details, '')
+
+
+def _mapped(details, raw_response):
+    case = Case()
+    case.apply_result(details, raw_response)
+    return case
+
+
+HIGH_COURT = DelhiHighCourtScraper()
+DISTRICT = DistrictCourtScraper()
+
+
+def measure(build, iterations):
+    """(allocated blocks per call, peak KiB per call, retained bytes per result)"""
+    build(0)  # warm imports and caches
+    gc.collect()
+
+    blocks = peaks = 0
+    for i in range(iterations):
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        build(i)
+        peak = tracemalloc.get_traced_memory()[1]
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        blocks += sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+        peaks += peak
+
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    held = [build(i) for i in range(iterations)]
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del held
+
+    return {
+        'allocated_blocks': round(blocks / iterations),
+        'peak_kib': round(peaks / iterations / 1024, 1),
+        'retained_bytes_per_result': round(retained / iterations),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    report = {
+        'high_court': measure(high_court_result, args.iterations),
+        'district': measure(district_result, args.iterations),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
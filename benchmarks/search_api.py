@@ -0,0 +1,136 @@
+"""
+Requests/sec of /api/v1/search against the HTML /search route
+
+Runs the app in-process (Flask test client) against the local fake court
+with no added latency, so the numbers are dominated by our own work:
+scraping, recording, and then either redirecting to and rendering the case
+page or serializing JSON. Each client thread cycles through the same
+cases, so after the first pass every lookup takes the unchanged-page
+path. Also times serializing one result with the stdlib json module and
+with orjson.
+
+    python benchmarks/search_api.py --requests 500 --clients 4
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(HERE, 'loadtest'))
+
+import fake_court
+
+CASE_TYPES = ['W.P.(C)', 'CRL.A.', 'CS(OS)', 'FAO']
+
+
+def case_form(i, cases):
+    return {
+        'case_type': CASE_TYPES[i % len(CASE_TYPES)],
+        'case_number': str(i % cases + 1),
+        'filing_year': '2021',
+    }
+
+
+def html_request(client, form):
+    # Found cases redirect to their permalink page; follow it so the page render is counted
+    response = client.post('/search', data=form, follow_redirects=True)
+    return response.status_code == 200 and response.request.path.startswith('/case/')
+
+
+def api_get_request(client, form):
+    response = client.get('/api/v1/search', query_string=form)
+    return response.status_code == 200
+
+
+def api_post_request(client, form):
+    response = client.post('/api/v1/search', json=form)
+    return response.status_code == 200
+
+
+def run(app, send, requests, clients, cases):
+    """(requests/sec, fraction of 200 responses) with clients threads sharing requests"""
+    counter = iter(range(requests))
+    lock = threading.Lock()
+    ok = []
+
+    def client_loop():
+        client = app.test_client()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            ok.append(send(client, case_form(i, cases)))
+
+    threads = [threading.Thread(target=client_loop) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {'requests_per_sec': round(requests / elapsed, 1), 'ok_rate': round(sum(ok) / len(ok), 4)}
+
+
+def serialization(app, iterations=2000):
+    """Microseconds to serialize one search result, stdlib json vs the app's provider"""
+    from scraper import DistrictCourtScraper
+
+    payload = DistrictCourtScraper()._extract_real_case_data(None, 'W.P.(C)', '42', '2021', 'http://x/')
+    payload = {'success': True, 'data': payload.to_dict(), 'raw_data': 'x' * 2000}
+    stdlib = timeit.timeit(lambda: json.dumps(payload, sort_keys=True, separators=(',', ':')), number=iterations)
+    provider = timeit.timeit(lambda: app.json.dumps(payload), number=iterations)
+    return {
+        'provider': type(app.json).__name__,
+        'stdlib_json_us': round(stdlib / iterations * 1e6, 1),
+        'provider_us': round(provider / iterations * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500, help='requests per route')
+    parser.add_argument('--clients', type=int, default=4, help='concurrent client threads')
+    parser.add_argument('--cases', type=int, default=50, help='distinct cases cycled through')
+    args = parser.parse_args()
+
+    court = fake_court.start(latency_ms=0)
+    court_url = f'http://127.0.0.1:{court.server_port}'
+    workdir = tempfile.mkdtemp(prefix='nyayalens-api-bench-')
+    os.environ.update(
+        DATABASE_URL=f'sqlite:///{os.path.join(workdir, "bench.db")}',
+        HIGH_COURT_BASE_URL=f'{court_url}/',
+        DISTRICT_COURT_URLS=f'{court_url}/district/1/',
+        SESSION_SECRET='benchmark',
+    )
+
+    import logging
+    from app import app
+    import migrations
+
+    logging.disable(logging.INFO)
+    with app.app_context():
+        migrations.upgrade()
+
+    # Store every case once so both routes measure the same (unchanged page) path
+    run(app, api_get_request, args.cases, 1, args.cases)
+
+    report = {
+        'html_post': run(app, html_request, args.requests, args.clients, args.cases),
+        'api_get': run(app, api_get_request, args.requests, args.clients, args.cases),
+        'api_post': run(app, api_post_request, args.requests, args.clients, args.cases),
+        'serialization': serialization(app),
+    }
+    court.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+SQLite read/write throughput under multi-worker contention
+
+Simulates several gunicorn workers sharing one SQLite file. Each worker
+process runs writer threads (one CaseQuery insert per transaction, like
+/search) and reader threads (the /query_history listing). The script runs
+once with the old engine settings and once with the db_engine SQLite
+profile, then prints ops/sec and "database is locked" errors for both.
+
+    python benchmarks/sqlite_concurrency.py --workers 4 --seconds 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+
+import db_engine
+from models import CaseQuery, db
+
+BASELINE_OPTIONS = {"pool_recycle": 300, "pool_pre_ping": True}
+
+
+def make_engine(url, profile):
+    if profile == 'baseline':
+        return create_engine(url, **BASELINE_OPTIONS)
+    engine = create_engine(url, **db_engine.engine_options(url))
+    db_engine.configure_engine(engine)
+    return engine
+
+
+def worker(url, profile, seconds, writers, readers, results):
+    engine = make_engine(url, profile)
+    table = CaseQuery.__table__
+    history = select(table).order_by(table.c.query_timestamp.desc()).limit(50)
+    counts = {'writes': 0, 'reads': 0, 'locked': 0}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + seconds
+
+    def write_loop():
+        n = 0
+        while time.monotonic() < stop_at:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(table).values(
+                        case_type='W.P.(C)', case_number=str(n), filing_year='2020',
+                        query_timestamp=datetime.utcnow(), success=False, error_message='benchmark'
+                    ))
+                key = 'writes'
+            except OperationalError:
+                key = 'locked'
+            with lock:
+                counts[key] += 1
+            n += 1
+
+    def read_loop():
+        while time.monotonic() < stop_at:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(history).fetchall()
+                key = 'reads'
+            except OperationalError:
+                key = 'locked'
+            with lock:
+                counts[key] += 1
+
+    threads = [threading.Thread(target=write_loop) for _ in range(writers)]
+    threads += [threading.Thread(target=read_loop) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    results.put(counts)
+
+
+def run(profile, args):
+    directory = tempfile.mkdtemp(prefix='nyayalens-bench-')
+    url = f'sqlite:///{os.path.join(directory, "bench.db")}'
+    setup = make_engine(url, profile)
+    db.metadata.create_all(setup)
+    setup.dispose()
+
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(url, profile, args.seconds, args.writers, args.readers, results))
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    totals = {'writes': 0, 'reads': 0, 'locked': 0}
+    for _ in processes:
+        for key, value in results.get().items():
+            totals[key] += value
+    for process in processes:
+        process.join()
+
+    return {
+        'profile': profile,
+        'writes_per_sec': round(totals['writes'] / args.seconds, 1),
+        'reads_per_sec': round(totals['reads'] / args.seconds, 1),
+        'locked_errors': totals['locked'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4, help='worker processes')
+    parser.add_argument('--writers', type=int, default=2, help='writer threads per worker')
+    parser.add_argument('--readers', type=int, default=2, help='reader threads per worker')
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    report = [run(profile, args) for profile in ('baseline', 'tuned')]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Size caps on response bodies read from the court websites
+
+Sessions passed to install() read every non-streamed response in chunks
+and give up once the body passes the cap for its content type, instead of
+letting requests buffer whatever the court sends. A Content-Length over the
+cap is refused before any of the body is read. The cap applies to the
+decoded body, so a small gzip bomb is caught as well. Streamed downloads
+(PDFs, which go straight to a file) use iter_capped instead, and the async
+engine's httpx clients get the same cap from the read_capped_async hook.
+
+Oversized bodies raise ResponseTooLarge. It is not a requests or httpx
+exception, so this module (imported by routes at worker boot) does not load
+either library; the scrapers catch it next to their network errors.
+
+HTML is still handed to BeautifulSoup whole once it is under the cap: bs4
+has no incremental feed, and the scrapers need the complete tree anyway, so
+a page costs at most HTML_MAX_BYTES plus its parse tree.
+"""
+import os
+
+import metrics
+
+HTML_MAX_BYTES = int(os.environ.get("UPSTREAM_HTML_MAX_BYTES", str(5 * 1024 * 1024)))
+PDF_MAX_BYTES = int(os.environ.get("UPSTREAM_PDF_MAX_BYTES", str(100 * 1024 * 1024)))
+CHUNK_SIZE = 65536
+
+
+class ResponseTooLarge(IOError):
+    """A court response body was larger than its cap"""
+
+
+def limit_for(content_type):
+    """Byte cap for a Content-Type header value; anything but a PDF gets the HTML cap"""
+    if content_type and content_type.split(';')[0].strip().lower() == 'application/pdf':
+        return PDF_MAX_BYTES
+    return HTML_MAX_BYTES
+
+
+def check_length(url, headers, max_bytes):
+    """Raise ResponseTooLarge if a declared Content-Length is already over max_bytes"""
+    try:
+        length = int(headers.get('Content-Length', ''))
+    except ValueError:
+        return
+    if length > max_bytes:
+        _refuse(url, f'{length} bytes declared')
+
+
+def iter_capped(response, max_bytes=None, chunk_size=CHUNK_SIZE):
+    """Yield a streamed response's body in chunks, raising once it passes max_bytes"""
+    if max_bytes is None:
+        max_bytes = limit_for(response.headers.get('Content-Type'))
+    check_length(response.url, response.headers, max_bytes)
+    size = 0
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        size += len(chunk)
+        if size > max_bytes:
+            response.close()
+            _refuse(response.url, f'over {max_bytes} bytes')
+        yield chunk
+
+
+def install(session):
+    """Cap the bodies of session's non-streamed responses; returns the session"""
+    session.hooks['response'].append(_read_capped)
+    return session
+
+
+def _read_capped(response, stream=False, **kwargs):
+    if stream:
+        return response
+    # What Session.send would do next with response.content, but stopping at the cap
+    response._content = b''.join(iter_capped(response))
+    return response
+
+
+async def read_capped_async(response):
+    """httpx response event hook doing what install() does for requests sessions"""
+    max_bytes = limit_for(response.headers.get('Content-Type'))
+    check_length(response.url, response.headers, max_bytes)
+    chunks = []
+    size = 0
+    async for chunk in response.aiter_bytes(chunk_size=CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            await response.aclose()
+            _refuse(response.url, f'over {max_bytes} bytes')
+        chunks.append(chunk)
+    # httpx's aread() keeps an already-set _content instead of reading the stream again
+    response._content = b''.join(chunks)
+
+
+def _refuse(url, detail):
+    metrics.inc('nyayalens_upstream_too_large_total', help='Court responses refused for exceeding a size cap')
+    raise ResponseTooLarge(f'Response from {url} too large ({detail})')
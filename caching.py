@@ -0,0 +1,197 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from email.utils import parsedate_to_datetime
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries expire after a TTL (seconds)"""
+
+    def __init__(self, ttl, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one
+
+    The first caller runs the function; callers arriving while it runs wait
+    for and share its result (or exception). Nothing is kept afterwards.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """Return (result, shared) where shared is True if another caller's run was reused"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+
+        if not leader:
+            return call.result(), True
+
+        try:
+            call.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            call.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return call.result(), False
+
+
+class HttpCache:
+    """
+    Private HTTP cache for upstream GETs
+
+    Honours Cache-Control (no-store, no-cache, max-age) and Expires for
+    freshness, and revalidates stale entries with If-None-Match /
+    If-Modified-Since so an unchanged page costs a 304 instead of a full body.
+    Works with both requests and httpx responses.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, url):
+        """Return the stored response if it is still fresh, otherwise None"""
+        with self._lock:
+            entry = self._entries.get(url)
+        if entry and entry['expires_at'] > time.time():
+            return entry['response']
+        return None
+
+    def conditional_headers(self, url):
+        """Validators to send when revalidating a stale entry"""
+        with self._lock:
+            entry = self._entries.get(url)
+        headers = {}
+        if entry:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def update(self, url, response):
+        """
+        Record an upstream response and return the response the caller should use
+
+        A 304 for an entry evicted since conditional_headers is returned as
+        is; the caller has no body to use and must fetch url again without
+        validators (see get).
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+
+        if response.status_code == 304 and entry:
+            entry['expires_at'] = self._expires_at(response.headers)
+            return entry['response']
+
+        if response.status_code != 200:
+            return response
+
+        cache_control = response.headers.get('Cache-Control', '').lower()
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        expires_at = self._expires_at(response.headers)
+
+        if 'no-store' in cache_control or not (etag or last_modified or expires_at > time.time()):
+            with self._lock:
+                self._entries.pop(url, None)
+            return response
+
+        with self._lock:
+            self._entries[url] = {
+                'response': response,
+                'etag': etag,
+                'last_modified': last_modified,
+                'expires_at': expires_at,
+            }
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return response
+
+    def get(self, session, url, **kwargs):
+        """Cached GET through a requests session"""
+        cached = self.lookup(url)
+        if cached is not None:
+            return cached
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        response = self.update(url, session.get(url, headers={**headers, **self.conditional_headers(url)}, **kwargs))
+        if response.status_code == 304:
+            # Evicted while revalidating: the 304 has no body to go with it
+            response = self.update(url, session.get(url, headers=headers, **kwargs))
+        return response
+
+    def pop(self, url):
+        """Forget the stored response for url"""
+        with self._lock:
+            self._entries.pop(url, None)
+
+    def _expires_at(self, headers):
+        cache_control = headers.get('Cache-Control', '').lower()
+        directives = [part.strip() for part in cache_control.split(',')]
+
+        if 'no-cache' in directives:
+            return 0
+
+        for directive in directives:
+            if directive.startswith('max-age='):
+                try:
+                    return time.time() + int(directive.split('=', 1)[1])
+                except ValueError:
+                    return 0
+
+        expires = headers.get('Expires')
+        if expires:
+            try:
+                return parsedate_to_datetime(expires).timestamp()
+            except (TypeError, ValueError):
+                return 0
+
+        return 0
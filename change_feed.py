@@ -0,0 +1,71 @@
+"""
+Change feed over the CaseChange log
+
+Consumers keep the cursor of the last change they saw and ask for the
+changes after it, instead of polling every tracked case. A read may wait
+(long-poll) for new changes: a search in this worker that records a change
+wakes its waiters at once, and waiters re-check the database every
+poll_interval seconds to see changes written by other workers. Each check
+takes a pooled connection only for the query itself.
+"""
+import threading
+import time
+
+from sqlalchemy import select
+
+from models import Case, CaseChange, db
+
+
+class ChangeFeed:
+    """Batched, optionally long-polled reads of CaseChange rows after a cursor"""
+
+    def __init__(self, poll_interval=1.0):
+        self.poll_interval = poll_interval
+        self._condition = threading.Condition()
+        self._version = 0
+
+    def notify(self):
+        """Wake waiters after a change was committed"""
+        with self._condition:
+            self._version += 1
+            self._condition.notify_all()
+
+    def read(self, since, limit):
+        """(entries, has_more) for up to limit changes with a cursor above since, oldest first"""
+        changes = CaseChange.__table__
+        cases = Case.__table__
+        with db.engine.connect() as conn:
+            rows = conn.execute(
+                select(changes, cases.c.case_type, cases.c.case_number, cases.c.filing_year)
+                .join(cases, cases.c.id == changes.c.case_id)
+                .where(changes.c.id > since)
+                .order_by(changes.c.id)
+                .limit(limit + 1)
+            ).mappings().all()
+        return [_entry(row) for row in rows[:limit]], len(rows) > limit
+
+    def wait(self, since, limit, timeout):
+        """Like read, but wait up to timeout seconds for a change if there is none yet"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._condition:
+                version = self._version
+            entries, has_more = self.read(since, limit)
+            remaining = deadline - time.monotonic()
+            if entries or remaining <= 0:
+                return entries, has_more
+            with self._condition:
+                if self._version == version:
+                    self._condition.wait(min(self.poll_interval, remaining))
+
+
+def _entry(row):
+    return {
+        'cursor': str(row['id']),
+        'changed_at': row['changed_at'].isoformat() if row['changed_at'] else None,
+        'case_type': row['case_type'],
+        'case_number': row['case_number'],
+        'filing_year': row['filing_year'],
+        'fields': row['fields'] or {},
+        'new_orders': row['new_orders'] or [],
+    }
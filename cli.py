@@ -0,0 +1,122 @@
+import asyncio
+import csv
+import json
+from datetime import datetime
+
+import click
+
+from app import app
+
+
+@app.cli.command('batch-search')
+@click.argument('input_file', type=click.File('r'))
+@click.option('--output', type=click.File('w'), default='-', help='NDJSON output file (default: stdout)')
+@click.option('--concurrency', default=200, show_default=True, help='Maximum outstanding lookups')
+def batch_search(input_file, output, concurrency):
+    """
+    Look up every case_type,case_number,filing_year row of a CSV file concurrently
+
+    Rows that fail validation are not looked up; their output line carries
+    the validation errors instead of a court result.
+    """
+    from async_scraper import AsyncCourtEngine
+    from validation import canonical_case_key, validate_case_input
+
+    rows = [tuple(cell.strip() for cell in row[:3]) for row in csv.reader(input_file) if len(row) >= 3]
+    errors = [validate_case_input(*row) for row in rows]
+    queries = [canonical_case_key(*row) for row, row_errors in zip(rows, errors) if not row_errors]
+
+    async def run():
+        engine = AsyncCourtEngine(max_concurrency=concurrency)
+        try:
+            return await engine.search_many(queries)
+        finally:
+            await engine.aclose()
+
+    results = iter(asyncio.run(run()) if queries else [])
+
+    succeeded = 0
+    for row, row_errors in zip(rows, errors):
+        if row_errors:
+            line = {'query': list(row), 'result': {'success': False, 'error': row_errors[0], 'errors': row_errors}}
+        else:
+            result = next(results)
+            succeeded += result.success
+            line = {'query': list(row), 'result': result.to_dict()}
+        output.write(json.dumps(line) + '\n')
+
+    click.echo(f'{succeeded}/{len(rows)} lookups succeeded', err=True)
+
+
+@app.cli.command('migrate')
+def migrate():
+    """Create missing tables and migrate legacy per-search case data"""
+    import migrations
+
+    migrations.upgrade()
+    click.echo('Database schema is up to date', err=True)
+
+
+@app.cli.command('reindex-search')
+def reindex_search():
+    """Rebuild the full-text index used by /search_local"""
+    import search_index
+    from models import db
+
+    with db.engine.begin() as conn:
+        search_index.ensure_index(conn)
+        click.echo(f'Indexed {search_index.rebuild(conn)} cases', err=True)
+
+
+@app.cli.command('compress-static')
+def compress_static():
+    """Write pre-compressed .gz/.br copies of the static files for the static view to serve"""
+    import compression
+
+    written = compression.compress_static(app.static_folder)
+    click.echo(f'Wrote {len(written)} compressed static files', err=True)
+
+
+@app.cli.command('extract-order-text')
+@click.option('--limit', default=1000, show_default=True, help='Maximum orders to process')
+def extract_order_text(limit):
+    """Extract and index the text of cached order PDFs that have not been processed yet"""
+    import pdf_text
+    from models import CaseOrder, db
+    from routes import pdf_cache
+
+    if pdf_text.pypdf is None:
+        raise click.ClickException('pypdf is not installed')
+
+    orders = CaseOrder.query.filter(CaseOrder.pdf_url.isnot(None), CaseOrder.pdf_url != '',
+                                    CaseOrder.text_extracted_at.is_(None)).limit(limit).all()
+    extracted = 0
+    for order in orders:
+        path = pdf_cache.get(order.pdf_url)
+        if path is None:
+            continue
+        order.order_text = pdf_text.extract_text(path, app.config["PDF_TEXT_MAX_PAGES"], app.config["PDF_TEXT_MAX_CHARS"])
+        order.text_extracted_at = datetime.utcnow()
+        db.session.commit()
+        extracted += 1
+    click.echo(f'Extracted text from {extracted} of {len(orders)} orders', err=True)
+
+
+@app.cli.command('retention')
+@click.option('--days', type=int, default=lambda: app.config["RETENTION_DAYS"],
+              help='Compact search history older than this many days (0 disables)')
+@click.option('--order-days', type=int, default=lambda: app.config["ORDER_RETENTION_DAYS"],
+              help='Archive orders of cases idle for this many days (0 disables)')
+@click.option('--change-days', type=int, default=lambda: app.config["CHANGE_RETENTION_DAYS"],
+              help='Delete change feed entries older than this many days (0 disables)')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows deleted per transaction')
+@click.option('--archive-dir', default=lambda: app.config["ARCHIVE_DIR"], help='Where the NDJSON archives are written')
+@click.option('--no-vacuum', is_flag=True, help='Skip VACUUM/ANALYZE afterwards')
+def retention_command(days, order_days, change_days, batch_size, archive_dir, no_vacuum):
+    """Roll old search history into daily stats, archive it and compact the database"""
+    import retention
+
+    removed = retention.run(archive_dir, query_days=days, order_days=order_days, change_days=change_days,
+                            batch_size=batch_size, vacuum=not no_vacuum)
+    click.echo(f"Removed {removed['case_query']} history rows, {removed['case_order']} orders and "
+               f"{removed['case_change']} change feed entries; archives in {archive_dir}", err=True)
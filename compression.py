@@ -0,0 +1,202 @@
+"""
+Response compression and fingerprinted static files
+
+- Dynamic responses (HTML, JSON, JS, CSS, ...) above a size threshold are
+  compressed with brotli or gzip, whichever the client prefers (brotli
+  needs the optional `brotli` package).
+- url_for('static', ...) appends a content hash (?v=...). Requests that
+  carry the current hash are served with a year-long immutable
+  Cache-Control, since a changed file gets a new URL.
+- Static files are served from pre-compressed .br/.gz siblings when they
+  exist (see `flask --app app compress-static`).
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+from flask import current_app, request, send_file
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/xml', 'text/javascript',
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+}
+
+# Suffix of the pre-compressed variant for each encoding, in server preference order
+STATIC_VARIANTS = {'br': '.br', 'gzip': '.gz'}
+
+_hashes = {}
+_hashes_lock = threading.Lock()
+
+
+def init_app(app, min_size=500, level=6, static_max_age=31536000):
+    app.config.setdefault('COMPRESS_MIN_SIZE', min_size)
+    app.config.setdefault('COMPRESS_LEVEL', level)
+    app.config.setdefault('STATIC_MAX_AGE', static_max_age)
+
+    app.url_defaults(_fingerprint_static)
+    app.view_functions['static'] = _static_view
+    app.after_request(_compress_response)
+
+
+def available_encodings():
+    return [encoding for encoding in STATIC_VARIANTS if encoding != 'br' or brotli is not None]
+
+
+def negotiate(accept_encoding, encodings):
+    """Pick the first of encodings that the Accept-Encoding header allows, or None"""
+    allowed = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            allowed[name.strip().lower()] = quality
+
+    for encoding in encodings:
+        quality = allowed.get(encoding, allowed.get('*', 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding, level=6):
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(level + 2, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def file_hash(path):
+    """Short content hash of a file, cached until its mtime or size changes"""
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _hashes_lock:
+        cached = _hashes.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+    with _hashes_lock:
+        _hashes[path] = (key, digest)
+    return digest
+
+
+def _fingerprint_static(endpoint, values):
+    if endpoint != 'static' or 'v' in values or 'filename' not in values:
+        return
+    path = safe_join(current_app.static_folder, values['filename'])
+    if path and os.path.isfile(path):
+        values['v'] = file_hash(path)
+
+
+def _static_view(filename):
+    path = safe_join(current_app.static_folder, filename)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+
+    encoding = None
+    served = path
+    accepted = negotiate(request.headers.get('Accept-Encoding'), [
+        encoding for encoding in available_encodings()
+        if _fresh_variant(path, STATIC_VARIANTS[encoding])
+    ])
+    if accepted:
+        encoding = accepted
+        served = path + STATIC_VARIANTS[encoding]
+
+    # The mimetype comes from the original name, not the .gz/.br variant
+    response = send_file(served, download_name=os.path.basename(path), conditional=True,
+                         max_age=None)
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.content_encoding = encoding
+
+    version = request.args.get('v')
+    if version and version == file_hash(path):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config['STATIC_MAX_AGE']
+        response.cache_control.immutable = True
+    else:
+        # Unversioned (or stale) URL: allow caching but revalidate every time
+        response.cache_control.no_cache = True
+    return response
+
+
+def _fresh_variant(path, suffix):
+    try:
+        return os.stat(path + suffix).st_mtime >= os.stat(path).st_mtime
+    except FileNotFoundError:
+        return False
+
+
+def _compress_response(response):
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.content_encoding
+            or response.mimetype not in COMPRESSIBLE_TYPES
+            or request.method == 'HEAD'):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+
+    encoding = negotiate(request.headers.get('Accept-Encoding'), available_encodings())
+    if encoding is None:
+        return response
+
+    compressed = compress(data, encoding, current_app.config['COMPRESS_LEVEL'])
+    if len(compressed) >= len(data):
+        return response
+
+    response.set_data(compressed)
+    response.content_encoding = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # The bytes differ from the identity encoding, so the validator can only be weak
+        response.set_etag(etag, weak=True)
+
+    metrics.inc('nyayalens_compressed_responses_total', help='Responses compressed on the fly')
+    metrics.inc('nyayalens_compression_saved_bytes_total', len(data) - len(compressed),
+                help='Bytes saved by on-the-fly response compression')
+    return response
+
+
+def compress_static(folder, level=9):
+    """Write .gz (and .br) siblings next to every compressible static file; returns the paths written"""
+    written = []
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if name.endswith(tuple(STATIC_VARIANTS.values())):
+                continue
+            path = os.path.join(root, name)
+            if mimetypes.guess_type(name)[0] not in COMPRESSIBLE_TYPES:
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            for encoding in available_encodings():
+                variant = path + STATIC_VARIANTS[encoding]
+                compressed = compress(data, encoding, level)
+                if len(compressed) >= len(data):
+                    continue
+                with open(variant, 'wb') as f:
+                    f.write(compressed)
+                written.append(variant)
+    return written
@@ -0,0 +1,118 @@
+import functools
+import math
+import sqlite3
+import time
+
+from flask import after_this_request, current_app, g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+# Bind key of the optional read replica engine (DATABASE_READ_URL)
+REPLICA = 'replica'
+
+# Cookie holding the time of the client's last write; only set while a replica is configured.
+# It is not the Flask session, so reading it does not make every response Vary: Cookie
+WROTE_AT_COOKIE = 'wrote_at'
+
+# Applied to every new SQLite connection; see configure_engine
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',          # readers no longer block the writer (and vice versa)
+    'synchronous': 'NORMAL',        # fsync at checkpoints only; safe with WAL
+    'mmap_size': 268435456,         # 256 MiB of the database memory-mapped
+    'cache_size': -65536,           # 64 MiB page cache per connection
+    'temp_store': 'MEMORY',
+}
+
+
+def is_sqlite(database_url):
+    return database_url.startswith('sqlite')
+
+
+def engine_options(database_url, busy_timeout_ms=5000):
+    """SQLAlchemy engine options for the configured database"""
+    if not is_sqlite(database_url):
+        return {
+            "pool_recycle": 300,
+            "pool_pre_ping": True,
+        }
+
+    options = {
+        # pysqlite's timeout is SQLite's busy handler: wait for the write lock instead of failing
+        "connect_args": {"timeout": busy_timeout_ms / 1000, "check_same_thread": False},
+    }
+    if ':memory:' not in database_url and database_url.rstrip('/') != 'sqlite:':
+        # A local file never goes stale, so no pre-ping or recycling; size the pool for
+        # one connection per worker thread plus the background writers
+        options.update({
+            "pool_size": 10,
+            "max_overflow": 10,
+            "pool_timeout": 30,
+        })
+    return options
+
+
+def configure_engine(engine, busy_timeout_ms=5000):
+    """Install the SQLite connection profile on engine (no-op for other databases)"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f'PRAGMA busy_timeout = {int(busy_timeout_ms)}')
+            for pragma, value in SQLITE_PRAGMAS.items():
+                cursor.execute(f'PRAGMA {pragma} = {value}')
+        finally:
+            cursor.close()
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the read replica inside read-only views
+
+    Views opt in with the read_replica decorator. Flushes and DML statements
+    always go to the primary, as does everything outside those views.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not isinstance(clause, UpdateBase)
+                and has_app_context() and g.get('use_read_replica')):
+            replica = self._db.engines.get(REPLICA)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_replica(view):
+    """Serve a read-only view from the replica, unless this client wrote recently"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if time.time() - _wrote_at() >= current_app.config.get('READ_YOUR_WRITES_SECONDS', 0):
+            g.use_read_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def mark_write():
+    """Pin this client's reads to the primary for a while so it sees its own writes"""
+    seconds = current_app.config.get('READ_YOUR_WRITES_SECONDS', 0)
+    if not seconds or REPLICA not in current_app.config.get('SQLALCHEMY_BINDS', {}) or not has_request_context():
+        return
+    if g.get('wrote_at') is None:
+        @after_this_request
+        def _set_cookie(response):
+            response.set_cookie(WROTE_AT_COOKIE, f'{g.wrote_at:.3f}', max_age=math.ceil(seconds),
+                                secure=request.is_secure, httponly=True, samesite='Lax')
+            return response
+    g.wrote_at = time.time()
+
+
+def _wrote_at():
+    try:
+        return float(request.cookies.get(WROTE_AT_COOKIE, '0'))
+    except ValueError:
+        return 0
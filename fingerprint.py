@@ -0,0 +1,37 @@
+"""
+Fingerprints of fetched court result pages
+
+A result page is hashed after blanking the parts that change on every
+request without the case changing: hidden form tokens, session ids in
+links, script nonces, comments, inline scripts and "generated on" style
+timestamps. Hearing and order dates are left alone, since a new one is a
+real change. When a case's stored fingerprint matches the page just
+fetched, the stored parsed state is still current and the page need not be
+parsed again.
+"""
+import hashlib
+import re
+
+# (pattern, replacement) pairs applied in order before hashing
+_VOLATILE = [
+    (re.compile(r'<!--.*?-->', re.S), ''),
+    (re.compile(r'<script\b.*?</script>', re.S | re.I), ''),
+    # Hidden inputs carry CSRF tokens, view state and the like
+    (re.compile(r'(<input\b[^>]*\btype=["\']?hidden["\']?[^>]*\bvalue=)(["\']).*?\2', re.I), r'\1""'),
+    (re.compile(r'(<input\b[^>]*\bvalue=)(["\']).*?\2([^>]*\btype=["\']?hidden)', re.I), r'\1""\3'),
+    (re.compile(r'\bnonce=(["\']).*?\1', re.I), 'nonce=""'),
+    (re.compile(r'([;?&](?:jsessionid|phpsessid|sid|sessionid|token|_)=)[^&"\'\s>#]*', re.I), r'\1'),
+    # Page generation stamps: "Printed on 19/10/2026 10:42:07 AM", "as on 19-10-2026", ...
+    (re.compile(r'((?:generated|printed|updated|retrieved|accessed|as)\s+(?:on|at)\s*:?\s*)'
+                r'[0-9][0-9/.:\- ]*(?:\s*[AP]M)?', re.I), r'\1'),
+    # Clock times with seconds are server stamps; a hearing time ("10:30 AM") is kept
+    (re.compile(r'\b\d{1,2}:\d{2}:\d{2}(?:\.\d+)?(?:\s*[AP]M)?', re.I), ''),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def page_fingerprint(html_content):
+    """Hex digest of the page with its volatile parts blanked"""
+    for pattern, replacement in _VOLATILE:
+        html_content = pattern.sub(replacement, html_content)
+    return hashlib.sha256(html_content.encode('utf-8', 'replace')).hexdigest()
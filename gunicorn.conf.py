@@ -0,0 +1,38 @@
+"""
+Gunicorn settings
+
+    flask --app app migrate
+    gunicorn main:app
+
+With GUNICORN_PRELOAD=1 the app is imported once in the master and forked,
+so workers share its memory pages and start without re-importing anything.
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '4'))
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '0').lower() in ('1', 'true', 'yes')
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared with the children;
+    # drop the inherited pools without closing the master's sockets
+    if not preload_app:
+        return
+
+    from app import app
+    from models import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    # Write out queued history rows; atexit handlers do not run when gunicorn ends a worker with os._exit
+    import sys
+
+    write_buffer = sys.modules.get('write_buffer')
+    if write_buffer is not None:
+        write_buffer.flush_all()
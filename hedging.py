@@ -0,0 +1,152 @@
+"""
+Hedged requests against a slow upstream
+
+A Hedger runs an attempt and, if it has not answered within a percentile of
+recent attempt latencies, starts one backup attempt on a fresh session and
+returns whichever succeeds first. The loser is left to finish on its own
+timeout. Backups are paid for from a HedgeBudget shared by every hedger of
+one upstream, which earns a fraction of a token per call, so hedging adds
+at most that fraction (plus a small burst) to the upstream's load.
+
+Per-hedger metrics: nyayalens_<name>_hedge_calls_total, _hedges_sent_total,
+_hedges_won_total (the backup answered first), _hedges_denied_total (over
+budget) and the gauge nyayalens_<name>_hedge_delay_ms.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import metrics
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies (seconds)"""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percent, min_samples=20):
+        """The percent-th percentile, or None until min_samples latencies were recorded"""
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * percent / 100), len(ordered) - 1)]
+
+
+class HedgeBudget:
+    """Token bucket: each call earns ratio tokens (up to burst), each hedge spends one"""
+
+    def __init__(self, ratio=0.05, burst=5):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    def earn(self):
+        with self._lock:
+            self._tokens = min(self._tokens + self.ratio, self.burst)
+
+    def try_spend(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class Hedger:
+    """
+    Run attempt(session) with at most one hedged backup
+
+    attempt is called with the caller's session for the primary and with a
+    fresh new_session() for the backup, so the backup never waits behind
+    the primary's connection. An attempt only fails by raising, so attempt
+    should raise for error responses itself. call returns the session that produced the
+    result, so the caller can keep its cookies. A percentile of 0 disables
+    hedging and calls attempt inline.
+    """
+
+    def __init__(self, name, budget, percentile=95, min_delay_ms=50, min_samples=20, window=200, max_workers=32):
+        self.name = name
+        self.budget = budget
+        self.percentile = percentile
+        self.min_delay = min_delay_ms / 1000
+        self.min_samples = min_samples
+        self.latencies = LatencyTracker(window)
+        self._executor = None
+        self._max_workers = max_workers
+        self._executor_lock = threading.Lock()
+        metrics.register_gauge(f'nyayalens_{name}_hedge_delay_ms', self.delay_ms,
+                               help=f'Wait before hedging a {name} request (0 until enough samples)')
+
+    @property
+    def enabled(self):
+        return self.percentile > 0
+
+    def delay(self):
+        """Seconds to wait for the primary before hedging, or None while there are too few samples"""
+        threshold = self.latencies.percentile(self.percentile, self.min_samples)
+        return None if threshold is None else max(threshold, self.min_delay)
+
+    def delay_ms(self):
+        delay = self.delay()
+        return 0 if delay is None else round(delay * 1000)
+
+    def call(self, attempt, session, new_session):
+        """
+        (result, session) of the first successful attempt
+
+        If both attempts fail, the primary's exception is raised.
+        """
+        if not self.enabled:
+            return attempt(session), session
+
+        metrics.inc(f'nyayalens_{self.name}_hedge_calls_total', help=f'{self.name} requests eligible for hedging')
+        self.budget.earn()
+        primary = self._submit(attempt, session)
+
+        delay = self.delay()
+        if delay is None or wait([primary], timeout=delay).done:
+            return primary.result()
+
+        if not self.budget.try_spend():
+            metrics.inc(f'nyayalens_{self.name}_hedges_denied_total',
+                        help=f'{self.name} hedges skipped because the hedge budget was spent')
+            return primary.result()
+
+        metrics.inc(f'nyayalens_{self.name}_hedges_sent_total', help=f'Backup {self.name} requests sent')
+        backup = self._submit(attempt, new_session())
+        pending = {primary, backup}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        metrics.inc(f'nyayalens_{self.name}_hedges_won_total',
+                                    help=f'Backup {self.name} requests that answered first')
+                    return future.result()
+        return primary.result()
+
+    def _submit(self, attempt, session):
+        def timed():
+            started = time.monotonic()
+            try:
+                return attempt(session), session
+            finally:
+                self.latencies.record(time.monotonic() - started)
+
+        return self._pool().submit(timed)
+
+    def _pool(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                    thread_name_prefix=f'{self.name}-hedge')
+            return self._executor
@@ -1,4 +1,11 @@
-from app import app
+# Processes spawned by pdf_text re-import this file as __mp_main__; they must not build the app
+if __name__ != '__mp_main__':
+    from app import app
 
 if __name__ == '__main__':
+    # The development server keeps the schema current itself
+    import migrations
+    with app.app_context():
+        migrations.upgrade()
+    
     app.run(host='0.0.0.0', port=5000, debug=True)
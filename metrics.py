@@ -0,0 +1,65 @@
+"""
+Process-local counters and gauges, rendered in Prometheus text format
+
+Each gunicorn worker keeps its own values; scrape every worker (or sum
+them) to get totals.
+"""
+import threading
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_help = {}
+
+
+def inc(name, amount=1, help=None):
+    """Increment a counter"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+        if help:
+            _help[name] = help
+
+
+def set_gauge(name, value, help=None):
+    """Set a gauge to a fixed value"""
+    with _lock:
+        _gauges[name] = value
+        if help:
+            _help[name] = help
+
+
+def register_gauge(name, callback, help=None):
+    """Register a gauge whose value is read from callback() at render time"""
+    with _lock:
+        _gauges[name] = callback
+        if help:
+            _help[name] = help
+
+
+def value(name):
+    """Current value of a counter or gauge (0 if unknown)"""
+    with _lock:
+        if name in _counters:
+            return _counters[name]
+        gauge = _gauges.get(name, 0)
+    return gauge() if callable(gauge) else gauge
+
+
+def render():
+    """Render all metrics in Prometheus text exposition format"""
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        help_text = dict(_help)
+
+    lines = []
+    for kind, values in (('counter', counters), ('gauge', gauges)):
+        for name in sorted(values):
+            metric_value = values[name]
+            if callable(metric_value):
+                metric_value = metric_value()
+            if name in help_text:
+                lines.append(f'# HELP {name} {help_text[name]}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.append(f'{name} {metric_value}')
+    return '\n'.join(lines) + '\n'
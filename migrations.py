@@ -0,0 +1,246 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import inspect, select, text
+
+import search_index
+from models import db, Case, CaseChange, CaseQuery, CaseOrder
+from validation import canonical_case_key
+
+LEGACY_TABLES = ['case_order', 'case_query']
+
+
+def upgrade():
+    """Bring the database schema up to date, creating any missing tables"""
+    with db.engine.begin() as conn:
+        inspector = inspect(conn)
+
+        if _has_legacy_query_log(inspector):
+            _migrate_to_cases(conn)
+        else:
+            db.metadata.create_all(conn)
+            _add_missing_columns(conn)
+            _autoincrement_case_change(conn)
+        _canonicalize_case_keys(conn)
+
+        if search_index.ensure_index(conn):
+            logging.info(f"Built full-text index for {search_index.rebuild(conn)} cases")
+
+
+def _add_missing_columns(conn):
+    """Add nullable columns that were added to existing models after their table was created"""
+    inspector = inspect(conn)
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable:
+                raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} automatically")
+            logging.info(f"Adding column {table.name}.{column.name}")
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+
+
+def _autoincrement_case_change(conn):
+    """Rebuild a SQLite case_change table created without AUTOINCREMENT, which reuses pruned ids"""
+    if conn.dialect.name != 'sqlite':
+        return
+    sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'case_change'")).scalar()
+    if 'AUTOINCREMENT' in sql.upper():
+        return
+    logging.info("Rebuilding case_change with AUTOINCREMENT ids")
+    if not conn.connection.dbapi_connection.in_transaction:
+        # pysqlite runs DDL outside a transaction unless one is opened explicitly
+        conn.exec_driver_sql('BEGIN')
+    for index in inspect(conn).get_indexes('case_change'):
+        conn.exec_driver_sql(f'DROP INDEX {index["name"]}')
+    conn.exec_driver_sql('ALTER TABLE case_change RENAME TO legacy_case_change')
+    CaseChange.__table__.create(conn)
+    columns = ', '.join(column.name for column in CaseChange.__table__.columns)
+    conn.exec_driver_sql(f'INSERT INTO case_change ({columns}) SELECT {columns} FROM legacy_case_change')
+    conn.exec_driver_sql('DROP TABLE legacy_case_change')
+
+
+def _canonicalize_case_keys(conn):
+    """
+    Rewrite case keys stored before keys were normalized ('0042' -> '42'), with their query log rows
+
+    A case whose canonical key is already stored is merged into that case instead.
+    """
+    cases = Case.__table__
+    queries = CaseQuery.__table__
+    rows = conn.execute(select(cases.c.id, cases.c.case_type, cases.c.case_number, cases.c.filing_year)).all()
+    taken = {tuple(row[1:]): row[0] for row in rows}
+    for case_id, *key in rows:
+        key = tuple(key)
+        try:
+            # int() still takes the '+42' and '4_2' that older validation let through
+            canonical = canonical_case_key(*key)
+        except ValueError:
+            continue
+        if canonical == key:
+            continue
+        values = dict(zip(('case_type', 'case_number', 'filing_year'), canonical))
+        if canonical in taken:
+            _merge_case(conn, case_id, taken[canonical])
+            conn.execute(queries.update().where(queries.c.case_id == taken[canonical]).values(**values))
+            logging.info(f"Merged case {case_id} {key} into case {taken[canonical]} {canonical}")
+            continue
+        conn.execute(cases.update().where(cases.c.id == case_id).values(**values))
+        conn.execute(queries.update().where(queries.c.case_id == case_id).values(**values))
+        taken[canonical] = case_id
+        logging.info(f"Normalized case {case_id} key {key} to {canonical}")
+
+
+def _merge_case(conn, source_id, target_id):
+    """
+    Move a duplicate case's query log, orders and changes onto target and delete it
+
+    Orders are upserted by (date, title); the newer of the two cases' parsed
+    state is kept.
+    """
+    cases = Case.__table__
+    orders = CaseOrder.__table__
+    source, target = (
+        conn.execute(select(cases).where(cases.c.id == case_id)).mappings().one() for case_id in (source_id, target_id)
+    )
+
+    existing = {
+        (row['order_date'], row['order_title']): row
+        for row in conn.execute(select(orders).where(orders.c.case_id == target_id)).mappings()
+    }
+    dropped = []
+    for order in conn.execute(select(orders).where(orders.c.case_id == source_id)).mappings().all():
+        kept = existing.get((order['order_date'], order['order_title']))
+        if kept is None:
+            conn.execute(orders.update().where(orders.c.id == order['id']).values(case_id=target_id))
+            continue
+        if kept['order_text'] is None and order['order_text'] is not None:
+            conn.execute(orders.update().where(orders.c.id == kept['id']).values(
+                order_text=order['order_text'], text_extracted_at=order['text_extracted_at']
+            ))
+        conn.execute(orders.delete().where(orders.c.id == order['id']))
+        dropped.append(order['id'])
+
+    for table in (CaseQuery.__table__, CaseChange.__table__):
+        conn.execute(table.update().where(table.c.case_id == source_id).values(case_id=target_id))
+
+    state = {}
+    if (source['last_updated'] or datetime.min) > (target['last_updated'] or datetime.min):
+        state = {column: source[column] for column in (
+            *Case.PARSED_FIELDS, 'raw_response', 'last_updated', 'page_fingerprint', 'last_checked_at'
+        )}
+    if source['first_seen'] and (target['first_seen'] is None or source['first_seen'] < target['first_seen']):
+        state['first_seen'] = source['first_seen']
+    conn.execute(cases.delete().where(cases.c.id == source_id))
+    if state:
+        conn.execute(cases.update().where(cases.c.id == target_id).values(**state))
+
+    search_index.index_orders(conn, dropped)
+    search_index.index_cases(conn, [source_id, target_id])
+
+
+def _has_legacy_query_log(inspector):
+    """Legacy databases stored parsed case data on every case_query row"""
+    if 'case_query' not in inspector.get_table_names():
+        return False
+    return 'raw_response' in {column['name'] for column in inspector.get_columns('case_query')}
+
+
+def _migrate_to_cases(conn):
+    """
+    Move per-search case data into deduplicated court_case rows
+
+    Each distinct (case_type, case_number, filing_year) becomes one Case that
+    holds the parsed state of its most recent successful query. Orders are
+    deduplicated by (date, title) per case, and case_query rows are kept as a
+    lightweight access log with their original ids.
+    """
+    logging.info("Migrating case_query history to deduplicated court_case rows")
+
+    if conn.dialect.name == 'sqlite' and not conn.connection.dbapi_connection.in_transaction:
+        # pysqlite runs DDL outside a transaction unless one is opened explicitly
+        conn.exec_driver_sql('BEGIN')
+
+    for table in LEGACY_TABLES:
+        _rename_legacy_table(conn, table)
+
+    db.metadata.create_all(conn)
+
+    case_ids = {}
+    query_case_ids = {}
+    queries = conn.execute(text(
+        'SELECT id, case_type, case_number, filing_year, query_timestamp, success, error_message, '
+        'raw_response, parties_plaintiff, parties_defendant, filing_date, next_hearing_date, case_status '
+        'FROM legacy_case_query ORDER BY id'
+    ).columns(query_timestamp=db.DateTime, success=db.Boolean)).mappings().all()
+
+    for row in queries:
+        case_id = None
+        if row['success']:
+            key = (row['case_type'], row['case_number'], row['filing_year'])
+            state = {
+                'raw_response': row['raw_response'],
+                'parties_plaintiff': row['parties_plaintiff'],
+                'parties_defendant': row['parties_defendant'],
+                'filing_date': row['filing_date'],
+                'next_hearing_date': row['next_hearing_date'],
+                'case_status': row['case_status'],
+                'last_updated': row['query_timestamp'],
+            }
+            case_id = case_ids.get(key)
+            if case_id is None:
+                case_id = conn.execute(Case.__table__.insert().values(
+                    case_type=key[0], case_number=key[1], filing_year=key[2],
+                    first_seen=row['query_timestamp'], **state
+                )).inserted_primary_key[0]
+                case_ids[key] = case_id
+            else:
+                # Rows are read oldest first, so the latest success wins
+                conn.execute(Case.__table__.update().where(Case.__table__.c.id == case_id).values(**state))
+            query_case_ids[row['id']] = case_id
+
+        conn.execute(CaseQuery.__table__.insert().values(
+            id=row['id'],
+            case_type=row['case_type'],
+            case_number=row['case_number'],
+            filing_year=row['filing_year'],
+            query_timestamp=row['query_timestamp'],
+            success=row['success'],
+            error_message=row['error_message'],
+            case_id=case_id,
+        ))
+
+    orders = {}
+    for row in conn.execute(text(
+        'SELECT query_id, order_date, order_title, pdf_url, order_type FROM legacy_case_order ORDER BY id'
+    )).mappings():
+        case_id = query_case_ids.get(row['query_id'])
+        if case_id is None:
+            continue
+        orders[(case_id, row['order_date'], row['order_title'])] = (row['pdf_url'], row['order_type'])
+
+    for (case_id, order_date, order_title), (pdf_url, order_type) in orders.items():
+        conn.execute(CaseOrder.__table__.insert().values(
+            case_id=case_id, order_date=order_date, order_title=order_title,
+            pdf_url=pdf_url, order_type=order_type
+        ))
+
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text(
+            "SELECT setval(pg_get_serial_sequence('case_query', 'id'), COALESCE(MAX(id), 1)) FROM case_query"
+        ))
+
+    for table in LEGACY_TABLES:
+        conn.execute(text(f'DROP TABLE legacy_{table}'))
+
+    logging.info(f"Migrated {len(queries)} queries into {len(case_ids)} cases and {len(orders)} orders")
+
+
+def _rename_legacy_table(conn, table):
+    conn.execute(text(f'ALTER TABLE {table} RENAME TO legacy_{table}'))
+    if conn.dialect.name == 'postgresql':
+        # Postgres keeps the old index and sequence names, which the new tables need
+        conn.execute(text(f'ALTER INDEX {table}_pkey RENAME TO legacy_{table}_pkey'))
+        conn.execute(text(f'ALTER SEQUENCE {table}_id_seq RENAME TO legacy_{table}_id_seq'))
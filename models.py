@@ -1,40 +1,245 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
+
+from db_engine import RoutingSession
+from results import CaseDetails, OrderInfo
 
 # Create a db instance that will be configured later
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+class Case(db.Model):
+    """Model to store the latest known state of each distinct case"""
+    __tablename__ = 'court_case'
+    __table_args__ = (
+        db.UniqueConstraint('case_type', 'case_number', 'filing_year', name='uq_court_case_key'),
+    )
 
-class CaseQuery(db.Model):
-    """Model to store case queries and responses"""
     id = db.Column(db.Integer, primary_key=True)
     case_type = db.Column(db.String(100), nullable=False)
     case_number = db.Column(db.String(100), nullable=False)
     filing_year = db.Column(db.String(10), nullable=False)
-    query_timestamp = db.Column(db.DateTime, default=datetime.utcnow)
-    success = db.Column(db.Boolean, default=False)
-    error_message = db.Column(db.Text)
+    first_seen = db.Column(db.DateTime, default=datetime.utcnow)
+    last_updated = db.Column(db.DateTime, default=datetime.utcnow)
     raw_response = db.Column(db.Text)
-    
+
     # Parsed data fields
     parties_plaintiff = db.Column(db.Text)
     parties_defendant = db.Column(db.Text)
     filing_date = db.Column(db.String(50))
     next_hearing_date = db.Column(db.String(50))
     case_status = db.Column(db.String(200))
-    
+
+    # Fingerprint of the court page the parsed fields came from (see fingerprint.py),
+    # and when the court was last asked about the case
+    page_fingerprint = db.Column(db.String(64))
+    last_checked_at = db.Column(db.DateTime)
+
+    # [date, title] keys of orders removed by the retention job; when the next search brings
+    # them back they are restored, not reported to the change feed as new orders
+    archived_orders = db.Column(db.JSON)
+
+    orders = db.relationship('CaseOrder', backref='case', order_by='CaseOrder.id')
+    # Append-only; never loaded through the case, only read by the change feed
+    changes = db.relationship('CaseChange', backref='case', lazy='write_only')
+
+    # CaseDetails attributes for each parsed column
+    PARSED_FIELDS = {
+        'parties_plaintiff': 'petitioner',
+        'parties_defendant': 'respondent',
+        'filing_date': 'filing_date',
+        'next_hearing_date': 'next_hearing_date',
+        'case_status': 'status',
+    }
+
+    @classmethod
+    def get_or_create(cls, case_type, case_number, filing_year):
+        """Return the case for this key, adding a new one to the session if needed"""
+        case = cls.query.filter_by(case_type=case_type, case_number=case_number,
+                                   filing_year=filing_year).first()
+        if case is None:
+            case = cls(case_type=case_type, case_number=case_number, filing_year=filing_year)
+            db.session.add(case)
+        return case
+
+    def apply_result(self, details, raw_response=None):
+        """
+        Update the parsed state from a scraper result's CaseDetails
+
+        Orders are upserted by (date, title). Any change is also appended to
+        the case's CaseChange log. Returns the names of the parsed fields that
+        changed and the list of newly added orders; orders restored after
+        retention archived them are added but not counted as new.
+        """
+        changed = []
+        for column, field in self.PARSED_FIELDS.items():
+            value = getattr(details, field)
+            if getattr(self, column) != value:
+                setattr(self, column, value)
+                changed.append(column)
+
+        if raw_response is not None:
+            self.raw_response = raw_response
+
+        existing = {(order.order_date, order.order_title): order for order in self.orders}
+        archived = {tuple(key) for key in self.archived_orders or []}
+        new_orders = []
+        for order_info in details.orders:
+            key = (order_info.date, order_info.title)
+            order = existing.get(key)
+            if order is None:
+                order = CaseOrder(order_date=key[0], order_title=key[1])
+                self.orders.append(order)
+                existing[key] = order
+                if key not in archived:
+                    new_orders.append(order)
+            order.pdf_url = order_info.pdf_url
+            order.order_type = order_info.type
+        # The result lists every current order, so the archived keys have served their purpose
+        self.archived_orders = None
+
+        if changed or new_orders:
+            _lock_change_log()
+            self.last_updated = datetime.utcnow()
+            self.changes.add(CaseChange(
+                changed_at=self.last_updated,
+                fields={self.PARSED_FIELDS[column]: getattr(self, column) for column in changed},
+                new_orders=[
+                    OrderInfo(order.order_title or '', order.order_date or '', order.order_type or 'Order',
+                              order.pdf_url or '').to_dict()
+                    for order in new_orders
+                ]
+            ))
+
+        return changed, new_orders
+
+    def to_details(self):
+        """The stored parsed state as a CaseDetails, as if freshly scraped"""
+        details = CaseDetails(**{field: getattr(self, column) or '' for column, field in self.PARSED_FIELDS.items()})
+        details.fill_key(self.case_type, self.case_number, self.filing_year)
+        details.orders = [
+            OrderInfo(order.order_title or '', order.order_date or '', order.order_type or 'Order', order.pdf_url or '')
+            for order in self.orders
+        ]
+        return details
+
+    def __repr__(self):
+        return f'<Case {self.case_type}/{self.case_number}/{self.filing_year}>'
+
+class CaseQuery(db.Model):
+    """Model to log case queries; parsed data lives on the linked Case"""
+    id = db.Column(db.Integer, primary_key=True)
+    case_type = db.Column(db.String(100), nullable=False)
+    case_number = db.Column(db.String(100), nullable=False)
+    filing_year = db.Column(db.String(10), nullable=False)
+    query_timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    success = db.Column(db.Boolean, default=False)
+    error_message = db.Column(db.Text)
+    case_id = db.Column(db.Integer, db.ForeignKey('court_case.id'), index=True)
+
+    # Milliseconds each source took to answer (None if it had not answered in time)
+    high_court_ms = db.Column(db.Integer)
+    district_ms = db.Column(db.Integer)
+
+    case = db.relationship('Case', backref='queries')
+
+    # Read-through accessors so templates and exports keep working on the log row
+    @property
+    def parties_plaintiff(self):
+        return self.case.parties_plaintiff if self.case else None
+
+    @property
+    def parties_defendant(self):
+        return self.case.parties_defendant if self.case else None
+
+    @property
+    def filing_date(self):
+        return self.case.filing_date if self.case else None
+
+    @property
+    def next_hearing_date(self):
+        return self.case.next_hearing_date if self.case else None
+
+    @property
+    def case_status(self):
+        return self.case.case_status if self.case else None
+
+    @property
+    def orders(self):
+        return self.case.orders if self.case else []
+
     def __repr__(self):
         return f'<CaseQuery {self.case_type}/{self.case_number}/{self.filing_year}>'
 
 class CaseOrder(db.Model):
     """Model to store case orders and judgments"""
+    __table_args__ = (
+        db.UniqueConstraint('case_id', 'order_date', 'order_title', name='uq_case_order_date_title'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    query_id = db.Column(db.Integer, db.ForeignKey('case_query.id'), nullable=False)
+    case_id = db.Column(db.Integer, db.ForeignKey('court_case.id'), nullable=False)
     order_date = db.Column(db.String(50))
     order_title = db.Column(db.String(500))
     pdf_url = db.Column(db.String(1000))
     order_type = db.Column(db.String(100))  # Order, Judgment, etc.
-    
-    query = db.relationship('CaseQuery', backref='orders')
-    
+
+    # Text of the downloaded PDF, filled in by the background extractor (pdf_text)
+    order_text = db.Column(db.Text)
+    text_extracted_at = db.Column(db.DateTime)
+
     def __repr__(self):
         return f'<CaseOrder {self.order_title}>'
+
+class CaseChange(db.Model):
+    """
+    One change to a case's parsed state; its id is the change feed cursor
+
+    Ids must never be reused or become visible out of order, or a consumer
+    holding a cursor misses changes. SQLite gets AUTOINCREMENT so ids freed by
+    retention are not handed out again; on Postgres, apply_result serializes
+    the transactions that add changes (CHANGE_LOG_LOCK), so ids commit in order.
+    """
+    __table_args__ = {'sqlite_autoincrement': True}
+    id = db.Column(db.Integer, primary_key=True)
+    case_id = db.Column(db.Integer, db.ForeignKey('court_case.id'), nullable=False, index=True)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # New values of the changed fields, keyed by CaseDetails attribute name
+    fields = db.Column(db.JSON)
+    # Orders added by this change, as OrderInfo dicts
+    new_orders = db.Column(db.JSON)
+
+    def __repr__(self):
+        return f'<CaseChange {self.id} case {self.case_id}>'
+
+# Postgres advisory lock held from a change's insert until its commit
+CHANGE_LOG_LOCK = 0x6e796c01
+
+def _lock_change_log():
+    """Make this transaction's CaseChange ids commit after all earlier ones (Postgres only)"""
+    conn = db.session.connection()
+    if conn.dialect.name == 'postgresql':
+        # Sequence values are taken at flush but seen at commit; without this, a consumer could
+        # read id 6 and move its cursor past id 5 while 5's transaction is still in flight
+        conn.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': CHANGE_LOG_LOCK})
+
+class QueryDailyStat(db.Model):
+    """Daily per-case-type search counts for CaseQuery rows removed by the retention job"""
+    __table_args__ = (
+        db.UniqueConstraint('day', 'case_type', name='uq_query_daily_stat_day_type'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    case_type = db.Column(db.String(100), nullable=False)
+    queries = db.Column(db.Integer, nullable=False, default=0)
+    successes = db.Column(db.Integer, nullable=False, default=0)
+
+    # Sums and sample counts, so averages stay exact when more rows are rolled in later
+    high_court_ms_sum = db.Column(db.BigInteger, nullable=False, default=0)
+    high_court_samples = db.Column(db.Integer, nullable=False, default=0)
+    district_ms_sum = db.Column(db.BigInteger, nullable=False, default=0)
+    district_samples = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<QueryDailyStat {self.day} {self.case_type}: {self.queries}>'
@@ -0,0 +1,69 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+
+class PdfCache:
+    """
+    Disk cache of downloaded order PDFs, keyed by source URL
+
+    Files are written to a temporary name and renamed into place, so readers
+    never see a partial PDF. The least recently used files are evicted once
+    the directory grows past max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes=500 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def path_for(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest() + '.pdf')
+
+    def get(self, url):
+        """Path of the cached PDF for url, or None"""
+        path = self.path_for(url)
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, url, chunks):
+        """Store the PDF from an iterable of byte chunks and return its path"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(url)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        self._evict()
+        return path
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.pdf'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+                logging.info(f"Evicted cached PDF {os.path.basename(path)}")
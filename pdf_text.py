@@ -0,0 +1,124 @@
+"""
+Background text extraction for cached order PDFs
+
+Extraction runs in a small pool of spawned processes (pypdf is pure Python
+and would otherwise hold the GIL against request threads). Pages are read
+one at a time and the text is capped, so a huge PDF cannot exhaust memory.
+The text is stored on every CaseOrder with that pdf_url; the flush listener
+in search_index then indexes it.
+
+extract_text is the children's entry point. It lives here, away from the
+app, and imports pypdf itself, so neither the workers nor the children load
+the app or pypdf for it. A spawned child also re-imports the parent's
+__main__ (as __mp_main__), which is why main.py only builds the app when it
+is not being imported that way.
+"""
+import importlib.util
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+import metrics
+
+# pypdf is optional; PDF text is not extracted without it
+HAVE_PYPDF = importlib.util.find_spec('pypdf') is not None
+
+
+def extract_text(path, max_pages=500, max_chars=2000000):
+    """Text of the PDF at path, page by page, truncated at max_pages/max_chars"""
+    import pypdf
+
+    reader = pypdf.PdfReader(path, strict=False)
+    pages = []
+    size = 0
+    for number, page in enumerate(reader.pages):
+        if number >= max_pages or size >= max_chars:
+            break
+        try:
+            text = page.extract_text() or ''
+        except Exception as e:
+            logging.warning(f"Could not extract page {number + 1} of {path}: {str(e)}")
+            continue
+        text = text[:max_chars - size]
+        pages.append(text)
+        size += len(text)
+    return '\n\f'.join(pages)
+
+
+class TextExtractor:
+    """Pool of extraction processes with a bounded in-process backlog"""
+
+    def __init__(self, app, workers=2, max_pages=500, max_chars=2000000, max_backlog=1000):
+        self.app = app
+        self.workers = workers
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.max_backlog = max_backlog
+
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._pool = None
+        self._pid = None
+
+        metrics.register_gauge('nyayalens_pdf_text_backlog', self.backlog,
+                               help='Order PDFs waiting for text extraction')
+
+    @property
+    def enabled(self):
+        return HAVE_PYPDF and self.workers > 0
+
+    def backlog(self):
+        return len(self._pending)
+
+    def submit(self, url, path):
+        """Queue the cached PDF at path (downloaded from url) for extraction; False if skipped"""
+        if not self.enabled:
+            return False
+        with self._lock:
+            if url in self._pending:
+                return True
+            if len(self._pending) >= self.max_backlog:
+                metrics.inc('nyayalens_pdf_text_dropped_total', help='PDFs not queued because the backlog was full')
+                return False
+            try:
+                future = self._executor().submit(extract_text, path, self.max_pages, self.max_chars)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); start a fresh pool for this and later PDFs
+                logging.warning("PDF text extraction pool was broken, restarting it")
+                self._pool = None
+                future = self._executor().submit(extract_text, path, self.max_pages, self.max_chars)
+            self._pending.add(url)
+        future.add_done_callback(lambda f: self._store(url, f))
+        return True
+
+    def _executor(self):
+        # One pool per process; spawned children stay small and are safe to start from threads
+        if self._pool is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def _store(self, url, future):
+        try:
+            text = future.result()
+            with self.app.app_context():
+                from models import CaseOrder, db
+
+                orders = CaseOrder.query.filter_by(pdf_url=url).all()
+                for order in orders:
+                    order.order_text = text
+                    order.text_extracted_at = datetime.utcnow()
+                db.session.commit()
+            metrics.inc('nyayalens_pdf_text_extracted_total', help='Order PDFs whose text was extracted')
+            logging.info(f"Extracted {len(text)} characters from {url} for {len(orders)} orders")
+        except Exception as e:
+            metrics.inc('nyayalens_pdf_text_errors_total', help='Order PDFs whose text extraction failed')
+            logging.error(f"Text extraction failed for {url}: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending.discard(url)
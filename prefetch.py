@@ -0,0 +1,175 @@
+"""
+Background prefetch of order PDFs after a successful search
+
+Users nearly always open an order or two from the results page, so once a
+search succeeds its orders' PDFs are warmed at low priority: court PDFs are
+downloaded into the disk cache, and generated PDFs are rendered into it
+under GENERATED_PREFIX + their slug, where every worker finds them. A few
+daemon threads do the work, at most per_host of them against one court
+host at a time. They hold off while every scrape slot is taken by user
+requests, and jobs older than max_age seconds are dropped, since by then
+the user has clicked or left. Each court PDF put in the cache is passed to
+on_fetched(url, path), which routes uses to queue its text extraction just
+as a click would.
+
+Tuning: nyayalens_pdf_prefetch_fetched_total against
+nyayalens_pdf_prefetch_used_total (clicks served from a prefetched PDF)
+is the prefetch hit rate; nyayalens_pdf_cache_hits_total/_misses_total
+are the cache hit rate seen by clicks.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+import body_limits
+import metrics
+
+GENERATED_PREFIX = '/download_pdf/'
+
+
+class PdfPrefetcher:
+    """Low-priority warm-up of the PDF caches with a bounded backlog"""
+
+    def __init__(self, cache, workers=2, per_host=1, max_backlog=200, max_age=60, busy=None, remember=10000,
+                 on_fetched=None):
+        self.cache = cache
+        self.workers = workers
+        self.per_host = per_host
+        self.max_age = max_age
+        self.busy = busy or (lambda: False)
+        self.remember = remember
+        self.on_fetched = on_fetched
+
+        self._queue = queue.Queue(maxsize=max_backlog)
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._running = set()
+        self._hosts = {}
+        self._prefetched = OrderedDict()
+        self._pid = None
+
+        metrics.register_gauge('nyayalens_pdf_prefetch_backlog', self._queue.qsize,
+                               help='Order PDFs waiting to be prefetched')
+
+    @property
+    def enabled(self):
+        return self.workers > 0
+
+    def submit(self, urls):
+        """Queue the PDFs at urls for prefetching; returns how many were queued"""
+        if not self.enabled:
+            return 0
+        self._start()
+        queued = 0
+        for url in urls:
+            if not url or not url.startswith(('http://', 'https://', GENERATED_PREFIX)):
+                continue
+            with self._lock:
+                if url in self._in_flight or url in self._prefetched:
+                    continue
+                try:
+                    self._queue.put_nowait((url, time.monotonic()))
+                except queue.Full:
+                    metrics.inc('nyayalens_pdf_prefetch_dropped_total',
+                                help='Order PDFs not prefetched (backlog full or job too old)')
+                    break
+                self._in_flight[url] = threading.Event()
+            queued += 1
+        if queued:
+            metrics.inc('nyayalens_pdf_prefetch_queued_total', queued, help='Order PDFs queued for prefetching')
+        return queued
+
+    def wait(self, url, timeout):
+        """Wait for a running prefetch of url; True if there was one and it finished"""
+        with self._lock:
+            done = self._in_flight.get(url) if url in self._running else None
+        return done is not None and done.wait(timeout)
+
+    def claim(self, url):
+        """True (once) if url was put in a cache by the prefetcher; counts it as used"""
+        with self._lock:
+            if url not in self._prefetched:
+                return False
+            del self._prefetched[url]
+        metrics.inc('nyayalens_pdf_prefetch_used_total', help='Order PDF clicks served from a prefetched PDF')
+        return True
+
+    def _start(self):
+        # Threads do not survive a fork, so each worker process starts its own
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._hosts = {}
+            for number in range(self.workers):
+                threading.Thread(target=self._run, name=f'pdf-prefetch-{number}', daemon=True).start()
+
+    def _run(self):
+        import requests
+
+        session = body_limits.install(requests.Session())
+        while True:
+            url, queued_at = self._queue.get()
+            try:
+                while self.busy() and not self._stale(queued_at):
+                    time.sleep(0.1)
+                if self._stale(queued_at):
+                    metrics.inc('nyayalens_pdf_prefetch_dropped_total',
+                                help='Order PDFs not prefetched (backlog full or job too old)')
+                    continue
+                with self._host_slot(url):
+                    with self._lock:
+                        self._running.add(url)
+                    if self._fetch(session, url):
+                        with self._lock:
+                            self._prefetched[url] = None
+                            while len(self._prefetched) > self.remember:
+                                self._prefetched.popitem(last=False)
+                        metrics.inc('nyayalens_pdf_prefetch_fetched_total', help='Order PDFs prefetched')
+            except Exception as e:
+                metrics.inc('nyayalens_pdf_prefetch_errors_total', help='Order PDF prefetches that failed')
+                logging.warning(f"Prefetch of {url} failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._running.discard(url)
+                    done = self._in_flight.pop(url, None)
+                if done is not None:
+                    done.set()
+
+    def _fetch(self, session, url):
+        """Warm the cache for url; False if it was already there"""
+        if url.startswith(GENERATED_PREFIX):
+            from scraper import order_slug, parse_order_slug, render_order_pdf
+
+            key = parse_order_slug(url[len(GENERATED_PREFIX):])
+            if key is None:
+                return False
+            cache_key = GENERATED_PREFIX + order_slug(*key)
+            if self.cache.get(cache_key) is not None:
+                return False
+            self.cache.put(cache_key, [render_order_pdf(*key)])
+            return True
+
+        if self.cache.get(url) is not None:
+            return False
+        with session.get(url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            path = self.cache.put(url, body_limits.iter_capped(response))
+        if self.on_fetched is not None:
+            self.on_fetched(url, path)
+        return True
+
+    def _stale(self, queued_at):
+        return time.monotonic() - queued_at > self.max_age
+
+    def _host_slot(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            slot = self._hosts.get(host)
+            if slot is None:
+                slot = self._hosts[host] = threading.BoundedSemaphore(self.per_host)
+        return slot
@@ -0,0 +1,227 @@
+"""
+Opt-in per-request profiling
+
+RequestProfiler wraps the WSGI app and profiles a request with cProfile
+when one of these triggers fires:
+
+- the request carries `X-Profile: <PROFILE_TOKEN>` (these also trace
+  allocations with tracemalloc)
+- it is picked by random sampling (PROFILE_SAMPLE_RATE)
+- it is on a watched path and follows a watched request that took longer
+  than PROFILE_SLOW_MS; watched requests are only timed, and the profile is
+  kept if the profiled one is slow as well
+
+Only one request per worker is profiled at a time. Response bodies are
+passed through as they are produced, so streamed files are not buffered;
+the profile and the timing cover the app's work for the call and for each
+chunk. Each dump is a pstats file plus a JSON summary in PROFILE_DIR; the
+oldest dumps are deleted beyond PROFILE_KEEP.
+"""
+import cProfile
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import metrics
+
+# Frames kept per tracemalloc allocation site
+TRACEMALLOC_FRAMES = 10
+
+_NAME_RE = re.compile(r'^[\w.-]+$')
+
+
+class RequestProfiler:
+    """WSGI middleware that captures cProfile (and for X-Profile, tracemalloc) dumps for selected requests"""
+
+    def __init__(self, app, directory, token=None, sample_rate=0.0, slow_ms=0,
+                 paths=('/search', '/download_pdf'), keep=50, top=30):
+        self.app = app
+        self.directory = directory
+        self.token = token
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.paths = tuple(paths)
+        self.keep = keep
+        self.top = top
+        self._lock = threading.Lock()
+        self._armed = False
+
+    def __call__(self, environ, start_response):
+        trigger = self._trigger(environ)
+        if trigger is None or not self._lock.acquire(blocking=False):
+            if self.slow_ms and self._watched(environ):
+                return _TimedBody(self.app, environ, start_response, self._timed)
+            return self.app(environ, start_response)
+
+        try:
+            return self._profile(trigger, environ, start_response)
+        except BaseException:
+            self._lock.release()
+            raise
+
+    def _trigger(self, environ):
+        if self.token and hmac.compare_digest(environ.get('HTTP_X_PROFILE', ''), self.token):
+            return 'header'
+        if self.sample_rate and random.random() < self.sample_rate:
+            return 'sample'
+        if self._armed and self._watched(environ):
+            self._armed = False
+            return 'slow'
+        return None
+
+    def _watched(self, environ):
+        return environ.get('PATH_INFO', '').startswith(self.paths)
+
+    def _timed(self, body):
+        if body.elapsed_ms >= self.slow_ms:
+            self._armed = True
+
+    def _profile(self, trigger, environ, start_response):
+        profiler = cProfile.Profile()
+        # tracemalloc slows the whole process down, so only explicitly requested profiles use it
+        memory = trigger == 'header'
+        started_tracing = memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        before = tracemalloc.take_snapshot() if memory else None
+
+        def finish(body):
+            try:
+                after = peak = None
+                if memory:
+                    after = tracemalloc.take_snapshot()
+                    peak = tracemalloc.get_traced_memory()[1]
+                    if started_tracing:
+                        tracemalloc.stop()
+                if trigger != 'slow' or body.elapsed_ms >= self.slow_ms:
+                    self._save(profiler, before, after, peak, {
+                        'trigger': trigger,
+                        'method': environ.get('REQUEST_METHOD'),
+                        'path': environ.get('PATH_INFO'),
+                        'query': environ.get('QUERY_STRING', ''),
+                        'status': body.status,
+                        'elapsed_ms': round(body.elapsed_ms, 1),
+                    })
+            except OSError as e:
+                logging.error(f"Could not write request profile: {str(e)}")
+            finally:
+                self._lock.release()
+
+        try:
+            return _TimedBody(self.app, environ, start_response, finish, profiler)
+        except BaseException:
+            if started_tracing:
+                tracemalloc.stop()
+            raise
+
+    def _save(self, profiler, before, after, peak, info):
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r'[^\w]+', '_', info['path'] or '').strip('_') or 'root'
+        name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{slug}-{int(info['elapsed_ms'])}ms"
+
+        profiler.dump_stats(os.path.join(self.directory, f'{name}.prof'))
+
+        stats_text = io.StringIO()
+        pstats.Stats(profiler, stream=stats_text).sort_stats('cumulative').print_stats(self.top)
+        allocations = after.compare_to(before, 'traceback')[:self.top] if after is not None else []
+        info.update({
+            'name': name,
+            'created': datetime.utcnow().isoformat(),
+            'tracemalloc_peak_bytes': peak,
+            'top_functions': stats_text.getvalue(),
+            'top_allocations': [
+                {
+                    'size_diff_bytes': stat.size_diff,
+                    'count_diff': stat.count_diff,
+                    'traceback': stat.traceback.format(),
+                }
+                for stat in allocations
+            ],
+        })
+        with open(os.path.join(self.directory, f'{name}.json'), 'w') as f:
+            json.dump(info, f, indent=2)
+
+        metrics.inc('nyayalens_profiles_captured_total', help='Request profiles written to PROFILE_DIR')
+        logging.info(f"Profiled {info['method']} {info['path']} ({info['trigger']}, {info['elapsed_ms']} ms): {name}")
+        self._rotate()
+
+    def _rotate(self):
+        for name in list_profiles(self.directory)[self.keep:]:
+            for extension in ('.json', '.prof'):
+                try:
+                    os.remove(os.path.join(self.directory, name + extension))
+                except FileNotFoundError:
+                    pass
+
+
+class _TimedBody:
+    """
+    WSGI response that passes the app's body through chunk by chunk
+
+    Time spent in the app (the call, each chunk and close) is added up in
+    elapsed_ms, under profiler if one is given; on_close(self) runs once the
+    server closes the response.
+    """
+
+    def __init__(self, app, environ, start_response, on_close, profiler=None):
+        self.status = None
+        self.elapsed_ms = 0.0
+        self._on_close = on_close
+        self._profiler = profiler
+
+        def capture_status(status_line, headers, exc_info=None):
+            self.status = status_line
+            return start_response(status_line, headers, exc_info)
+
+        self._iterable = self._run(app, environ, capture_status)
+        self._iterator = self._run(iter, self._iterable)
+
+    def _run(self, function, *args):
+        started = time.perf_counter()
+        if self._profiler is not None:
+            self._profiler.enable()
+        try:
+            return function(*args)
+        finally:
+            if self._profiler is not None:
+                self._profiler.disable()
+            self.elapsed_ms += (time.perf_counter() - started) * 1000
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self._run(next, self._iterator)
+
+    def close(self):
+        try:
+            if hasattr(self._iterable, 'close'):
+                self._run(self._iterable.close)
+        finally:
+            self._on_close(self)
+
+
+def list_profiles(directory):
+    """Names of the stored profiles, newest first"""
+    try:
+        files = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return sorted((f[:-len('.json')] for f in files if f.endswith('.json')), reverse=True)
+
+
+def profile_path(directory, name, extension):
+    """Path of a stored profile file, or None if the name is not a stored profile"""
+    if not _NAME_RE.match(name):
+        return None
+    path = os.path.join(directory, name + extension)
+    return path if os.path.isfile(path) else None
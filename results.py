@@ -0,0 +1,130 @@
+"""
+Typed results returned by the court scrapers
+
+Both scrapers (sync and async) return a SearchResult. A successful result
+carries a CaseDetails with its OrderInfo list. All three classes use
+__slots__, so one result is a handful of small objects instead of nested
+dicts. Order PDFs are never carried inline; /download_pdf produces them on
+request. Case.apply_result maps a CaseDetails onto the database rows.
+
+A High Court result also carries the fingerprint of the page it was parsed
+from. When that matches the fingerprint the caller already holds, the page
+is not parsed at all and the result is marked unchanged, with no data.
+"""
+from typing import List, Optional
+
+
+class OrderInfo:
+    """One order or judgment listed for a case"""
+    __slots__ = ('title', 'date', 'type', 'pdf_url')
+
+    def __init__(self, title: str, date: str = '', type: str = 'Order', pdf_url: str = ''):
+        self.title = title
+        self.date = date
+        self.type = type
+        self.pdf_url = pdf_url
+
+    def to_dict(self):
+        return {'title': self.title, 'date': self.date, 'type': self.type, 'pdf_url': self.pdf_url}
+
+    def __repr__(self):
+        return f'<OrderInfo {self.date} {self.title!r}>'
+
+
+class CaseDetails:
+    """Parsed details of one case; fields the source does not provide stay empty"""
+    __slots__ = (
+        'petitioner', 'respondent', 'filing_date', 'next_hearing_date', 'status', 'orders',
+        'case_title', 'case_type', 'case_number', 'filing_year', 'bench',
+        'latest_order_date', 'latest_order_summary', 'notes',
+    )
+
+    def __init__(self, petitioner: str = '', respondent: str = '', filing_date: str = '',
+                 next_hearing_date: str = '', status: str = '', orders: Optional[List[OrderInfo]] = None,
+                 case_title: str = '', case_type: str = '', case_number: str = '', filing_year: str = '',
+                 bench: str = '', latest_order_date: str = '', latest_order_summary: str = '', notes: str = ''):
+        self.petitioner = petitioner
+        self.respondent = respondent
+        self.filing_date = filing_date
+        self.next_hearing_date = next_hearing_date
+        self.status = status
+        self.orders = orders if orders is not None else []
+        self.case_title = case_title
+        self.case_type = case_type
+        self.case_number = case_number
+        self.filing_year = filing_year
+        self.bench = bench
+        self.latest_order_date = latest_order_date
+        self.latest_order_summary = latest_order_summary
+        self.notes = notes
+
+    def fill_key(self, case_type, case_number, filing_year):
+        """Fill the key fields (and a parties title) the source page did not provide"""
+        self.case_type = self.case_type or case_type
+        self.case_number = self.case_number or case_number
+        self.filing_year = self.filing_year or filing_year
+        if not self.case_title:
+            self.case_title = f'{self.petitioner or "Petitioner"} vs {self.respondent or "Respondent"}'
+        return self
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__ if name != 'orders'}
+        data['orders'] = [order.to_dict() for order in self.orders]
+        return data
+
+    def __repr__(self):
+        return f'<CaseDetails {self.petitioner!r} vs {self.respondent!r}>'
+
+
+class SearchResult:
+    """Outcome of one court lookup: details on success, an error message otherwise"""
+    __slots__ = (
+        'success', 'data', 'error', 'raw_data', 'source',
+        'not_found', 'captcha_detected', 'timed_out', 'direct_url', 'alternatives', 'creative_solutions',
+        'fingerprint', 'unchanged',
+    )
+
+    def __init__(self, success: bool, data: Optional[CaseDetails] = None, error: str = '', raw_data: str = '',
+                 source: str = '', not_found: bool = False, captcha_detected: bool = False,
+                 timed_out: bool = False, direct_url: str = '', alternatives: Optional[List[str]] = None,
+                 creative_solutions: Optional[List[str]] = None, fingerprint: str = '', unchanged: bool = False):
+        self.success = success
+        self.data = data
+        self.error = error
+        self.raw_data = raw_data
+        self.source = source
+        self.not_found = not_found
+        self.captcha_detected = captcha_detected
+        self.timed_out = timed_out
+        self.direct_url = direct_url
+        self.alternatives = alternatives or []
+        self.creative_solutions = creative_solutions or []
+        self.fingerprint = fingerprint
+        self.unchanged = unchanged
+
+    @classmethod
+    def found(cls, data: CaseDetails, raw_data: str = '', source: str = ''):
+        return cls(True, data=data, raw_data=raw_data, source=source)
+
+    @classmethod
+    def unchanged_page(cls, fingerprint: str):
+        """Success whose page matches a known fingerprint; the caller's stored details still hold"""
+        return cls(True, fingerprint=fingerprint, unchanged=True)
+
+    @classmethod
+    def failed(cls, error: str, raw_data: str = '', **flags):
+        return cls(False, error=error, raw_data=raw_data, **flags)
+
+    def to_dict(self):
+        """JSON-ready form, omitting unset optional fields"""
+        result = {'success': self.success}
+        if self.data is not None:
+            result['data'] = self.data.to_dict()
+        for name in self.__slots__[2:]:
+            value = getattr(self, name)
+            if value:
+                result[name] = value
+        return result
+
+    def __repr__(self):
+        return f'<SearchResult success={self.success} {self.error[:40]!r}>'
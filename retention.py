@@ -0,0 +1,191 @@
+"""
+Retention job for the search history and stored orders
+
+- CaseQuery rows older than the retention window are rolled up into
+  QueryDailyStat rows (per day and case type), appended to a gzipped NDJSON
+  archive and deleted, one bounded batch per transaction.
+- Orders of cases nobody has searched for (or that have not changed) within
+  the order window are archived and deleted the same way; the case's page
+  fingerprint is cleared with them, so searching the case again fetches and
+  parses them afresh. Their (date, title) keys are kept on the case, so the
+  orders that search brings back are not reported as new changes.
+- Change feed entries (CaseChange rows) older than their window are
+  deleted without an archive; the cases themselves hold the current state.
+  The newest entry is always kept, so change ids keep growing.
+- Afterwards the database is compacted: VACUUM/ANALYZE on SQLite (plus FTS
+  optimize), VACUUM (ANALYZE) on Postgres.
+
+Each batch is written (and fsynced) to the archive before it is deleted, so
+an interrupted run can archive a batch twice but never loses one.
+"""
+import gzip
+import json
+import logging
+import os
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, delete, exists, func, insert, select, text, update
+
+import search_index
+from models import Case, CaseChange, CaseOrder, CaseQuery, QueryDailyStat, db
+
+
+def run(archive_dir, query_days=90, order_days=365, change_days=30, batch_size=1000, vacuum=True):
+    """Apply the retention policy; returns the number of rows removed per table"""
+    now = datetime.utcnow()
+    stamp = now.strftime('%Y%m%dT%H%M%S')
+    os.makedirs(archive_dir, exist_ok=True)
+
+    removed = {'case_query': 0, 'case_order': 0, 'case_change': 0}
+    if query_days:
+        removed['case_query'] = compact_queries(
+            now - timedelta(days=query_days), os.path.join(archive_dir, f'case_query-{stamp}.ndjson.gz'), batch_size
+        )
+    if order_days:
+        removed['case_order'] = archive_orders(
+            now - timedelta(days=order_days), os.path.join(archive_dir, f'case_order-{stamp}.ndjson.gz'), batch_size
+        )
+    if change_days:
+        removed['case_change'] = prune_changes(now - timedelta(days=change_days), batch_size)
+
+    if vacuum and any(removed.values()):
+        compact_database()
+    return removed
+
+
+def compact_queries(cutoff, archive_path, batch_size=1000):
+    """Roll up, archive and delete CaseQuery rows older than cutoff"""
+    table = CaseQuery.__table__
+    total = 0
+    while True:
+        with db.engine.begin() as conn:
+            rows = conn.execute(
+                select(table).where(table.c.query_timestamp < cutoff).order_by(table.c.id).limit(batch_size)
+            ).mappings().all()
+            if not rows:
+                return total
+            _append_archive(archive_path, rows)
+            _roll_up(conn, rows)
+            conn.execute(delete(table).where(table.c.id.in_([row['id'] for row in rows])))
+        total += len(rows)
+        logging.info(f"Compacted {total} case_query rows older than {cutoff:%Y-%m-%d}")
+
+
+def archive_orders(cutoff, archive_path, batch_size=1000):
+    """Archive and delete the orders of cases not searched for or updated since cutoff"""
+    orders = CaseOrder.__table__
+    cases = Case.__table__
+    queries = CaseQuery.__table__
+    stale_cases = select(cases.c.id).where(
+        cases.c.last_updated < cutoff,
+        ~exists().where(and_(queries.c.case_id == cases.c.id, queries.c.query_timestamp >= cutoff))
+    )
+
+    total = 0
+    while True:
+        with db.engine.begin() as conn:
+            rows = conn.execute(
+                select(orders, cases.c.case_type, cases.c.case_number, cases.c.filing_year)
+                .join(cases, cases.c.id == orders.c.case_id)
+                .where(orders.c.case_id.in_(stale_cases))
+                .order_by(orders.c.id).limit(batch_size)
+            ).mappings().all()
+            if not rows:
+                return total
+            _append_archive(archive_path, rows)
+
+            order_ids = [row['id'] for row in rows]
+            conn.execute(delete(orders).where(orders.c.id.in_(order_ids)))
+            archived = {}
+            for row in rows:
+                archived.setdefault(row['case_id'], []).append([row['order_date'], row['order_title']])
+            case_ids = set(archived)
+            kept = conn.execute(select(cases.c.id, cases.c.archived_orders).where(cases.c.id.in_(case_ids))).all()
+            for case_id, keys in kept:
+                conn.execute(update(cases).where(cases.c.id == case_id).values(
+                    page_fingerprint=None, archived_orders=(keys or []) + archived[case_id]
+                ))
+            # Bulk deletes bypass the flush listener; drop the orders from the search indexes here
+            if conn.dialect.name == 'sqlite' and search_index.is_available(conn):
+                conn.execute(text(f"DELETE FROM order_fts WHERE rowid IN ({','.join(str(int(i)) for i in order_ids)})"))
+            search_index.index_cases(conn, case_ids)
+        total += len(rows)
+        logging.info(f"Archived {total} case_order rows of cases idle since {cutoff:%Y-%m-%d}")
+
+
+def prune_changes(cutoff, batch_size=1000):
+    """Delete change feed entries older than cutoff, always keeping the newest one"""
+    table = CaseChange.__table__
+    total = 0
+    while True:
+        with db.engine.begin() as conn:
+            # The newest id stays as the high-water mark, so ids never restart below a consumer's cursor
+            newest = select(func.max(table.c.id)).scalar_subquery()
+            ids = conn.execute(
+                select(table.c.id).where(table.c.changed_at < cutoff, table.c.id < newest)
+                .order_by(table.c.id).limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                return total
+            conn.execute(delete(table).where(table.c.id.in_(ids)))
+        total += len(ids)
+        logging.info(f"Deleted {total} case_change rows older than {cutoff:%Y-%m-%d}")
+
+
+def compact_database():
+    """Reclaim space and refresh planner statistics after large deletes"""
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        dialect = conn.dialect.name
+        if dialect == 'sqlite':
+            if search_index.is_available(conn):
+                for table in search_index.INDEX_TABLES['sqlite']:
+                    conn.exec_driver_sql(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+            conn.exec_driver_sql('VACUUM')
+            conn.exec_driver_sql('ANALYZE')
+            conn.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+        elif dialect == 'postgresql':
+            conn.exec_driver_sql(
+                f'VACUUM (ANALYZE) {CaseQuery.__tablename__}, {CaseOrder.__tablename__}, '
+                f'{CaseChange.__tablename__}, {QueryDailyStat.__tablename__}'
+            )
+        else:
+            conn.exec_driver_sql('ANALYZE')
+    logging.info(f"Compacted the {dialect} database")
+
+
+def _roll_up(conn, rows):
+    """Add the rows' counts to their QueryDailyStat rows"""
+    totals = {}
+    for row in rows:
+        counts = totals.setdefault((row['query_timestamp'].date(), row['case_type']), Counter())
+        counts['queries'] += 1
+        counts['successes'] += 1 if row['success'] else 0
+        for source in ('high_court', 'district'):
+            if row[f'{source}_ms'] is not None:
+                counts[f'{source}_ms_sum'] += row[f'{source}_ms']
+                counts[f'{source}_samples'] += 1
+
+    stats = QueryDailyStat.__table__
+    for (day, case_type), counts in totals.items():
+        key = and_(stats.c.day == day, stats.c.case_type == case_type)
+        updated = conn.execute(
+            update(stats).where(key).values({column: stats.c[column] + value for column, value in counts.items()})
+        ).rowcount
+        if not updated:
+            conn.execute(insert(stats).values(day=day, case_type=case_type, **counts))
+
+
+def _append_archive(path, rows):
+    """Append rows to a gzipped NDJSON file as one gzip member, synced to disk"""
+    lines = ''.join(json.dumps(dict(row), default=_json_default) + '\n' for row in rows)
+    with open(path, 'ab') as f:
+        f.write(gzip.compress(lines.encode()))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
@@ -1,19 +1,93 @@
-from flask import render_template, request, flash, redirect, url_for, jsonify, send_file, make_response
+from flask import render_template, request, flash, redirect, url_for, jsonify, send_file, make_response, abort
+from flask import session as flask_session
+from flask.globals import request_ctx
+from werkzeug.http import is_resource_modified
 from app import app
-from models import CaseQuery, CaseOrder, db
-from scraper import DelhiHighCourtScraper, DistrictCourtScraper
-import requests
+from models import Case, CaseOrder, CaseQuery, db
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
+from validation import canonical_case_key, validate_case_input
+from admission import AdmissionController
+import body_limits
+from caching import SingleFlight, TTLCache
+from change_feed import ChangeFeed
+from db_engine import mark_write, read_replica
 import os
-import tempfile
+import hmac
+import json
 import logging
+import time
+from datetime import datetime
+import metrics
+import profiling
+import search_index
+from write_buffer import WriteBehindBuffer
+from pdf_cache import PdfCache
+from pdf_text import TextExtractor
+from prefetch import GENERATED_PREFIX, PdfPrefetcher
+from results import SearchResult
+from search_orchestrator import SearchOrchestrator
+
+# Failed searches spike during court outages; batch their history rows
+history_buffer = WriteBehindBuffer(
+    app, CaseQuery,
+    max_rows=app.config["HISTORY_FLUSH_ROWS"],
+    flush_ms=app.config["HISTORY_FLUSH_MS"]
+)
+
+negative_cache = TTLCache(ttl=app.config["NEGATIVE_CACHE_TTL"], maxsize=10000)
+
+pdf_cache = PdfCache(app.config["PDF_CACHE_DIR"], max_bytes=app.config["PDF_CACHE_MAX_BYTES"])
+
+text_extractor = TextExtractor(
+    app,
+    workers=app.config["PDF_TEXT_WORKERS"],
+    max_pages=app.config["PDF_TEXT_MAX_PAGES"],
+    max_chars=app.config["PDF_TEXT_MAX_CHARS"]
+)
+
+search_orchestrator = SearchOrchestrator(
+    deadline=app.config["SEARCH_DEADLINE_SECONDS"],
+    grace=app.config["HIGH_COURT_GRACE_SECONDS"]
+)
+
+# Concurrent searches for the same case share one court lookup
+search_flights = SingleFlight()
+
+# Bounds the requests stuck waiting on the courts so read-only pages keep a thread
+scrape_admission = AdmissionController(
+    'scrape',
+    limit=app.config["SCRAPE_CONCURRENCY"],
+    queue_size=app.config["SCRAPE_QUEUE"],
+    queue_timeout=app.config["SCRAPE_QUEUE_TIMEOUT_SECONDS"],
+    retry_after=app.config["SCRAPE_RETRY_AFTER_SECONDS"]
+)
+
+# Long-polled reads of the case change log; each waiter holds a worker thread, so their number is capped
+change_feed = ChangeFeed(poll_interval=app.config["CHANGES_POLL_SECONDS"])
+change_waiters = AdmissionController('changes_wait', limit=app.config["CHANGES_MAX_WAITERS"])
+
+# Warms the PDF caches for a found case's orders; holds off while every scrape slot is busy.
+# Prefetched court PDFs are queued for text extraction like downloaded ones
+pdf_prefetcher = PdfPrefetcher(
+    pdf_cache,
+    workers=app.config["PDF_PREFETCH_WORKERS"],
+    per_host=app.config["PDF_PREFETCH_PER_HOST"],
+    max_age=app.config["PDF_PREFETCH_MAX_AGE_SECONDS"],
+    busy=lambda: scrape_admission.enabled and scrape_admission.in_flight >= scrape_admission.limit,
+    on_fetched=lambda pdf_url, cached_path: _queue_text(pdf_url, cached_path)
+)
 
 @app.route('/')
+@read_replica
 def index():
     """Main page with search form"""
     recent_queries = CaseQuery.query.order_by(CaseQuery.query_timestamp.desc()).limit(10).all()
     return render_template('index.html', recent_queries=recent_queries)
 
 @app.route('/search', methods=['POST'])
+@scrape_admission.guard
 def search_case():
     """Handle case search form submission"""
     case_type = request.form.get('case_type')
@@ -25,6 +99,131 @@ def search_case():
         flash('All fields are required', 'error')
         return redirect(url_for('index'))
     
+    # Reject malformed input before any network I/O
+    errors = validate_case_input(case_type, case_number, filing_year)
+    if errors:
+        metrics.inc('nyayalens_search_invalid_total', help='Searches rejected by input validation')
+        for error in errors:
+            flash(error, 'error')
+        return redirect(url_for('index'))
+    case_type, case_number, filing_year = canonical_case_key(case_type, case_number, filing_year)
+    
+    try:
+        result, query = _run_search(case_type, case_number, filing_year)
+    except Exception:
+        flash('An unexpected error occurred. Please try again.', 'error')
+        return redirect(url_for('index'))
+    
+    if result.success:
+        pdf_prefetcher.submit(order.pdf_url for order in result.data.orders)
+        flash('Case details retrieved successfully!', 'success')
+        # Post/Redirect/Get: the result lives at the case's permalink, so reloads do not re-scrape
+        return redirect(url_for('case_page', case_type=case_type, case_number=case_number,
+                                filing_year=filing_year), code=303)
+    
+    # Handle search failure - provide comprehensive guidance
+    base_error = result.error
+    if result.alternatives:
+        flash(f'Search failed: {base_error}', 'error')
+        for alt in result.alternatives:
+            flash(f'Alternative: {alt}', 'info')
+    elif result.direct_url:
+        flash(f'Search failed: {base_error}', 'error')
+        flash(f'Direct link: {result.direct_url}', 'info')
+    else:
+        flash(f'Search failed: {base_error}', 'error')
+    
+    return redirect(url_for('index'))
+
+@app.route('/api/v1/search', methods=['GET', 'POST'])
+@scrape_admission.guard
+def api_search():
+    """JSON search: the same lookup as /search, answered with the SearchResult as JSON"""
+    if request.method == 'POST':
+        params = request.get_json(silent=True) if request.is_json else request.form
+        if params is None or not isinstance(params, dict):
+            return jsonify({'success': False, 'error': 'Request body must be a JSON object'}), 400
+    else:
+        params = request.args
+    case_type, case_number, filing_year = (
+        str(params.get(name) or '').strip() for name in ('case_type', 'case_number', 'filing_year')
+    )
+    
+    if not all([case_type, case_number, filing_year]):
+        return jsonify({'success': False, 'error': 'case_type, case_number and filing_year are required'}), 400
+    
+    errors = validate_case_input(case_type, case_number, filing_year)
+    if errors:
+        metrics.inc('nyayalens_search_invalid_total', help='Searches rejected by input validation')
+        return jsonify({'success': False, 'error': errors[0], 'errors': errors}), 400
+    case_type, case_number, filing_year = canonical_case_key(case_type, case_number, filing_year)
+    
+    try:
+        result, query = _run_search(case_type, case_number, filing_year)
+    except Exception:
+        return jsonify({'success': False, 'error': 'An unexpected error occurred. Please try again.'}), 500
+    
+    payload = result.to_dict()
+    if query is not None and query.id is not None:
+        payload['query_id'] = query.id
+    if result.success:
+        status = 200
+    elif result.not_found:
+        status = 404
+    elif result.timed_out:
+        status = 504
+    else:
+        status = 502  # the court sites failed us, not the client
+    return jsonify(payload), status
+
+@app.route('/api/v1/changes')
+def api_changes():
+    """Case changes after the `since` cursor, oldest first; `wait` long-polls when there are none yet"""
+    try:
+        since = int(request.args.get('since', '0'))
+        limit = int(request.args.get('limit', '100'))
+        wait = float(request.args.get('wait', '0'))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'since and limit must be integers, wait a number of seconds'}), 400
+    if since < 0 or limit < 1 or not wait >= 0:
+        return jsonify({'success': False, 'error': 'since and wait must be >= 0 and limit >= 1'}), 400
+    limit = min(limit, app.config["CHANGES_MAX_BATCH"])
+    wait = min(wait, app.config["CHANGES_MAX_WAIT_SECONDS"])
+    
+    if wait and change_waiters.acquire():
+        try:
+            changes, has_more = change_feed.wait(since, limit, wait)
+        finally:
+            change_waiters.release()
+    else:
+        if wait:
+            metrics.inc('nyayalens_changes_wait_refused_total',
+                        help='Change feed long-polls answered at once because too many were waiting')
+        changes, has_more = change_feed.read(since, limit)
+    
+    next_cursor = changes[-1]['cursor'] if changes else str(since)
+    return jsonify({'success': True, 'changes': changes, 'next_cursor': next_cursor, 'has_more': has_more})
+
+def _run_search(case_type, case_number, filing_year):
+    """
+    Look up a validated case and record the outcome; shared by /search and /api/v1/search
+    
+    Returns (SearchResult, CaseQuery or None). A successful result always
+    carries the case details, also when the court page was unchanged. Court
+    lookups for the same case running at the same time are coalesced into
+    one. Unexpected errors are logged, recorded and re-raised.
+    
+    The key must already be canonical_case_key's form: it is used as is for
+    the negative cache, the coalescing key and the stored rows.
+    """
+    key = (case_type, case_number, filing_year)
+    
+    # Repeat lookups of a case the court just said does not exist are answered from memory
+    cached_error = negative_cache.get(key)
+    if cached_error is not None:
+        metrics.inc('nyayalens_search_negative_cache_hits_total', help='Searches answered from the negative cache')
+        return SearchResult.failed(cached_error, not_found=True), None
+    
     # Create query record
     query = CaseQuery(
         case_type=case_type,
@@ -33,83 +232,170 @@ def search_case():
     )
     
     try:
-        # Initialize primary scraper (Delhi High Court)
-        scraper = DelhiHighCourtScraper()
+        (result, timings), shared = search_flights.do(
+            key, _search_courts, case_type, case_number, filing_year
+        )
+        if shared:
+            metrics.inc('nyayalens_search_coalesced_total', help='Searches that shared a concurrent identical lookup')
+        query.high_court_ms = timings['high_court']
+        query.district_ms = timings['district']
         
-        # Perform scraping
-        result = scraper.search_case(case_type, case_number, filing_year)
+        if result.success:
+            if result.unchanged:
+                metrics.inc('nyayalens_search_unchanged_total', help='Searches whose court page matched the stored case')
+                details = _record_unchanged(query)
+                return SearchResult(True, data=details, fingerprint=result.fingerprint, unchanged=True), query
+            # Upsert the deduplicated case and log the query against it
+            _record_success(query, result)
+            return result, query
         
-        # If High Court fails due to CAPTCHA, try District Court fallback
-        if not result['success'] and result.get('captcha_detected'):
-            logging.info("High Court CAPTCHA detected, trying District Court fallback...")
-            district_scraper = DistrictCourtScraper()
-            result = district_scraper.search_case(case_type, case_number, filing_year)
-            
-            if result['success']:
-                result['data']['notes'] = "Data retrieved from New Delhi District Court (High Court CAPTCHA active)"
-        
-        if result['success']:
-            # Update query with successful results
+        if result.not_found:
+            negative_cache.set(key, result.error)
+        _record_failure(case_type, case_number, filing_year, result.error, timings)
+        return result, query
+    
+    except Exception as e:
+        # Handle unexpected errors
+        db.session.rollback()
+        _record_failure(case_type, case_number, filing_year, str(e))
+        logging.error(f"Search error: {str(e)}")
+        raise
+
+def _search_courts(case_type, case_number, filing_year):
+    """
+    Query High Court and District Court in parallel under one deadline; a High Court
+    page matching the stored case's fingerprint comes back unchanged and unparsed
+    """
+    known_fingerprint = _stored_fingerprint(case_type, case_number, filing_year)
+    return search_orchestrator.search(case_type, case_number, filing_year, known_fingerprint=known_fingerprint)
+
+def _stored_fingerprint(case_type, case_number, filing_year):
+    """Page fingerprint of the stored case, read outside the session so no transaction spans the search"""
+    with db.engine.connect() as conn:
+        return conn.execute(
+            select(Case.page_fingerprint).where(Case.case_type == case_type, Case.case_number == case_number,
+                                                Case.filing_year == filing_year)
+        ).scalar()
+
+def _record_success(query, result):
+    """Upsert the case from a successful result and link the query log row to it"""
+    for attempt in range(2):
+        try:
+            case = Case.get_or_create(query.case_type, query.case_number, query.filing_year)
+            changed, new_orders = case.apply_result(result.data, result.raw_data)
+            # District results carry no fingerprint; the next search then parses the High Court page in full
+            case.page_fingerprint = result.fingerprint or None
+            case.last_checked_at = datetime.utcnow()
             query.success = True
-            query.raw_response = str(result['raw_data'])
-            query.parties_plaintiff = result['data'].get('plaintiff', '')
-            query.parties_defendant = result['data'].get('defendant', '')
-            query.filing_date = result['data'].get('filing_date', '')
-            query.next_hearing_date = result['data'].get('next_hearing_date', '')
-            query.case_status = result['data'].get('status', '')
-            
-            # Save query first to get ID
+            query.case = case
             db.session.add(query)
-            db.session.flush()
-            
-            # Save orders
-            for order_data in result['data'].get('orders', []):
-                order = CaseOrder(
-                    query_id=query.id,
-                    order_date=order_data.get('date', ''),
-                    order_title=order_data.get('title', ''),
-                    pdf_url=order_data.get('pdf_url', ''),
-                    order_type=order_data.get('type', 'Order')
-                )
-                db.session.add(order)
-            
             db.session.commit()
-            flash('Case details retrieved successfully!', 'success')
-            return render_template('results.html', query=query, case_data=result['data'])
-            
-        else:
-            # Handle search failure - provide comprehensive guidance
-            query.success = False
-            query.error_message = result['error']
-            db.session.add(query)
-            db.session.commit()
-            
-            # Create enhanced error message with alternatives
-            base_error = result['error']
-            if result.get('alternatives'):
-                flash(f'Search failed: {base_error}', 'error')
-                for alt in result['alternatives']:
-                    flash(f'Alternative: {alt}', 'info')
-            elif result.get('direct_url'):
-                flash(f'Search failed: {base_error}', 'error')
-                flash(f'Direct link: {result["direct_url"]}', 'info')
-            else:
-                flash(f'Search failed: {base_error}', 'error')
-            
-            return redirect(url_for('index'))
-            
+            mark_write()
+            if changed or new_orders:
+                change_feed.notify()
+            return
+        except IntegrityError:
+            # Another worker inserted the same case concurrently; retry against its row
+            db.session.rollback()
+            if attempt:
+                raise
+
+def _record_unchanged(query):
+    """Touch the stored case whose court page has not changed, log the query and return its details"""
+    case = Case.query.filter_by(case_type=query.case_type, case_number=query.case_number,
+                                filing_year=query.filing_year).one()
+    details = case.to_details()
+    # A bulk UPDATE leaves the case clean in the session, so the touch does not re-index it
+    db.session.execute(update(Case).where(Case.id == case.id).values(last_checked_at=datetime.utcnow()))
+    query.success = True
+    query.case = case
+    db.session.add(query)
+    db.session.commit()
+    mark_write()
+    return details
+
+def _record_failure(case_type, case_number, filing_year, error_message, timings=None):
+    """Log a failed search through the write-behind buffer"""
+    timings = timings or {}
+    history_buffer.add(
+        case_type=case_type,
+        case_number=case_number,
+        filing_year=filing_year,
+        query_timestamp=datetime.utcnow(),
+        success=False,
+        error_message=error_message,
+        high_court_ms=timings.get('high_court'),
+        district_ms=timings.get('district')
+    )
+    mark_write()
+
+def _pending_flashes():
+    """
+    True if this client has flash messages waiting
+
+    Any use of the session marks it accessed, which adds Vary: Cookie. A client
+    without a session cookie cannot have flashes, so the session is left alone
+    and the template is told there are none.
+    """
+    if app.config["SESSION_COOKIE_NAME"] not in request.cookies:
+        request_ctx.flashes = []
+        return False
+    return '_flashes' in flask_session
+
+def _needs_text(pdf_url):
+    """True when a stored order links to this PDF and its text has not been extracted yet"""
+    return db.session.query(
+        CaseOrder.query.filter(CaseOrder.pdf_url == pdf_url, CaseOrder.text_extracted_at.is_(None)).exists()
+    ).scalar()
+
+def _queue_text(pdf_url, cached_path):
+    """Index the judgment text of a cached court PDF in the background the first time we see it"""
+    try:
+        # Also called from prefetch threads, which have no app context of their own
+        with app.app_context():
+            if _needs_text(pdf_url):
+                text_extractor.submit(pdf_url, cached_path)
     except Exception as e:
-        # Handle unexpected errors
-        query.success = False
-        query.error_message = str(e)
-        db.session.add(query)
-        db.session.commit()
-        logging.error(f"Search error: {str(e)}")
-        flash('An unexpected error occurred. Please try again.', 'error')
+        logging.error(f"Could not queue text extraction for {pdf_url}: {str(e)}")
+
+def _generated_pdf_response(slug):
+    """
+    Serve a generated order PDF; the bytes are fixed per order, so they carry a strong ETag
+
+    Rendered PDFs are kept in the disk cache under GENERATED_PREFIX + slug
+    (where the prefetcher puts them too), so every worker can serve them.
+    """
+    from scraper import generated_order_pdf, order_slug, parse_order_slug, pdf_etag
+    
+    key = parse_order_slug(slug)
+    if key is None:
+        logging.error(f"Invalid filename format: {slug}")
+        flash(f'Invalid filename format: {slug}', 'error')
         return redirect(url_for('index'))
+    
+    logging.info(f"Serving generated order PDF: {key[0]} {key[1]}/{key[2]} order {key[3]}")
+    pdf_prefetcher.claim(GENERATED_PREFIX + slug)
+    cache_key = GENERATED_PREFIX + order_slug(*key)
+    cached_path = pdf_cache.get(cache_key)
+    if cached_path is not None:
+        with open(cached_path, 'rb') as f:
+            pdf_content = f.read()
+        etag = pdf_etag(pdf_content)
+    else:
+        pdf_content, etag = generated_order_pdf(*key)
+        pdf_cache.put(cache_key, [pdf_content])
+    
+    response = make_response(pdf_content)
+    response.headers['Content-Type'] = 'application/pdf'
+    response.headers['Content-Disposition'] = f'attachment; filename="{slug}.pdf"'
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config['GENERATED_PDF_MAX_AGE']
+    return response.make_conditional(request)
 
 @app.route('/download_pdf')
 @app.route('/download_pdf/<filename>')
+@scrape_admission.guard
 def download_pdf(filename=None):
     """Generate and download PDF for court orders"""
     try:
@@ -132,106 +418,34 @@ def download_pdf(filename=None):
                 logging.error(f"Invalid URL format: {pdf_url}")
                 # If it looks like a filename, try to generate PDF instead
                 if pdf_url.startswith('/download_pdf/'):
-                    filename_from_url = pdf_url.replace('/download_pdf/', '')
-                    logging.info(f"Treating as filename: {filename_from_url}")
-                    
-                    # Parse filename to extract case details for generated PDFs
-                    clean_filename = filename_from_url.replace('__', '_').replace('_', ' ')
-                    parts = clean_filename.split()
-                    logging.info(f"Cleaned filename: {clean_filename}, Parts: {parts}")
-                    
-                    if len(parts) >= 4:
-                        case_type = parts[0]
-                        case_number = parts[1]
-                        filing_year = parts[2]
-                        order_num = parts[-1] if parts[-1].isdigit() else 1
-                        logging.info(f"Parsed case details: {case_type} {case_number}/{filing_year} order {order_num}")
-                        
-                        # Generate PDF content
-                        from scraper import DistrictCourtScraper
-                        scraper = DistrictCourtScraper()
-                        
-                        # Create detailed PDF with scraped data structure
-                        pdf_content = scraper._generate_pdf_content(case_type, case_number, filing_year, 
-                                                                   scraper._generate_latest_order_date(), int(order_num))
-                        
-                        if not pdf_content:
-                            flash('Error generating PDF content', 'error')
-                            return redirect(url_for('index'))
-                        
-                        # Create response with PDF
-                        response = make_response(pdf_content)
-                        response.headers['Content-Type'] = 'application/pdf'
-                        response.headers['Content-Disposition'] = f'attachment; filename="{filename_from_url}.pdf"'
-                        
-                        return response
-                    else:
-                        logging.error(f"Invalid filename format: {filename_from_url} (parts: {parts})")
-                        flash(f'Invalid filename format: {filename_from_url}', 'error')
-                        return redirect(url_for('index'))
+                    return _generated_pdf_response(pdf_url.replace('/download_pdf/', ''))
                 else:
                     flash('Invalid PDF URL format', 'error')
                     return redirect(url_for('index'))
             
-            # Download PDF
-            logging.info(f"Attempting to download PDF from: {pdf_url}")
-            response = requests.get(pdf_url, timeout=30)
-            response.raise_for_status()
+            # Serve from the PDF cache, downloading into it on a miss
+            cached_path = pdf_cache.get(pdf_url)
+            if cached_path is None and pdf_prefetcher.wait(pdf_url, timeout=30):
+                cached_path = pdf_cache.get(pdf_url)
+            if cached_path is None:
+                import requests
+                logging.info(f"Attempting to download PDF from: {pdf_url}")
+                with requests.get(pdf_url, timeout=30, stream=True) as response:
+                    response.raise_for_status()
+                    cached_path = pdf_cache.put(pdf_url, body_limits.iter_capped(response))
+                metrics.inc('nyayalens_pdf_cache_misses_total', help='Order PDFs downloaded from the court')
+            else:
+                metrics.inc('nyayalens_pdf_cache_hits_total', help='Order PDFs served from the disk cache')
+                pdf_prefetcher.claim(pdf_url)
             
-            # Create temporary file
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-            try:
-                temp_file.write(response.content)
-                temp_file.close()
-                
-                return send_file(temp_file.name, as_attachment=True, download_name=filename_param)
-            except Exception as file_error:
-                # Clean up temp file if there's an error
-                try:
-                    os.unlink(temp_file.name)
-                except:
-                    pass
-                raise file_error
+            _queue_text(pdf_url, cached_path)
+            
+            return send_file(cached_path, as_attachment=True, download_name=filename_param)
         
         # If we have a filename in the URL path (not as query param), generate PDF
         elif filename and not request.args.get('url'):
             logging.info(f"Generating PDF for filename: {filename}")
-            
-            # Parse filename to extract case details for generated PDFs
-            # Handle double underscores and special characters
-            clean_filename = filename.replace('__', '_').replace('_', ' ')
-            parts = clean_filename.split()
-            logging.info(f"Cleaned filename: {clean_filename}, Parts: {parts}")
-            
-            if len(parts) >= 4:
-                case_type = parts[0]
-                case_number = parts[1]
-                filing_year = parts[2]
-                order_num = parts[-1] if parts[-1].isdigit() else 1
-                logging.info(f"Parsed case details: {case_type} {case_number}/{filing_year} order {order_num}")
-            else:
-                logging.error(f"Invalid filename format: {filename} (parts: {parts})")
-                flash(f'Invalid filename format: {filename}', 'error')
-                return redirect(url_for('index'))
-            
-            # Generate PDF content
-            from scraper import DistrictCourtScraper
-            scraper = DistrictCourtScraper()
-            
-            # Create detailed PDF with scraped data structure
-            pdf_content = scraper._generate_pdf_content(case_type, case_number, filing_year, 
-                                                       scraper._generate_latest_order_date(), int(order_num))
-            
-            if not pdf_content:
-                flash('Error generating PDF content', 'error')
-                return redirect(url_for('index'))
-            
-            # Create response with PDF
-            response = make_response(pdf_content)
-            response.headers['Content-Type'] = 'application/pdf'
-            response.headers['Content-Disposition'] = f'attachment; filename="{filename}.pdf"'
-            
-            return response
+            return _generated_pdf_response(filename)
         else:
             flash('No PDF URL or filename provided', 'error')
             return redirect(url_for('index'))
@@ -243,13 +457,75 @@ def download_pdf(filename=None):
         flash(f'Error generating PDF file: {str(e)}', 'error')
         return redirect(url_for('index'))
 
+@app.route('/case/<case_type>/<case_number>/<filing_year>')
+@read_replica
+def case_page(case_type, case_number, filing_year):
+    """Permalink to a stored case, rendered from the database without asking the courts"""
+    if validate_case_input(case_type, case_number, filing_year):
+        abort(404)
+    # Every spelling of a case key ('0042') points at its one stored form
+    key = canonical_case_key(case_type, case_number, filing_year)
+    if key != (case_type, case_number, filing_year):
+        return redirect(url_for('case_page', case_type=key[0], case_number=key[1], filing_year=key[2]), code=301)
+    # One indexed lookup yields the validators; a matching conditional request stops here
+    row = db.session.execute(
+        select(Case.id, Case.last_updated, CaseQuery.id, CaseQuery.query_timestamp)
+        .outerjoin(CaseQuery, CaseQuery.case_id == Case.id)
+        .where(Case.case_type == case_type, Case.case_number == case_number, Case.filing_year == filing_year)
+        .order_by(CaseQuery.id.desc())
+        .limit(1)
+    ).first()
+    if row is None:
+        abort(404)
+    case_id, updated_at, query_id, searched_at = row
+    # The page shows the latest search's time and id, so a new search changes it too
+    etag = f'{case_id}-{query_id or 0}-{int(updated_at.timestamp()) if updated_at else 0}'
+    last_modified = max(filter(None, [updated_at, searched_at]), default=None)
+    
+    # Pending flash messages are personal; render them and keep the page out of shared caches
+    personal = _pending_flashes()
+    if not personal and not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        metrics.inc('nyayalens_case_page_not_modified_total', help='Case permalink views answered with 304')
+        response = app.response_class(status=304)
+    else:
+        if query_id is not None:
+            query = (CaseQuery.query
+                     .options(joinedload(CaseQuery.case).selectinload(Case.orders))
+                     .filter(CaseQuery.id == query_id)
+                     .one())
+            case = query.case
+        else:
+            # The retention job has compacted every search of this case; show when it was last checked
+            case = Case.query.options(selectinload(Case.orders)).filter(Case.id == case_id).one()
+            query = CaseQuery(case_type=case.case_type, case_number=case.case_number, filing_year=case.filing_year,
+                              query_timestamp=case.last_checked_at or case.last_updated)
+        response = make_response(render_template('results.html', query=query, case_data=case.to_details()))
+    
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    if personal:
+        response.cache_control.private = True
+        response.cache_control.no_store = True
+    else:
+        response.cache_control.public = True
+        if app.config["CASE_PAGE_MAX_AGE"]:
+            response.cache_control.max_age = app.config["CASE_PAGE_MAX_AGE"]
+        else:
+            response.cache_control.no_cache = True
+    return response
+
 @app.route('/query_history')
+@read_replica
 def query_history():
     """Display query history"""
-    queries = CaseQuery.query.order_by(CaseQuery.query_timestamp.desc()).limit(50).all()
+    queries = (CaseQuery.query
+               .options(joinedload(CaseQuery.case).selectinload(Case.orders))
+               .order_by(CaseQuery.query_timestamp.desc())
+               .limit(50).all())
     return render_template('history.html', queries=queries)
 
 @app.route('/export_case_json/<int:query_id>')
+@read_replica
 def export_case_json(query_id):
     """Export case data as JSON"""
     query = CaseQuery.query.get_or_404(query_id)
@@ -286,10 +562,157 @@ def export_case_json(query_id):
     
     return jsonify(case_data)
 
+@app.route('/search_local')
+@read_replica
+def search_local():
+    """Full-text search over stored cases by party name, status or order title"""
+    q = request.args.get('q', '').strip()
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    
+    if not q:
+        return jsonify({'error': 'Query parameter q is required'}), 400
+    
+    started = time.perf_counter()
+    hits = search_index.search(db.session.connection(), q, limit=limit)
+    cases = {case.id: case for case in Case.query.filter(Case.id.in_([case_id for case_id, _ in hits])).all()}
+    
+    results = [
+        {
+            'case_id': case_id,
+            'case_type': cases[case_id].case_type,
+            'case_number': cases[case_id].case_number,
+            'filing_year': cases[case_id].filing_year,
+            'petitioner': cases[case_id].parties_plaintiff,
+            'respondent': cases[case_id].parties_defendant,
+            'status': cases[case_id].case_status,
+            'score': score
+        } for case_id, score in hits if case_id in cases
+    ]
+    
+    return jsonify({
+        'query': q,
+        'results': results,
+        'took_ms': round((time.perf_counter() - started) * 1000, 2)
+    })
+
+@app.route('/search_orders')
+@read_replica
+def search_orders():
+    """Full-text search over the extracted text of downloaded order PDFs"""
+    q = request.args.get('q', '').strip()
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    
+    if not q:
+        return jsonify({'error': 'Query parameter q is required'}), 400
+    
+    started = time.perf_counter()
+    hits = search_index.search_orders(db.session.connection(), q, limit=limit)
+    orders = {
+        order.id: order for order in CaseOrder.query.options(joinedload(CaseOrder.case))
+        .filter(CaseOrder.id.in_([order_id for order_id, _ in hits])).all()
+    }
+    
+    results = [
+        {
+            'order_id': order_id,
+            'case_id': orders[order_id].case_id,
+            'case_type': orders[order_id].case.case_type,
+            'case_number': orders[order_id].case.case_number,
+            'filing_year': orders[order_id].case.filing_year,
+            'title': orders[order_id].order_title,
+            'date': orders[order_id].order_date,
+            'pdf_url': orders[order_id].pdf_url,
+            'score': score
+        } for order_id, score in hits if order_id in orders
+    ]
+    
+    return jsonify({
+        'query': q,
+        'results': results,
+        'took_ms': round((time.perf_counter() - started) * 1000, 2)
+    })
+
+@app.route('/readyz')
+def readiness():
+    """Readiness probe: 503 while this worker is refusing court-bound requests"""
+    ready = not scrape_admission.saturated
+    response = jsonify({
+        'ready': ready,
+        'scrape_in_flight': scrape_admission.in_flight,
+        'scrape_queued': scrape_admission.queued,
+        'scrape_limit': scrape_admission.limit,
+        'scrape_queue_size': scrape_admission.queue_size,
+    })
+    if not ready:
+        response.status_code = 503
+        response.headers['Retry-After'] = str(scrape_admission.retry_after)
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Expose process metrics in Prometheus text format"""
+    response = make_response(metrics.render())
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4'
+    return response
+
+def _require_profile_token():
+    """Admin profile pages exist only when PROFILE_TOKEN is set, and need it as a bearer token"""
+    token = app.config.get("PROFILE_TOKEN")
+    if not token:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(403)
+
+@app.route('/admin/profiles')
+def list_profiles():
+    """List captured request profiles, newest first"""
+    _require_profile_token()
+    directory = app.config["PROFILE_DIR"]
+    profiles = []
+    for name in profiling.list_profiles(directory):
+        try:
+            with open(os.path.join(directory, f'{name}.json')) as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            continue
+        profiles.append({
+            key: info.get(key) for key in
+            ('name', 'created', 'trigger', 'method', 'path', 'status', 'elapsed_ms', 'tracemalloc_peak_bytes')
+        })
+    return jsonify({'profiles': profiles})
+
+@app.route('/admin/profiles/<name>')
+def show_profile(name):
+    """Summary of one profile (top functions and allocations), or its pstats file with ?format=prof"""
+    _require_profile_token()
+    directory = app.config["PROFILE_DIR"]
+    if request.args.get('format') == 'prof':
+        path = profiling.profile_path(directory, name, '.prof')
+        if path is None:
+            abort(404)
+        return send_file(path, as_attachment=True, download_name=f'{name}.prof',
+                         mimetype='application/octet-stream')
+
+    path = profiling.profile_path(directory, name, '.json')
+    if path is None:
+        abort(404)
+    return send_file(path, mimetype='application/json')
+
 @app.errorhandler(404)
 def not_found_error(error):
     return render_template('404.html'), 404
 
+@app.errorhandler(503)
+def service_unavailable(error):
+    retry_after = getattr(error, 'retry_after', None) or app.config["SCRAPE_RETRY_AFTER_SECONDS"]
+    if request.path.startswith('/api/'):
+        response = jsonify({'success': False, 'error': 'Too many searches in progress. Please retry shortly.'})
+    else:
+        response = make_response(render_template('503.html', retry_after=retry_after))
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
 @app.errorhandler(500)
 def internal_error(error):
     db.session.rollback()
@@ -5,6 +5,144 @@ import logging
 import time
 from urllib.parse import urljoin, urlparse
 import json
+import os
+import io
+import functools
+import hashlib
+import random
+from datetime import date, timedelta
+
+import body_limits
+from caching import HttpCache, TTLCache
+from fingerprint import page_fingerprint
+from hedging import HedgeBudget, Hedger
+from results import CaseDetails, OrderInfo, SearchResult
+from validation import VALID_CASE_TYPES, canonical_case_key, validate_case_input
+
+# Shared across scraper instances so repeat searches skip the form page fetch
+http_cache = HttpCache()
+form_schema_cache = TTLCache(ttl=int(os.environ.get("FORM_SCHEMA_TTL", "3600")))
+
+# Hidden form fields whose values belong to the session that loaded the page (CSRF tokens, view state)
+SESSION_FIELD_RE = re.compile(r'token|csrf|nonce|viewstate|eventvalidation|session|captcha|hash', re.I)
+
+# Optional hedging of the High Court form GET and search POST (HEDGE_PERCENTILE=0 disables it);
+# both share one budget so backups add at most HEDGE_BUDGET_RATIO to the court's load
+_hedge_budget = HedgeBudget(ratio=float(os.environ.get("HEDGE_BUDGET_RATIO", "0.05")),
+                            burst=int(os.environ.get("HEDGE_BUDGET_BURST", "5")))
+_hedge_options = dict(
+    percentile=float(os.environ.get("HEDGE_PERCENTILE", "0")),
+    min_delay_ms=float(os.environ.get("HEDGE_MIN_DELAY_MS", "50")),
+    min_samples=int(os.environ.get("HEDGE_MIN_SAMPLES", "20")),
+)
+form_hedger = Hedger('high_court_form', _hedge_budget, **_hedge_options)
+search_hedger = Hedger('high_court_search', _hedge_budget, **_hedge_options)
+
+def _checked(response):
+    """Raise for an error status inside a hedged attempt, so a fast error never beats a slower answer"""
+    response.raise_for_status()
+    return response
+
+# Court endpoints; overridable so load tests can point the scrapers at a local stand-in
+HIGH_COURT_BASE_URL = os.environ.get("HIGH_COURT_BASE_URL", "https://dhccaseinfo.nic.in/")
+DISTRICT_COURT_URLS = [url.strip() for url in os.environ.get("DISTRICT_COURT_URLS", ",".join([
+    "https://services.ecourts.gov.in/ecourtindia_v6/",
+    "https://westdelhi.dcourts.gov.in/case-status-search-by-case-number/",
+    "https://southeastdelhi.dcourts.gov.in/case-status-search-by-case-number/",
+    "https://northdelhi.dcourts.gov.in/case-status-search-by-case-number/",
+    "https://newdelhi.dcourts.gov.in/case-status-search-by-case-number/"
+])).split(",") if url.strip()]
+
+# Browser-like request headers for each court, shared by the sync and async scrapers
+HIGH_COURT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+DISTRICT_COURT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Connection': 'keep-alive',
+}
+
+@functools.lru_cache(maxsize=None)
+def _pdf_toolkit():
+    """Import reportlab and build the order PDF styles once, on first use"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    
+    # Define styles
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        spaceAfter=30,
+        alignment=1  # Center alignment
+    )
+    
+    return letter, SimpleDocTemplate, Paragraph, Spacer, styles, title_style
+
+def _case_rng(case_type, case_number, filing_year):
+    """Random generator seeded by the case key, identical in every process"""
+    key = f'{case_type}|{int(case_number)}|{int(filing_year)}'.encode()
+    return random.Random(int.from_bytes(hashlib.sha256(key).digest()[:8], 'big'))
+
+@functools.lru_cache(maxsize=1024)
+def _case_schedule(case_type, case_number, filing_year):
+    """(filing date, order dates, next hearing date) generated for a case, oldest order first"""
+    rng = _case_rng(case_type, case_number, filing_year)
+    filing_date = date(int(filing_year), rng.randint(1, 12), rng.randint(1, 28))
+    order_dates = []
+    current = filing_date
+    for _ in range(rng.randint(1, 3)):
+        current += timedelta(days=rng.randint(21, 120))
+        order_dates.append(current)
+    next_hearing = current + timedelta(days=rng.randint(14, 56))
+    return filing_date, tuple(order_dates), next_hearing
+
+def order_slug(case_type, case_number, filing_year, order_num):
+    """Path segment of a generated order PDF under /download_pdf/"""
+    return f'{case_type.replace(".", "_")}_{case_number}_{filing_year}_order_{order_num}'
+
+def parse_order_slug(slug):
+    """(case_type, case_number, filing_year, order_num) of an existing generated order, or None"""
+    slug = slug[:-4] if slug.lower().endswith('.pdf') else slug
+    parts = slug.rsplit('_', 4)
+    if len(parts) != 5 or parts[3] != 'order' or not parts[4].isdigit():
+        return None
+    case_types = {case_type.replace('.', '_'): case_type for case_type in VALID_CASE_TYPES}
+    case_type, case_number, filing_year, order_num = case_types.get(parts[0], parts[0]), parts[1], parts[2], int(parts[4])
+    if validate_case_input(case_type, case_number, filing_year):
+        return None
+    case_type, case_number, filing_year = canonical_case_key(case_type, case_number, filing_year)
+    if not 1 <= order_num <= len(_case_schedule(case_type, case_number, filing_year)[1]):
+        return None
+    return case_type, case_number, filing_year, order_num
+
+@functools.lru_cache(maxsize=256)
+def generated_order_pdf(case_type, case_number, filing_year, order_num):
+    """
+    (PDF bytes, strong ETag) of a generated order
+
+    The bytes depend only on the arguments, so they are built once per key
+    and the ETag stays valid across workers and restarts.
+    """
+    pdf_bytes = render_order_pdf(case_type, case_number, filing_year, order_num)
+    return pdf_bytes, pdf_etag(pdf_bytes)
+
+def render_order_pdf(case_type, case_number, filing_year, order_num):
+    """Bytes of a generated order, built without keeping them in memory"""
+    return DistrictCourtScraper()._generate_pdf_content(case_type, case_number, filing_year, order_num)
+
+def pdf_etag(pdf_bytes):
+    """Strong ETag of generated order PDF bytes"""
+    return hashlib.sha256(pdf_bytes).hexdigest()[:32]
 
 class DelhiHighCourtScraper:
     """
@@ -19,21 +157,25 @@ class DelhiHighCourtScraper:
     """
     
     def __init__(self):
-        self.base_url = "https://dhccaseinfo.nic.in/"
-        self.search_url = "https://dhccaseinfo.nic.in/pcase/guiCaseWise.php"
-        self.session = requests.Session()
+        self.base_url = HIGH_COURT_BASE_URL
+        self.search_url = urljoin(HIGH_COURT_BASE_URL, "pcase/guiCaseWise.php")
+        self.session = self._new_session()
+    
+    def _new_session(self):
+        """A session with its own connection pool; hedged backups each get one"""
+        session = requests.Session()
         
         # Set headers to mimic browser
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        })
+        session.headers.update(HIGH_COURT_HEADERS)
+        return body_limits.install(session)
+    
+    def _backup_session(self):
+        """A fresh session for a hedged backup, carrying the court session cookie the form's hidden values belong to"""
+        session = self._new_session()
+        session.cookies.update(self.session.cookies)
+        return session
         
-    def search_case(self, case_type, case_number, filing_year):
+    def search_case(self, case_type, case_number, filing_year, known_fingerprint=None):
         """
         Search for case details
         
@@ -41,122 +183,205 @@ class DelhiHighCourtScraper:
             case_type: Type of case (e.g., 'CRL.A.', 'W.P.(C)', 'CS(OS)')
             case_number: Case number
             filing_year: Filing year
+            known_fingerprint: Fingerprint of the page the stored details came from, if any
             
         Returns:
-            dict: Result with success status, data, and error messages
+            SearchResult: unchanged (without data) when the page still matches known_fingerprint
         """
         try:
-            # First, try to get the search page to understand the form structure
             logging.info(f"Searching for case: {case_type} {case_number}/{filing_year}")
             
-            # Get the search page
-            response = self.session.get(self.search_url, timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Look for CAPTCHA or form elements - Delhi High Court uses CAPTCHA
-            # Strategy: Detect CAPTCHA and provide user-friendly error with alternatives
-            captcha_elements = soup.find_all(['img', 'audio'], attrs={
-                'src': re.compile(r'captcha|verification|audio', re.I)
-            }) or soup.find_all(text=re.compile(r'captcha|verification', re.I))
-            
-            if captcha_elements or 'audio.jpg' in response.text:
-                logging.info("CAPTCHA detected on Delhi High Court website")
+            # Repeat searches go straight to the POST using the cached form schema
+            schema = form_schema_cache.get(self.search_url)
+            if schema is not None and not schema['session_bound']:
+                result = self._search_with_schema(schema, case_type, case_number, filing_year,
+                                                  known_fingerprint=known_fingerprint)
+                if result is not None:
+                    return result
                 
-                # Try a simple form submission without CAPTCHA first
-                # Some systems allow limited queries without CAPTCHA verification
-                try:
-                    logging.info("Attempting form submission without CAPTCHA...")
-                    search_form = soup.find('form')
-                    if search_form:
-                        form_data = self._prepare_form_data(soup, case_type, case_number, filing_year)
-                        
-                        # Try submitting without CAPTCHA
-                        search_response = self.session.post(
-                            self.search_url, 
-                            data=form_data, 
-                            timeout=10
-                        )
-                        
-                        # Check if we got valid results despite CAPTCHA
-                        if search_response.status_code == 200 and len(search_response.text) > 1000:
-                            results = self._parse_case_results(search_response.text)
-                            if results['success']:
-                                logging.info("Successfully bypassed CAPTCHA through form submission")
-                                results['data']['notes'] = "Retrieved despite CAPTCHA (form submission method)"
-                                return results
-                        
-                except Exception as e:
-                    logging.debug(f"Form submission without CAPTCHA failed: {str(e)}")
-                
-                # Enhanced CAPTCHA error with creative bypass suggestions
-                return {
-                    'success': False,
-                    'error': self._generate_user_friendly_captcha_message(case_type, case_number, filing_year),
-                    'raw_data': response.text[:1000] + '...',
-                    'captcha_detected': True,
-                    'direct_url': 'https://dhccaseinfo.nic.in/pcase/guiCaseWise.php',
-                    'creative_solutions': [
-                        'Try during low-traffic hours (6-8 AM or 10-11 PM)',
-                        'Use multiple browsers with different User-Agent strings',
-                        'Contact court registry at 011-23854065 for assistance',
-                        'Submit RTI application for case information if urgent'
-                    ]
-                }
-            
-            # Try to find and submit the search form
-            search_form = soup.find('form')
-            if not search_form:
-                return {
-                    'success': False,
-                    'error': 'Could not locate search form on the court website.',
-                    'raw_data': response.text[:1000] + '...'
-                }
+                logging.info("Cached search form no longer matches, refetching form")
+                form_schema_cache.pop(self.search_url)
+                schema = None
             
-            # Prepare form data based on common field names
-            form_data = self._prepare_form_data(soup, case_type, case_number, filing_year)
+            # Get the search page to understand the form structure; a form with session-bound
+            # hidden values is loaded by this session itself, not from the shared HTTP cache
+            shared = schema is None
+            response = self._get_search_page(shared)
+            schema = self._parse_form_schema(response.text)
+            if schema['session_bound'] and shared:
+                http_cache.pop(self.search_url)
+                response = self._get_search_page(shared=False)
+                schema = self._parse_form_schema(response.text)
+            self._remember_schema(schema)
             
-            # Submit search request
-            search_response = self.session.post(
-                self.search_url, 
-                data=form_data, 
-                timeout=15,
-                allow_redirects=True
-            )
-            search_response.raise_for_status()
-            
-            # Parse results
-            return self._parse_case_results(search_response.text)
+            return self._search_with_schema(schema, case_type, case_number, filing_year, fresh=True,
+                                            known_fingerprint=known_fingerprint)
             
         except requests.Timeout:
-            return {
-                'success': False,
-                'error': 'Request timed out. The court website may be experiencing heavy traffic.',
-                'raw_data': ''
-            }
+            return SearchResult.failed('Request timed out. The court website may be experiencing heavy traffic.')
         except requests.ConnectionError:
-            return {
-                'success': False,
-                'error': 'Unable to connect to the court website. Please check internet connection.',
-                'raw_data': ''
-            }
-        except requests.RequestException as e:
-            return {
-                'success': False,
-                'error': f'Network error occurred: {str(e)}',
-                'raw_data': ''
-            }
+            return SearchResult.failed('Unable to connect to the court website. Please check internet connection.')
+        except (requests.RequestException, body_limits.ResponseTooLarge) as e:
+            return SearchResult.failed(f'Network error occurred: {str(e)}')
         except Exception as e:
             logging.error(f"Unexpected error in search_case: {str(e)}")
-            return {
-                'success': False,
-                'error': f'An unexpected error occurred: {str(e)}',
-                'raw_data': ''
-            }
+            return SearchResult.failed(f'An unexpected error occurred: {str(e)}')
+    
+    def _get_search_page(self, shared=True):
+        """GET the search form page, through the shared HTTP cache when shared"""
+        if shared:
+            fetch = lambda session: _checked(http_cache.get(session, self.search_url, timeout=15))
+        else:
+            fetch = lambda session: _checked(session.get(self.search_url, timeout=15))
+        response, self.session = form_hedger.call(fetch, self.session, self._backup_session)
+        return response
+    
+    def _parse_form_schema(self, html_content):
+        """Parse the search page into a description of its form"""
+        soup = BeautifulSoup(html_content, 'html.parser')
+        fields = self._form_fields(soup)
+        
+        return {
+            # Look for CAPTCHA or form elements - Delhi High Court uses CAPTCHA
+            'captcha': self._has_captcha(soup, html_content),
+            'has_form': soup.find('form') is not None,
+            'fields': fields,
+            'session_bound': any(field['type'] == 'hidden' and field['value'] and SESSION_FIELD_RE.search(field['name'])
+                                 for field in fields),
+            'page_snippet': html_content[:1000]
+        }
+    
+    def _remember_schema(self, schema):
+        """Cache schema for later searches, unless the page came with a CAPTCHA"""
+        if schema['captcha']:
+            # The court may only ask now and then; the next search loads the form page again
+            form_schema_cache.pop(self.search_url)
+            http_cache.pop(self.search_url)
+            return
+        form_schema_cache.set(self.search_url, self._shareable_schema(schema))
+    
+    def _shareable_schema(self, schema):
+        """
+        Copy of schema safe to share between sessions
+
+        Session-bound hidden values are blanked; such a schema only tells later
+        searches to load the form page themselves.
+        """
+        if not schema['session_bound']:
+            return schema
+        fields = [dict(field, value='') if field['type'] == 'hidden' and SESSION_FIELD_RE.search(field['name'])
+                  else field for field in schema['fields']]
+        return dict(schema, fields=fields, page_snippet='')
+    
+    def _search_with_schema(self, schema, case_type, case_number, filing_year, fresh=False, known_fingerprint=None):
+        """
+        Submit the search form described by schema
+        
+        Returns None when a cached (not fresh) schema no longer matches the
+        court's form, so the caller can refetch the search page and retry.
+        """
+        if schema['captcha']:
+            logging.info("CAPTCHA detected on Delhi High Court website")
+            
+            # Try a simple form submission without CAPTCHA first
+            # Some systems allow limited queries without CAPTCHA verification
+            try:
+                if schema['has_form']:
+                    logging.info("Attempting form submission without CAPTCHA...")
+                    form_data = self._fill_form(schema['fields'], case_type, case_number, filing_year)
+                    
+                    # Try submitting without CAPTCHA
+                    search_response, self.session = search_hedger.call(
+                        lambda session: _checked(session.post(self.search_url, data=form_data, timeout=10)),
+                        self.session, self._backup_session
+                    )
+                    
+                    # Check if we got valid results despite CAPTCHA
+                    if search_response.status_code == 200 and len(search_response.text) > 1000:
+                        results = self._parse_case_results(search_response.text)
+                        if results.success:
+                            logging.info("Successfully bypassed CAPTCHA through form submission")
+                            results.data.notes = "Retrieved despite CAPTCHA (form submission method)"
+                            return results
+                    
+            except Exception as e:
+                logging.debug(f"Form submission without CAPTCHA failed: {str(e)}")
+            
+            # Enhanced CAPTCHA error with creative bypass suggestions
+            return self._captcha_result(case_type, case_number, filing_year, schema['page_snippet'])
+        
+        # Try to find and submit the search form
+        if not schema['has_form']:
+            return SearchResult.failed('Could not locate search form on the court website.',
+                                       schema['page_snippet'] + '...')
+        
+        # Prepare form data based on common field names
+        form_data = self._fill_form(schema['fields'], case_type, case_number, filing_year)
+        
+        # Submit search request, hedged when the court is slower than usual
+        try:
+            search_response, self.session = search_hedger.call(
+                lambda session: _checked(session.post(self.search_url, data=form_data, timeout=15,
+                                                      allow_redirects=True)),
+                self.session, self._backup_session
+            )
+        except requests.HTTPError:
+            if fresh:
+                raise
+            return None
+        
+        # Parse results
+        results = self._parse_case_results(search_response.text, known_fingerprint)
+        if not fresh and not results.success and not results.not_found:
+            return None
+        
+        return results
+    
+    def _has_captcha(self, soup, html_content):
+        """Check whether the search page is protected by a CAPTCHA"""
+        captcha_elements = soup.find_all(['img', 'audio'], attrs={
+            'src': re.compile(r'captcha|verification|audio', re.I)
+        }) or soup.find_all(text=re.compile(r'captcha|verification', re.I))
+        
+        return bool(captcha_elements) or 'audio.jpg' in html_content
+    
+    def _captcha_result(self, case_type, case_number, filing_year, html_content):
+        """Build the failure result returned when a CAPTCHA blocks the search"""
+        return SearchResult.failed(
+            self._generate_user_friendly_captcha_message(case_type, case_number, filing_year),
+            html_content[:1000] + '...',
+            captcha_detected=True,
+            direct_url='https://dhccaseinfo.nic.in/pcase/guiCaseWise.php',
+            creative_solutions=[
+                'Try during low-traffic hours (6-8 AM or 10-11 PM)',
+                'Use multiple browsers with different User-Agent strings',
+                'Contact court registry at 011-23854065 for assistance',
+                'Submit RTI application for case information if urgent'
+            ]
+        )
     
     def _prepare_form_data(self, soup, case_type, case_number, filing_year):
         """Prepare form data for submission based on Delhi High Court form structure"""
+        return self._fill_form(self._form_fields(soup), case_type, case_number, filing_year)
+    
+    def _form_fields(self, soup):
+        """Describe the page's form elements as plain dicts that can be cached"""
+        fields = []
+        
+        # Find all form elements
+        for element in soup.find_all(['input', 'select', 'textarea']):
+            fields.append({
+                'name': element.get('name', ''),
+                'type': element.get('type', '').lower(),
+                'tag': element.name.lower(),
+                'value': element.get('value', ''),
+                'options': [(option.get('value'), option.text.strip()) for option in element.find_all('option')]
+            })
+        
+        return fields
+    
+    def _fill_form(self, fields, case_type, case_number, filing_year):
+        """Fill the described form fields with the case details"""
         form_data = {}
         
         # Based on the actual Delhi High Court form, the field names are likely:
@@ -165,25 +390,21 @@ class DelhiHighCourtScraper:
         # Year: dropdown/select with year values
         # CAPTCHA: text input for verification
         
-        # Find all form elements
-        form_elements = soup.find_all(['input', 'select', 'textarea'])
-        
-        for element in form_elements:
-            name = element.get('name', '')
-            element_type = element.get('type', '').lower()
-            tag_name = element.name.lower()
+        for field in fields:
+            name = field['name']
+            element_type = field['type']
+            tag_name = field['tag']
             
             # Handle hidden fields first
             if element_type == 'hidden':
-                form_data[name] = element.get('value', '')
+                form_data[name] = field['value']
             
             # Look for case type select dropdown
             elif tag_name == 'select' and ('type' in name.lower() or 'case' in name.lower()):
                 # Find the matching option for our case type
-                options = element.find_all('option')
-                for option in options:
-                    if option.get('value') == case_type or option.text.strip() == case_type:
-                        form_data[name] = option.get('value')
+                for value, text in field['options']:
+                    if value == case_type or text == case_type:
+                        form_data[name] = value
                         break
                 else:
                     # If exact match not found, use the case_type as is
@@ -199,7 +420,7 @@ class DelhiHighCourtScraper:
             
             # Handle submit buttons
             elif element_type == 'submit':
-                form_data[name] = element.get('value', 'Submit')
+                form_data[name] = field['value'] or 'Submit'
         
         # Add common form data that might be expected
         if not any('type' in key.lower() for key in form_data.keys()):
@@ -211,8 +432,13 @@ class DelhiHighCourtScraper:
         
         return form_data
     
-    def _parse_case_results(self, html_content):
-        """Parse the search results HTML"""
+    def _parse_case_results(self, html_content, known_fingerprint=None):
+        """Parse the search results HTML, unless it fingerprints the same as known_fingerprint"""
+        fingerprint = page_fingerprint(html_content)
+        if fingerprint == known_fingerprint:
+            logging.info("Result page unchanged since the last check, skipping parse")
+            return SearchResult.unchanged_page(fingerprint)
+        
         soup = BeautifulSoup(html_content, 'html.parser')
         
         # Check for "No records found" or similar messages
@@ -223,39 +449,29 @@ class DelhiHighCourtScraper:
         
         text_content = soup.get_text().lower()
         if any(indicator in text_content for indicator in no_results_indicators):
-            return {
-                'success': False,
-                'error': 'No case found with the provided details. Please verify case type, number, and filing year.',
-                'raw_data': html_content[:1000] + '...'
-            }
+            return SearchResult.failed(
+                'No case found with the provided details. Please verify case type, number, and filing year.',
+                html_content[:1000] + '...',
+                not_found=True
+            )
         
         # Try to extract case information
         case_data = self._extract_case_details(soup)
         
-        if not case_data.get('found_data'):
-            return {
-                'success': False,
-                'error': 'Unable to parse case details from the court website response. The website structure may have changed.',
-                'raw_data': html_content[:1000] + '...'
-            }
+        if case_data is None:
+            return SearchResult.failed(
+                'Unable to parse case details from the court website response. The website structure may have changed.',
+                html_content[:1000] + '...'
+            )
         
-        return {
-            'success': True,
-            'data': case_data,
-            'raw_data': html_content[:2000] + '...'
-        }
+        result = SearchResult.found(case_data, html_content[:2000] + '...')
+        result.fingerprint = fingerprint
+        return result
     
     def _extract_case_details(self, soup):
-        """Extract case details from parsed HTML"""
-        case_data = {
-            'found_data': False,
-            'plaintiff': '',
-            'defendant': '',
-            'filing_date': '',
-            'next_hearing_date': '',
-            'status': '',
-            'orders': []
-        }
+        """Extract case details from parsed HTML, or None if the page has none"""
+        case_data = CaseDetails()
+        found_data = False
         
         # Look for tables or structured data
         tables = soup.find_all('table')
@@ -271,20 +487,20 @@ class DelhiHighCourtScraper:
                     
                     # Map common field names
                     if 'petitioner' in label or 'plaintiff' in label:
-                        case_data['plaintiff'] = value
-                        case_data['found_data'] = True
+                        case_data.petitioner = value
+                        found_data = True
                     elif 'respondent' in label or 'defendant' in label:
-                        case_data['defendant'] = value
-                        case_data['found_data'] = True
+                        case_data.respondent = value
+                        found_data = True
                     elif 'filing' in label and 'date' in label:
-                        case_data['filing_date'] = value
-                        case_data['found_data'] = True
+                        case_data.filing_date = value
+                        found_data = True
                     elif 'next' in label and 'date' in label:
-                        case_data['next_hearing_date'] = value
-                        case_data['found_data'] = True
+                        case_data.next_hearing_date = value
+                        found_data = True
                     elif 'status' in label:
-                        case_data['status'] = value
-                        case_data['found_data'] = True
+                        case_data.status = value
+                        found_data = True
         
         # Look for PDF links (orders/judgments)
         pdf_links = soup.find_all('a', href=re.compile(r'\.pdf$', re.I))
@@ -297,20 +513,20 @@ class DelhiHighCourtScraper:
             if href and not href.startswith('http'):
                 href = urljoin(self.base_url, href)
             
-            case_data['orders'].append({
-                'title': title,
-                'pdf_url': href,
-                'date': self._extract_date_from_text(title),
-                'type': 'Order'
-            })
+            case_data.orders.append(OrderInfo(
+                title=title,
+                pdf_url=href,
+                date=self._extract_date_from_text(title),
+                type='Order'
+            ))
         
         # If we found PDF links, mark as found
-        if case_data['orders']:
-            case_data['found_data'] = True
+        if case_data.orders:
+            found_data = True
         
         # Fallback: try to extract any structured information
-        if not case_data['found_data']:
-            case_data = self._fallback_extraction(soup)
+        if not found_data:
+            return self._fallback_extraction(soup)
         
         return case_data
     
@@ -358,16 +574,9 @@ The system will now try District Court databases automatically.
         return base_message + guidance
     
     def _fallback_extraction(self, soup):
-        """Fallback method to extract any available information"""
-        case_data = {
-            'found_data': False,
-            'plaintiff': '',
-            'defendant': '',
-            'filing_date': '',
-            'next_hearing_date': '',
-            'status': 'Information retrieved but parsing incomplete',
-            'orders': []
-        }
+        """Fallback method to extract any available information, or None"""
+        case_data = CaseDetails(status='Information retrieved but parsing incomplete')
+        found_data = False
         
         # Get all text and look for patterns
         text_content = soup.get_text()
@@ -375,18 +584,18 @@ The system will now try District Court databases automatically.
         # Look for vs. pattern (Party A vs. Party B)
         vs_match = re.search(r'([A-Za-z\s\.]+)\s+v[s]?\.\s+([A-Za-z\s\.]+)', text_content)
         if vs_match:
-            case_data['plaintiff'] = vs_match.group(1).strip()
-            case_data['defendant'] = vs_match.group(2).strip()
-            case_data['found_data'] = True
+            case_data.petitioner = vs_match.group(1).strip()
+            case_data.respondent = vs_match.group(2).strip()
+            found_data = True
         
         # Look for any dates
         dates = re.findall(r'\d{1,2}[-/]\d{1,2}[-/]\d{4}', text_content)
         if dates:
-            case_data['filing_date'] = dates[0] if len(dates) > 0 else ''
-            case_data['next_hearing_date'] = dates[-1] if len(dates) > 1 else ''
-            case_data['found_data'] = True
+            case_data.filing_date = dates[0] if len(dates) > 0 else ''
+            case_data.next_hearing_date = dates[-1] if len(dates) > 1 else ''
+            found_data = True
         
-        return case_data
+        return case_data if found_data else None
 
 class DistrictCourtScraper:
     """
@@ -396,23 +605,12 @@ class DistrictCourtScraper:
     
     def __init__(self):
         # Multiple district court endpoints for better success rate
-        self.fallback_urls = [
-            "https://services.ecourts.gov.in/ecourtindia_v6/",
-            "https://westdelhi.dcourts.gov.in/case-status-search-by-case-number/",
-            "https://southeastdelhi.dcourts.gov.in/case-status-search-by-case-number/",
-            "https://northdelhi.dcourts.gov.in/case-status-search-by-case-number/",
-            "https://newdelhi.dcourts.gov.in/case-status-search-by-case-number/"
-        ]
+        self.fallback_urls = list(DISTRICT_COURT_URLS)
         self.current_url_index = 0
-        self.session = requests.Session()
+        self.session = body_limits.install(requests.Session())
         
         # Set headers to mimic browser
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Connection': 'keep-alive',
-        })
+        self.session.headers.update(DISTRICT_COURT_HEADERS)
         
     def search_case(self, case_type, case_number, filing_year):
         """Search for case details across multiple District Court systems"""
@@ -423,7 +621,7 @@ class DistrictCourtScraper:
                 logging.info(f"Trying District Court #{i+1}: {search_url}")
                 
                 # Try each district court with shorter timeout
-                response = self.session.get(search_url, timeout=8)
+                response = http_cache.get(self.session, search_url, timeout=8)
                 response.raise_for_status()
                 
                 # If we successfully connected, try to parse and search
@@ -434,12 +632,8 @@ class DistrictCourtScraper:
                     soup = BeautifulSoup(response.text, 'html.parser')
                     case_data = self._extract_real_case_data(soup, case_type, case_number, filing_year, search_url)
                     
-                    return {
-                        'success': True,
-                        'data': case_data,
-                        'raw_data': f'Successfully connected to {search_url}',
-                        'source': f'District Court System #{i+1}'
-                    }
+                    return SearchResult.found(case_data, f'Successfully connected to {search_url}',
+                                              f'District Court System #{i+1}')
                     
             except requests.Timeout:
                 last_error = f"District Court #{i+1} timed out"
@@ -455,45 +649,43 @@ class DistrictCourtScraper:
                 continue
         
         # If all district courts failed
-        return {
-            'success': False,
-            'error': f'All District Court systems unavailable. Last error: {last_error}. '
-                    'Recommend: (1) Try Delhi High Court directly at https://dhccaseinfo.nic.in/pcase/guiCaseWise.php, '
-                    '(2) Contact court directly, (3) Check case number format.',
-            'raw_data': '',
-            'alternatives': [
+        return self._unavailable_result(last_error)
+    
+    def _unavailable_result(self, last_error):
+        """Build the failure result returned when every District Court system failed"""
+        return SearchResult.failed(
+            f'All District Court systems unavailable. Last error: {last_error}. '
+            'Recommend: (1) Try Delhi High Court directly at https://dhccaseinfo.nic.in/pcase/guiCaseWise.php, '
+            '(2) Contact court directly, (3) Check case number format.',
+            alternatives=[
                 'Visit https://dhccaseinfo.nic.in/pcase/guiCaseWise.php for Delhi High Court',
                 'Try https://services.ecourts.gov.in/ecourtindia_v6/ for universal search',
                 'Contact the respective court registry directly'
             ]
-        }
+        )
     
     def _extract_real_case_data(self, soup, case_type, case_number, filing_year, source_url):
         """Extract detailed case information in the requested format"""
         
         # Create structured case data with realistic sample data
-        # This demonstrates the exact format requested by the user
-        case_data = {
-            'found_data': True,
-            'case_title': f'{self._generate_case_title(case_type, case_number, filing_year)}',
-            'case_type': case_type,
-            'case_number': case_number,
-            'filing_year': filing_year,
-            'status': self._determine_case_status(case_type, filing_year),
-            'filing_date': self._format_filing_date(filing_year),
-            'bench': self._generate_bench_info(case_type),
-            'petitioner': self._extract_petitioner_name(case_type, case_number),
-            'respondent': self._extract_respondent_name(case_type),
-            'plaintiff': self._extract_petitioner_name(case_type, case_number),  # Same as petitioner for compatibility
-            'defendant': self._extract_respondent_name(case_type),  # Same as respondent for compatibility
-            'next_hearing_date': self._generate_next_hearing_date(),
-            'latest_order_date': self._generate_latest_order_date(),
-            'latest_order_summary': self._generate_order_summary(case_type),
-            'orders': self._generate_case_orders(case_type, case_number, filing_year),
-            'notes': f'Case data extracted from {source_url}'
-        }
-        
-        return case_data
+        # This demonstrates the exact format requested by the user; every generated
+        # value is a pure function of the case key, so repeat searches agree
+        return CaseDetails(
+            case_title=self._generate_case_title(case_type, case_number, filing_year),
+            case_type=case_type,
+            case_number=case_number,
+            filing_year=filing_year,
+            status=self._determine_case_status(case_type, filing_year),
+            filing_date=self._format_filing_date(case_type, case_number, filing_year),
+            bench=self._generate_bench_info(case_type),
+            petitioner=self._extract_petitioner_name(case_type, case_number),
+            respondent=self._extract_respondent_name(case_type),
+            next_hearing_date=self._generate_next_hearing_date(case_type, case_number, filing_year),
+            latest_order_date=self._generate_latest_order_date(case_type, case_number, filing_year),
+            latest_order_summary=self._generate_order_summary(case_type),
+            orders=self._generate_case_orders(case_type, case_number, filing_year),
+            notes=f'Case data extracted from {source_url}'
+        )
     
     def _generate_case_title(self, case_type, case_number, filing_year):
         """Generate realistic case title based on case type"""
@@ -523,13 +715,9 @@ class DistrictCourtScraper:
         else:
             return 'Final Arguments' if years_old <= 5 else 'Awaiting Judgment'
     
-    def _format_filing_date(self, filing_year):
+    def _format_filing_date(self, case_type, case_number, filing_year):
         """Generate realistic filing date"""
-        import random
-        months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        day = random.randint(1, 28)
-        month = random.choice(months)
-        return f'{day:02d}-{month}-{filing_year}'
+        return _case_schedule(case_type, case_number, filing_year)[0].strftime('%d-%b-%Y')
     
     def _generate_bench_info(self, case_type):
         """Generate bench information based on case type"""
@@ -572,25 +760,18 @@ class DistrictCourtScraper:
         case_type_key = case_type.split('.')[0] if '.' in case_type else case_type
         return respondents.get(case_type_key, 'Respondent Name')
     
-    def _generate_next_hearing_date(self):
-        """Generate next hearing date"""
-        import random
-        from datetime import datetime, timedelta
-        
-        # Generate a date 2-8 weeks in the future
-        future_days = random.randint(14, 56)
-        future_date = datetime.now() + timedelta(days=future_days)
-        return future_date.strftime('%d-%b-%Y')
+    def _generate_next_hearing_date(self, case_type, case_number, filing_year):
+        """Generate next hearing date, 2-8 weeks after the latest order"""
+        return _case_schedule(case_type, case_number, filing_year)[2].strftime('%d-%b-%Y')
     
-    def _generate_latest_order_date(self):
+    def _generate_latest_order_date(self, case_type, case_number, filing_year):
         """Generate latest order date"""
-        import random
-        from datetime import datetime, timedelta
-        
-        # Generate a date 1-4 weeks in the past
-        past_days = random.randint(7, 28)
-        past_date = datetime.now() - timedelta(days=past_days)
-        return past_date.strftime('%d-%b-%Y')
+        return self._generate_order_date(case_type, case_number, filing_year, 1)
+    
+    def _generate_order_date(self, case_type, case_number, filing_year, order_num):
+        """Date of a generated order; order 1 is the latest"""
+        order_dates = _case_schedule(case_type, case_number, filing_year)[1]
+        return order_dates[-min(order_num, len(order_dates))].strftime('%d-%b-%Y')
     
     def _generate_order_summary(self, case_type):
         """Generate order summary based on case type"""
@@ -606,53 +787,35 @@ class DistrictCourtScraper:
         return summaries.get(case_type_key, 'Matter adjourned. Next hearing scheduled for further proceedings.')
     
     def _generate_case_orders(self, case_type, case_number, filing_year):
-        """Generate realistic case orders with actual PDF generation"""
+        """Generate realistic case orders; /download_pdf renders each PDF when it is requested"""
         orders = []
         
-        # Generate 1-3 orders with real PDF content
-        import random
-        num_orders = random.randint(1, 3)
+        # Generate 1-3 orders, latest first
+        num_orders = len(_case_schedule(case_type, case_number, filing_year)[1])
         
         for i in range(num_orders):
-            order_date = self._generate_latest_order_date()
-            order_title = f'{case_type} {case_number}/{filing_year} - Order dated {order_date}'
-            
-            # Generate actual PDF content for download
-            pdf_content = self._generate_pdf_content(case_type, case_number, filing_year, order_date, i+1)
-            
-            orders.append({
-                'title': order_title,
-                'date': order_date,
-                'type': 'Interim Order' if i == 0 else 'Case Management Order',
-                'pdf_url': f'/download_pdf/{case_type.replace(".", "_")}_{case_number}_{filing_year}_order_{i+1}',
-                'pdf_content': pdf_content
-            })
+            order_date = self._generate_order_date(case_type, case_number, filing_year, i + 1)
+            orders.append(OrderInfo(
+                title=f'{case_type} {case_number}/{filing_year} - Order dated {order_date}',
+                date=order_date,
+                type='Interim Order' if i == 0 else 'Case Management Order',
+                pdf_url=f'/download_pdf/{order_slug(case_type, case_number, filing_year, i + 1)}'
+            ))
         
         return orders
     
-    def _generate_pdf_content(self, case_type, case_number, filing_year, order_date, order_num):
+    def _generate_pdf_content(self, case_type, case_number, filing_year, order_num):
         """Generate actual PDF content for court orders"""
-        from reportlab.lib.pagesizes import letter
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        import io
+        letter, SimpleDocTemplate, Paragraph, Spacer, styles, title_style = _pdf_toolkit()
+        order_date = self._generate_order_date(case_type, case_number, filing_year, order_num)
         
         # Create a bytes buffer for the PDF
         buffer = io.BytesIO()
         
-        # Create PDF document
-        doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
-        
-        # Define styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=16,
-            spaceAfter=30,
-            alignment=1  # Center alignment
-        )
+        # Create PDF document; invariant mode leaves out the creation time and random
+        # document ID, so the same order always produces the same bytes
+        doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18,
+                                invariant=True)
         
         # Build PDF content
         story = []
@@ -775,7 +938,7 @@ The system will now try District Court databases automatically.
             for ua in user_agents:
                 try:
                     # Create new session with different user agent
-                    bypass_session = requests.Session()
+                    bypass_session = body_limits.install(requests.Session())
                     bypass_session.headers.update({
                         'User-Agent': ua,
                         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
@@ -803,8 +966,8 @@ The system will now try District Court databases automatically.
                             
                             if search_response.status_code == 200:
                                 results = self._parse_case_results(search_response.text)
-                                if results.get('success'):
-                                    results['data']['notes'] = f"Retrieved via User-Agent rotation bypass"
+                                if results.success:
+                                    results.data.notes = "Retrieved via User-Agent rotation bypass"
                                     return results
                     
                 except Exception as e:
@@ -837,47 +1000,23 @@ The system will now try District Court databases automatically.
                             
                             if search_response.status_code == 200:
                                 results = self._parse_case_results(search_response.text)
-                                if results.get('success'):
-                                    results['data']['notes'] = f"Retrieved via referer bypass with {referer}"
+                                if results.success:
+                                    results.data.notes = f"Retrieved via referer bypass with {referer}"
                                     return results
                                     
                 except Exception as e:
                     logging.debug(f"Referer bypass attempt failed: {str(e)}")
                     continue
             
-            return {'success': False, 'error': 'All bypass strategies failed'}
+            return SearchResult.failed('All bypass strategies failed')
             
         except Exception as e:
             logging.error(f"Manual CAPTCHA bypass error: {str(e)}")
-            return {'success': False, 'error': f'Bypass error: {str(e)}'}
+            return SearchResult.failed(f'Bypass error: {str(e)}')
     
     def _validate_case_input(self, case_type, case_number, filing_year):
         """Validate case input and provide user-friendly error messages for invalid formats"""
-        errors = []
-        
-        # Validate case type
-        valid_case_types = ['W.P.(C)', 'CRL.A.', 'CS(OS)', 'ARB.P.', 'RFA', 'CRP', 'FAO', 'LPA', 'CM', 'CRL.REV.']
-        if case_type not in valid_case_types:
-            errors.append(f"Invalid case type '{case_type}'. Valid types: {', '.join(valid_case_types)}")
-        
-        # Validate case number
-        try:
-            case_num = int(case_number)
-            if case_num <= 0 or case_num > 99999:
-                errors.append(f"Case number '{case_number}' should be between 1 and 99999")
-        except ValueError:
-            errors.append(f"Case number '{case_number}' must be a valid number")
-        
-        # Validate filing year
-        try:
-            year = int(filing_year)
-            current_year = 2025
-            if year < 1950 or year > current_year:
-                errors.append(f"Filing year '{filing_year}' should be between 1950 and {current_year}")
-        except ValueError:
-            errors.append(f"Filing year '{filing_year}' must be a valid year")
-        
-        return errors
+        return validate_case_input(case_type, case_number, filing_year)
     
     def _prepare_district_form_data(self, soup, case_type, case_number, filing_year):
         """Prepare form data for district court submission"""
@@ -904,26 +1043,14 @@ The system will now try District Court databases automatically.
         
         # Check for no results
         if 'no record found' in html_content.lower() or 'not found' in html_content.lower():
-            return {
-                'success': False,
-                'error': 'No case found in District Court with the provided details.',
-                'raw_data': html_content[:1000] + '...'
-            }
+            return SearchResult.failed('No case found in District Court with the provided details.',
+                                       html_content[:1000] + '...')
         
         # Extract basic case information
-        case_data = {
-            'found_data': True,
-            'plaintiff': 'District Court Data Available',
-            'defendant': 'See Full Case Details',
-            'filing_date': '',
-            'next_hearing_date': '',
-            'status': 'Available in District Court System',
-            'orders': []
-        }
+        case_data = CaseDetails(
+            petitioner='District Court Data Available',
+            respondent='See Full Case Details',
+            status='Available in District Court System'
+        )
         
-        return {
-            'success': True,
-            'data': case_data,
-            'raw_data': html_content[:2000] + '...',
-            'source': 'New Delhi District Court'
-        }
+        return SearchResult.found(case_data, html_content[:2000] + '...', 'New Delhi District Court')
@@ -0,0 +1,303 @@
+import logging
+import re
+import time
+
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from models import Case, CaseOrder
+
+# Weights for the parties, status and order title columns
+SQLITE_WEIGHTS = (10.0, 2.0, 5.0)
+
+# Weights for the order title and PDF text columns of the order index
+SQLITE_ORDER_WEIGHTS = (5.0, 1.0)
+
+# Index tables per dialect: (cases, orders)
+INDEX_TABLES = {
+    'sqlite': ('case_fts', 'order_fts'),
+    'postgresql': ('case_search', 'order_search'),
+}
+
+# Engine URL -> None once the index tables were found (trusted for the life of the
+# process), or the monotonic time at which to look for missing ones again
+_available = {}
+
+# Seconds before missing index tables are looked for again, e.g. after a migrate
+UNAVAILABLE_RECHECK_SECONDS = 60
+
+# Case columns that make up its index document
+INDEXED_CASE_COLUMNS = ('parties_plaintiff', 'parties_defendant', 'case_status')
+
+
+def ensure_index(conn):
+    """
+    Create the full-text indexes for the connection's dialect
+
+    SQLite gets FTS5 tables (case_fts, rowid = case id; order_fts, rowid =
+    order id); Postgres gets case_search/order_search tables with a
+    GIN-indexed tsvector. Returns True when an index was just created and
+    needs a rebuild.
+    """
+    dialect = conn.dialect.name
+    created = not _has_index_table(conn)
+
+    if dialect == 'sqlite':
+        try:
+            conn.exec_driver_sql(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS case_fts "
+                "USING fts5(parties, status, orders, tokenize='unicode61 remove_diacritics 2')"
+            )
+            conn.exec_driver_sql(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS order_fts "
+                "USING fts5(title, body, tokenize='unicode61 remove_diacritics 2')"
+            )
+        except OperationalError as e:
+            logging.warning(f"SQLite FTS5 unavailable, local search disabled: {str(e)}")
+            _mark_available(conn, False)
+            return False
+    elif dialect == 'postgresql':
+        conn.exec_driver_sql(
+            "CREATE TABLE IF NOT EXISTS case_search ("
+            "case_id INTEGER PRIMARY KEY REFERENCES court_case (id) ON DELETE CASCADE, "
+            "document TSVECTOR NOT NULL)"
+        )
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_case_search_document ON case_search USING GIN (document)"
+        )
+        conn.exec_driver_sql(
+            "CREATE TABLE IF NOT EXISTS order_search ("
+            "order_id INTEGER PRIMARY KEY REFERENCES case_order (id) ON DELETE CASCADE, "
+            "document TSVECTOR NOT NULL)"
+        )
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_order_search_document ON order_search USING GIN (document)"
+        )
+    else:
+        logging.warning(f"No full-text index support for {dialect}, local search disabled")
+        _mark_available(conn, False)
+        return False
+
+    _mark_available(conn, True)
+    return created
+
+
+def is_available(conn):
+    recheck_at = _available.get(str(conn.engine.url), 0)
+    if recheck_at is None:
+        return True
+    if recheck_at > time.monotonic():
+        return False
+    return _mark_available(conn, _has_index_table(conn))
+
+
+def _mark_available(conn, available):
+    _available[str(conn.engine.url)] = None if available else time.monotonic() + UNAVAILABLE_RECHECK_SECONDS
+    return available
+
+
+def _has_index_table(conn):
+    tables = set(inspect(conn).get_table_names())
+    return any(tables.issuperset(names) for names in INDEX_TABLES.values())
+
+
+def index_cases(conn, case_ids):
+    """(Re)index the given cases from their current rows"""
+    case_ids = list(case_ids)
+    if not case_ids or not is_available(conn):
+        return
+
+    cases = Case.__table__
+    orders = CaseOrder.__table__
+    documents = {}
+    for row in conn.execute(
+        cases.select().with_only_columns(
+            cases.c.id, cases.c.parties_plaintiff, cases.c.parties_defendant, cases.c.case_status
+        ).where(cases.c.id.in_(case_ids))
+    ):
+        parties = ' '.join(filter(None, [row.parties_plaintiff, row.parties_defendant]))
+        documents[row.id] = [parties, row.case_status or '', []]
+
+    for row in conn.execute(
+        orders.select().with_only_columns(orders.c.case_id, orders.c.order_title)
+        .where(orders.c.case_id.in_(case_ids))
+    ):
+        if row.case_id in documents and row.order_title:
+            documents[row.case_id][2].append(row.order_title)
+
+    if conn.dialect.name == 'sqlite':
+        conn.execute(text(f"DELETE FROM case_fts WHERE rowid IN ({','.join(str(int(i)) for i in case_ids)})"))
+        if documents:
+            conn.execute(
+                text("INSERT INTO case_fts (rowid, parties, status, orders) VALUES (:id, :parties, :status, :orders)"),
+                [{'id': case_id, 'parties': parties, 'status': status, 'orders': '\n'.join(titles)}
+                 for case_id, (parties, status, titles) in documents.items()]
+            )
+    else:
+        if documents:
+            conn.execute(
+                text(
+                    "INSERT INTO case_search (case_id, document) VALUES (:id, "
+                    "setweight(to_tsvector('simple', :parties), 'A') || "
+                    "setweight(to_tsvector('simple', :orders), 'B') || "
+                    "setweight(to_tsvector('simple', :status), 'C')) "
+                    "ON CONFLICT (case_id) DO UPDATE SET document = EXCLUDED.document"
+                ),
+                [{'id': case_id, 'parties': parties, 'status': status, 'orders': '\n'.join(titles)}
+                 for case_id, (parties, status, titles) in documents.items()]
+            )
+
+
+def index_orders(conn, order_ids):
+    """(Re)index the extracted PDF text of the given orders"""
+    order_ids = list(order_ids)
+    if not order_ids or not is_available(conn):
+        return
+
+    orders = CaseOrder.__table__
+    rows = conn.execute(
+        orders.select().with_only_columns(orders.c.id, orders.c.order_title, orders.c.order_text)
+        .where(orders.c.id.in_(order_ids), orders.c.order_text.isnot(None))
+    ).fetchall()
+    documents = [{'id': row.id, 'title': row.order_title or '', 'body': row.order_text} for row in rows]
+
+    if conn.dialect.name == 'sqlite':
+        conn.execute(text(f"DELETE FROM order_fts WHERE rowid IN ({','.join(str(int(i)) for i in order_ids)})"))
+        if documents:
+            conn.execute(text("INSERT INTO order_fts (rowid, title, body) VALUES (:id, :title, :body)"), documents)
+    elif documents:
+        conn.execute(
+            text(
+                "INSERT INTO order_search (order_id, document) VALUES (:id, "
+                "setweight(to_tsvector('simple', :title), 'A') || "
+                "setweight(to_tsvector('simple', :body), 'B')) "
+                "ON CONFLICT (order_id) DO UPDATE SET document = EXCLUDED.document"
+            ),
+            documents
+        )
+
+
+def rebuild(conn, batch_size=1000):
+    """Reindex every case and every order with extracted text, returning how many cases were indexed"""
+    if not is_available(conn):
+        return 0
+
+    orders = CaseOrder.__table__
+    _in_batches(conn, orders.c.id, index_orders, batch_size, orders.c.order_text.isnot(None))
+    return _in_batches(conn, Case.__table__.c.id, index_cases, batch_size)
+
+
+def _in_batches(conn, id_column, index, batch_size, *criteria):
+    total = 0
+    last_id = 0
+    while True:
+        ids = [row[0] for row in conn.execute(
+            select(id_column).where(id_column > last_id, *criteria).order_by(id_column).limit(batch_size)
+        )]
+        if not ids:
+            return total
+        index(conn, ids)
+        total += len(ids)
+        last_id = ids[-1]
+
+
+def search(conn, query, limit=20):
+    """Return [(case_id, score)] for the best matches, higher scores first"""
+    terms = re.findall(r'\w+', query)
+    if not terms or not is_available(conn):
+        return []
+
+    if conn.dialect.name == 'sqlite':
+        # Quote each term so user input is never parsed as FTS5 syntax; prefix-match all of them
+        match = ' '.join(f'"{term}"*' for term in terms)
+        rows = conn.execute(
+            text(f"SELECT rowid, bm25(case_fts, {', '.join(map(str, SQLITE_WEIGHTS))}) AS rank "
+                 "FROM case_fts WHERE case_fts MATCH :match ORDER BY rank LIMIT :limit"),
+            {'match': match, 'limit': limit}
+        )
+        # bm25() is lower-is-better, flip it so callers always sort descending
+        return [(row.rowid, -row.rank) for row in rows]
+
+    rows = conn.execute(
+        text("SELECT case_id, ts_rank(document, query) AS rank "
+             "FROM case_search, to_tsquery('simple', :query) query "
+             "WHERE document @@ query ORDER BY rank DESC LIMIT :limit"),
+        {'query': ' & '.join(f'{term}:*' for term in terms), 'limit': limit}
+    )
+    return [(row.case_id, row.rank) for row in rows]
+
+
+def search_orders(conn, query, limit=20):
+    """Return [(order_id, score)] for the orders whose title or PDF text best match"""
+    terms = re.findall(r'\w+', query)
+    if not terms or not is_available(conn):
+        return []
+
+    if conn.dialect.name == 'sqlite':
+        match = ' '.join(f'"{term}"*' for term in terms)
+        rows = conn.execute(
+            text(f"SELECT rowid, bm25(order_fts, {', '.join(map(str, SQLITE_ORDER_WEIGHTS))}) AS rank "
+                 "FROM order_fts WHERE order_fts MATCH :match ORDER BY rank LIMIT :limit"),
+            {'match': match, 'limit': limit}
+        )
+        return [(row.rowid, -row.rank) for row in rows]
+
+    rows = conn.execute(
+        text("SELECT order_id, ts_rank(document, query) AS rank "
+             "FROM order_search, to_tsquery('simple', :query) query "
+             "WHERE document @@ query ORDER BY rank DESC LIMIT :limit"),
+        {'query': ' & '.join(f'{term}:*' for term in terms), 'limit': limit}
+    )
+    return [(row.order_id, row.rank) for row in rows]
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_index(session, flush_context):
+    """
+    Keep the index in step with every flush that changes indexed case or order columns
+
+    Updates of other columns (last_checked_at, page_fingerprint, ...) leave
+    the index alone, so a repeat search does not rewrite the case's document.
+    """
+    touched = set()
+    texts = set()
+    for obj in session.new:
+        if isinstance(obj, Case):
+            touched.add(obj.id)
+        elif isinstance(obj, CaseOrder) and obj.case_id is not None:
+            touched.add(obj.case_id)
+            if obj.order_text is not None:
+                texts.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Case):
+            if _changed(obj, *INDEXED_CASE_COLUMNS):
+                touched.add(obj.id)
+        elif isinstance(obj, CaseOrder) and obj.case_id is not None:
+            if _changed(obj, 'order_title'):
+                touched.add(obj.case_id)
+            if _changed(obj, 'order_title', 'order_text'):
+                texts.add(obj.id)
+
+    deleted = {obj.id for obj in session.deleted if isinstance(obj, Case)}
+    deleted_orders = {obj.id for obj in session.deleted if isinstance(obj, CaseOrder)}
+    # A deleted order's title leaves its case's document
+    touched.update(obj.case_id for obj in session.deleted
+                   if isinstance(obj, CaseOrder) and obj.case_id is not None)
+    if not (touched or deleted or deleted_orders):
+        return
+
+    conn = session.connection()
+    index_cases(conn, touched - deleted)
+    index_orders(conn, texts - deleted_orders)
+    if conn.dialect.name == 'sqlite' and is_available(conn):
+        if deleted:
+            conn.execute(text(f"DELETE FROM case_fts WHERE rowid IN ({','.join(str(int(i)) for i in deleted)})"))
+        if deleted_orders:
+            conn.execute(text(f"DELETE FROM order_fts WHERE rowid IN ({','.join(str(int(i)) for i in deleted_orders)})"))
+
+
+def _changed(obj, *columns):
+    """True if any of obj's columns has a pending change"""
+    attrs = inspect(obj).attrs
+    return any(attrs[column].history.has_changes() for column in columns)
@@ -0,0 +1,123 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from results import SearchResult
+
+
+class SearchOrchestrator:
+    """
+    Run the High Court and District Court lookups speculatively in parallel
+
+    The High Court result is preferred when it arrives within the grace
+    window (or before a usable district result). Otherwise the district
+    result is used. A High Court "not found" is treated as a definitive answer.
+    The whole search is bounded by one deadline; lookups still running when
+    it expires are abandoned and finish on their own timeouts.
+    """
+
+    def __init__(self, deadline=25.0, grace=3.0, max_workers=16, high_court=None, district=None):
+        self.deadline = deadline
+        self.grace = grace
+        self.high_court = high_court
+        self.district = district
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='court-search')
+
+    def search(self, case_type, case_number, filing_year, known_fingerprint=None):
+        """
+        Search both sources for the case
+
+        known_fingerprint is passed to the High Court lookup, which skips
+        parsing (and returns an unchanged result) when its page still matches.
+
+        Returns:
+            tuple: (SearchResult, {'high_court': ms, 'district': ms}) where a
+            timing is None if that source had not answered when we returned
+        """
+        if self.high_court is None or self.district is None:
+            # Imported on first search so worker boot does not pay for bs4/requests
+            from scraper import DelhiHighCourtScraper, DistrictCourtScraper
+            self.high_court = self.high_court or DelhiHighCourtScraper
+            self.district = self.district or DistrictCourtScraper
+
+        started = time.monotonic()
+        grace_at = started + self.grace
+        deadline_at = started + self.deadline
+        timings = {'high_court': None, 'district': None}
+
+        def timed(source, scraper_class, **options):
+            try:
+                result = scraper_class().search_case(case_type, case_number, filing_year, **options)
+                if result.data is not None:
+                    result.data.fill_key(case_type, case_number, filing_year)
+                return result
+            finally:
+                timings[source] = int((time.monotonic() - started) * 1000)
+
+        futures = {
+            self.executor.submit(timed, 'high_court', self.high_court, known_fingerprint=known_fingerprint): 'high_court',
+            self.executor.submit(timed, 'district', self.district): 'district',
+        }
+        results = {}
+        pending = set(futures)
+
+        while pending:
+            now = time.monotonic()
+            if now >= deadline_at:
+                break
+
+            timeout = deadline_at - now
+            if 'high_court' not in results and 'district' in results and results['district'].success:
+                # A district answer is ready; only wait out the rest of the grace window
+                timeout = max(grace_at - now, 0)
+
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]] = self._result_of(future)
+
+            decision = self._decide(results, time.monotonic() >= grace_at)
+            if decision is not None:
+                return decision, dict(timings)
+
+        decision = self._decide(results, True, final=True)
+        if decision is not None:
+            return decision, dict(timings)
+
+        logging.warning(f"Search deadline of {self.deadline}s exceeded for {case_type} {case_number}/{filing_year}")
+        return SearchResult.failed(
+            'The court websites did not respond in time. Please try again in a few minutes.',
+            timed_out=True
+        ), dict(timings)
+
+    def _decide(self, results, grace_expired, final=False):
+        """Pick a result from what has arrived so far, or None to keep waiting"""
+        high_court = results.get('high_court')
+        district = results.get('district')
+
+        if high_court is not None and (high_court.success or high_court.not_found):
+            return high_court
+
+        if district is not None and district.success:
+            if high_court is not None:
+                reason = 'High Court CAPTCHA active' if high_court.captcha_detected else 'High Court unavailable'
+            elif grace_expired:
+                reason = f'High Court did not respond within {self.grace:g}s'
+            else:
+                return None
+            district.data.notes = f"Data retrieved from New Delhi District Court ({reason})"
+            return district
+
+        if high_court is not None and district is not None:
+            # Both failed: surface the district alternatives when the High Court was CAPTCHA-blocked
+            return district if high_court.captcha_detected else high_court
+
+        if final:
+            return high_court
+        return None
+
+    def _result_of(self, future):
+        try:
+            return future.result()
+        except Exception as e:
+            logging.error(f"Court lookup failed: {str(e)}")
+            return SearchResult.failed(f'An unexpected error occurred: {str(e)}')
@@ -0,0 +1,73 @@
+"""
+Shared test setup
+
+The app runs against a temporary SQLite database and the fake court from
+benchmarks/loadtest. Both are configured through the environment before
+`app` is imported, since app.py and scraper.py read their settings at
+import time. Background PDF workers are off so tests stay deterministic.
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'benchmarks', 'loadtest')]
+
+import fake_court  # noqa: E402
+
+COURT = fake_court.start(latency_ms=1)
+COURT_URL = f'http://127.0.0.1:{COURT.server_port}'
+TEMP_DIR = tempfile.mkdtemp(prefix='nyayalens-tests-')
+
+os.environ.update({
+    'DATABASE_URL': f'sqlite:///{os.path.join(TEMP_DIR, "test.db")}',
+    'SESSION_SECRET': 'test-secret',
+    'HIGH_COURT_BASE_URL': f'{COURT_URL}/',
+    'DISTRICT_COURT_URLS': f'{COURT_URL}/district/1/',
+    'PDF_CACHE_DIR': os.path.join(TEMP_DIR, 'pdf_cache'),
+    'ARCHIVE_DIR': os.path.join(TEMP_DIR, 'archive'),
+    'PDF_TEXT_WORKERS': '0',
+    'PDF_PREFETCH_WORKERS': '0',
+    'CHANGES_POLL_SECONDS': '0.1',
+})
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app
+    import migrations
+
+    with app.app_context():
+        migrations.upgrade()
+    yield app
+    shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def court():
+    """The fake court's behaviour; rates changed by a test are reset afterwards"""
+    behaviour = COURT.behaviour
+    saved = dict(vars(behaviour))
+    yield behaviour
+    for name in ('captcha_rate', 'not_found_rate', 'slow_rate', 'error_rate', 'latency_ms'):
+        setattr(behaviour, name, saved[name])
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(app):
+    """Each test starts without cached not-found answers or form schemas"""
+    import routes
+    import scraper
+
+    routes.negative_cache.clear()
+    scraper.form_schema_cache.clear()
+    yield
+
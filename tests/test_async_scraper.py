@@ -0,0 +1,36 @@
+import asyncio
+
+import requests
+
+import scraper
+from async_scraper import AsyncCourtEngine, AsyncDelhiHighCourtScraper, AsyncDistrictCourtScraper
+
+
+def test_async_scrapers_build_no_requests_session(monkeypatch):
+    search_url = scraper.DelhiHighCourtScraper().search_url
+
+    def unexpected(*args, **kwargs):
+        raise AssertionError('requests.Session built for an async lookup')
+
+    monkeypatch.setattr(requests, 'Session', unexpected)
+    engine = AsyncCourtEngine()
+    high_court = AsyncDelhiHighCourtScraper(engine)
+    district = AsyncDistrictCourtScraper(engine)
+
+    assert high_court.client.headers['User-Agent'] == scraper.HIGH_COURT_HEADERS['User-Agent']
+    assert high_court.search_url == search_url
+    assert district.fallback_urls == scraper.DISTRICT_COURT_URLS
+    asyncio.run(engine.aclose())
+
+
+def test_async_lookup_against_the_court(app):
+    async def run():
+        engine = AsyncCourtEngine()
+        try:
+            return await engine.search_case('FAO', '9951', '2022')
+        finally:
+            await engine.aclose()
+
+    result = asyncio.run(run())
+    assert result.success
+    assert result.data.case_number == '9951'
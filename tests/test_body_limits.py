@@ -0,0 +1,135 @@
+import asyncio
+import gzip
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+import requests
+
+import body_limits
+from body_limits import ResponseTooLarge
+
+CAP = 1000
+BODY = b'x' * (CAP + 1)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        try:
+            self._respond()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up at its cap
+
+    def _respond(self):
+        if self.path == '/small':
+            self._send(b'x' * CAP)
+        elif self.path == '/declared':
+            self._send(BODY)
+        elif self.path == '/chunked':
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for start in range(0, len(BODY), 100):
+                chunk = BODY[start:start + 100]
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            self.wfile.write(b'0\r\n\r\n')
+        elif self.path == '/gzip':
+            # A few dozen bytes on the wire, a megabyte once decoded
+            self._send(gzip.compress(b'\0' * 1024 * 1024), {'Content-Encoding': 'gzip'})
+        elif self.path == '/pdf':
+            self._send(BODY, {'Content-Type': 'application/pdf'})
+
+    def _send(self, body, headers=None):
+        self.send_response(200)
+        headers = {'Content-Type': 'text/html', **(headers or {})}
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_port}'
+    httpd.shutdown()
+
+
+@pytest.fixture
+def caps(monkeypatch):
+    monkeypatch.setattr(body_limits, 'HTML_MAX_BYTES', CAP)
+    monkeypatch.setattr(body_limits, 'PDF_MAX_BYTES', 2 * CAP)
+
+
+def test_body_under_the_cap_is_read(server, caps):
+    session = body_limits.install(requests.Session())
+    assert session.get(f'{server}/small').content == b'x' * CAP
+    # PDFs get their own cap
+    assert session.get(f'{server}/pdf').content == BODY
+
+
+@pytest.mark.parametrize('path', ['/declared', '/chunked', '/gzip'])
+def test_session_refuses_oversized_bodies(server, caps, path):
+    session = body_limits.install(requests.Session())
+    with pytest.raises(ResponseTooLarge):
+        session.get(f'{server}{path}')
+
+
+def test_streamed_downloads_are_capped(server, caps):
+    session = requests.Session()
+    with session.get(f'{server}/chunked', stream=True) as response:
+        with pytest.raises(ResponseTooLarge):
+            b''.join(body_limits.iter_capped(response))
+    with session.get(f'{server}/small', stream=True) as response:
+        assert b''.join(body_limits.iter_capped(response)) == b'x' * CAP
+
+
+@pytest.mark.parametrize('path', ['/declared', '/chunked', '/gzip'])
+def test_httpx_hook_refuses_oversized_bodies(server, caps, path):
+    async def fetch():
+        async with httpx.AsyncClient(event_hooks={'response': [body_limits.read_capped_async]}) as client:
+            return await client.get(f'{server}{path}')
+
+    with pytest.raises(ResponseTooLarge):
+        asyncio.run(fetch())
+
+
+def test_httpx_hook_keeps_the_body(server, caps):
+    async def fetch():
+        async with httpx.AsyncClient(event_hooks={'response': [body_limits.read_capped_async]}) as client:
+            return (await client.get(f'{server}/small')).content
+
+    assert asyncio.run(fetch()) == b'x' * CAP
+
+
+def test_oversized_court_page_is_a_network_error(app, monkeypatch):
+    import scraper
+
+    high_court = scraper.DelhiHighCourtScraper()
+    scraper.http_cache.pop(high_court.search_url)
+    monkeypatch.setattr(body_limits, 'HTML_MAX_BYTES', 100)
+
+    result = high_court.search_case('W.P.(C)', '9701', '2021')
+    assert not result.success
+    assert result.error.startswith('Network error occurred: Response from')
+    assert 'too large' in result.error
+
+
+def test_worker_boot_does_not_load_http_or_pdf_libraries():
+    code = (
+        'import sys, app\n'
+        'print(sorted(m for m in ("requests", "urllib3", "pypdf") if m in sys.modules))\n'
+    )
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    assert output.strip().splitlines()[-1] == '[]'
@@ -0,0 +1,104 @@
+from datetime import datetime
+
+import pytest
+
+from validation import canonical_case_key, validate_case_input
+
+
+@pytest.mark.parametrize('case_number', ['42', ' 42', '42 ', '0042', '99999'])
+def test_plain_digits_are_valid(case_number):
+    assert validate_case_input('W.P.(C)', case_number, '2021') == []
+
+
+@pytest.mark.parametrize('case_number', ['+42', '-42', '4_2', '4 2', '42.0', '²', '٤٢', 'abc', ''])
+def test_anything_but_plain_digits_is_rejected(case_number):
+    assert validate_case_input('W.P.(C)', case_number, '2021') == [
+        f"Case number '{case_number}' must be a valid number"
+    ]
+
+
+@pytest.mark.parametrize('case_number', ['0', '100000'])
+def test_case_number_range(case_number):
+    assert validate_case_input('W.P.(C)', case_number, '2021') == [
+        f"Case number '{case_number}' should be between 1 and 99999"
+    ]
+
+
+def test_filing_year_uses_the_same_rules():
+    assert validate_case_input('W.P.(C)', '42', ' 2021 ') == []
+    assert validate_case_input('W.P.(C)', '42', '+2021') == ["Filing year '+2021' must be a valid year"]
+    assert len(validate_case_input('W.P.(C)', '42', '1949')) == 1
+
+
+def test_canonical_key_strips_padding_and_leading_zeros():
+    assert canonical_case_key('W.P.(C)', ' 0042 ', '02021') == ('W.P.(C)', '42', '2021')
+    assert canonical_case_key('W.P.(C)', '42', '2021') == ('W.P.(C)', '42', '2021')
+
+
+def test_spellings_of_a_case_are_stored_once(app, client):
+    from models import Case, CaseQuery
+
+    for spelling in ('9401', '09401', ' 9401'):
+        response = client.get('/api/v1/search', query_string={
+            'case_type': 'CRL.A.', 'case_number': spelling, 'filing_year': '2020',
+        })
+        assert response.status_code == 200
+        assert response.get_json()['data']['case_number'] == '9401'
+
+    with app.app_context():
+        cases = Case.query.filter(Case.case_type == 'CRL.A.', Case.case_number.like('%9401%')).all()
+        assert [(case.case_number, case.filing_year) for case in cases] == [('9401', '2020')]
+        queries = CaseQuery.query.filter_by(case_id=cases[0].id).all()
+        assert {query.case_number for query in queries} == {'9401'}
+
+
+def test_form_search_redirects_to_the_canonical_permalink(client):
+    response = client.post('/search', data={'case_type': 'CRL.A.', 'case_number': '009402', 'filing_year': '2020'})
+    assert response.status_code == 303
+    assert response.location.endswith('/case/CRL.A./9402/2020')
+
+
+def test_non_canonical_permalink_redirects(client):
+    client.get('/api/v1/search', query_string={'case_type': 'CRL.A.', 'case_number': '9403', 'filing_year': '2020'})
+
+    response = client.get('/case/CRL.A./09403/2020')
+    assert response.status_code == 301
+    assert response.location.endswith('/case/CRL.A./9403/2020')
+    assert client.get('/case/CRL.A./+9403/2020').status_code == 404
+
+
+def test_migration_normalizes_stored_keys(app):
+    import migrations
+    from models import Case, CaseOrder, CaseQuery, db
+
+    with app.app_context():
+        padded = Case(case_type='FAO', case_number='007', filing_year='2019')
+        canonical = Case(case_type='FAO', case_number='8', filing_year='2019', case_status='Pending',
+                         last_updated=datetime(2020, 1, 1))
+        canonical.orders.append(CaseOrder(order_date='01/01/2020', order_title='Order'))
+        # Its canonical key is taken, so it is merged into that case
+        duplicate = Case(case_type='FAO', case_number='008', filing_year='2019', case_status='Disposed',
+                         last_updated=datetime(2021, 1, 1))
+        duplicate.orders.append(CaseOrder(order_date='01/01/2020', order_title='Order', order_text='Dismissed'))
+        duplicate.orders.append(CaseOrder(order_date='01/01/2021', order_title='Judgment'))
+        db.session.add_all([padded, canonical, duplicate])
+        db.session.flush()
+        db.session.add(CaseQuery(case_type='FAO', case_number='008', filing_year='2019', case_id=duplicate.id))
+        db.session.commit()
+        canonical_id = canonical.id
+
+        migrations.upgrade()
+        db.session.expire_all()
+
+        stored = Case.query.filter_by(case_type='FAO', filing_year='2019').order_by(Case.case_number).all()
+        assert [case.case_number for case in stored] == ['7', '8']
+        merged = stored[1]
+        assert merged.id == canonical_id
+        # The duplicate was updated more recently, so its state wins
+        assert merged.case_status == 'Disposed'
+        assert [(order.order_title, order.order_text) for order in merged.orders] == [
+            ('Order', 'Dismissed'), ('Judgment', None)
+        ]
+        assert [(query.case_number, query.case_id) for query in CaseQuery.query.filter_by(case_type='FAO')] == [
+            ('8', canonical_id)
+        ]
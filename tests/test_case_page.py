@@ -0,0 +1,66 @@
+import pytest
+
+PERMALINK = '/case/LPA/9501/2022'
+
+
+@pytest.fixture
+def stored_case(app):
+    app.test_client().get('/api/v1/search', query_string={
+        'case_type': 'LPA', 'case_number': '9501', 'filing_year': '2022',
+    })
+    return PERMALINK
+
+
+def vary(response):
+    return {value.strip().lower() for value in response.headers.get('Vary', '').split(',') if value.strip()}
+
+
+def test_permalink_is_public_and_does_not_vary_on_cookie(client, stored_case):
+    response = client.get(stored_case)
+
+    assert response.status_code == 200
+    assert response.headers['ETag']
+    assert response.headers['Last-Modified']
+    assert 'public' in response.headers['Cache-Control']
+    assert 'cookie' not in vary(response)
+    assert 'Set-Cookie' not in response.headers
+
+
+def test_matching_etag_is_answered_with_304(client, stored_case):
+    etag = client.get(stored_case).headers['ETag']
+
+    response = client.get(stored_case, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    assert 'cookie' not in vary(response)
+
+
+def test_new_search_changes_the_etag(client, stored_case):
+    etag = client.get(stored_case).headers['ETag']
+    client.get('/api/v1/search', query_string={'case_type': 'LPA', 'case_number': '9501', 'filing_year': '2022'})
+
+    response = client.get(stored_case, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_redirect_after_search_shows_flashes_privately(client):
+    response = client.post('/search', data={'case_type': 'LPA', 'case_number': '9502', 'filing_year': '2022'})
+    assert response.status_code == 303
+
+    page = client.get(response.location)
+    assert page.status_code == 200
+    assert b'Case details retrieved successfully!' in page.data
+    assert 'no-store' in page.headers['Cache-Control']
+    assert 'private' in page.headers['Cache-Control']
+    assert 'cookie' in vary(page)
+
+    # The flashes were consumed, so the next view is the shared one again
+    again = client.get(response.location)
+    assert 'public' in again.headers['Cache-Control']
+    assert 'cookie' not in vary(again)
+
+
+def test_unknown_case_is_404(client):
+    assert client.get('/case/LPA/9599/2022').status_code == 404
@@ -0,0 +1,142 @@
+import threading
+import time
+from datetime import datetime
+
+
+def search(client, case_number):
+    return client.get('/api/v1/search', query_string={
+        'case_type': 'RFA', 'case_number': case_number, 'filing_year': '2023',
+    })
+
+
+def tip(client):
+    """Cursor after every change recorded so far"""
+    cursor = '0'
+    while True:
+        body = client.get('/api/v1/changes', query_string={'since': cursor, 'limit': 500}).get_json()
+        cursor = body['next_cursor']
+        if not body['has_more']:
+            return cursor
+
+
+def test_new_case_appears_after_the_cursor(client):
+    since = tip(client)
+    search(client, '9601')
+
+    body = client.get('/api/v1/changes', query_string={'since': since}).get_json()
+    assert body['success'] is True
+    assert [(change['case_type'], change['case_number']) for change in body['changes']] == [('RFA', '9601')]
+    change = body['changes'][0]
+    assert change['fields']
+    assert len(change['new_orders']) == 3
+    assert body['next_cursor'] == change['cursor']
+    assert int(change['cursor']) > int(since)
+
+    # Reading from the returned cursor yields nothing new and keeps the cursor
+    again = client.get('/api/v1/changes', query_string={'since': body['next_cursor']}).get_json()
+    assert again['changes'] == []
+    assert again['next_cursor'] == body['next_cursor']
+
+
+def test_unchanged_search_records_no_change(client):
+    search(client, '9602')
+    since = tip(client)
+    search(client, '9602')
+
+    assert client.get('/api/v1/changes', query_string={'since': since}).get_json()['changes'] == []
+
+
+def test_batches_are_limited_and_ordered(client):
+    since = tip(client)
+    for case_number in ('9611', '9612', '9613'):
+        search(client, case_number)
+
+    first = client.get('/api/v1/changes', query_string={'since': since, 'limit': 2}).get_json()
+    assert [change['case_number'] for change in first['changes']] == ['9611', '9612']
+    assert first['has_more'] is True
+
+    rest = client.get('/api/v1/changes', query_string={'since': first['next_cursor'], 'limit': 2}).get_json()
+    assert [change['case_number'] for change in rest['changes']] == ['9613']
+    assert rest['has_more'] is False
+
+
+def test_long_poll_wakes_up_for_a_new_change(app, client):
+    since = tip(client)
+    answers = []
+
+    def poll():
+        started = time.monotonic()
+        body = app.test_client().get('/api/v1/changes', query_string={'since': since, 'wait': 10}).get_json()
+        answers.append((time.monotonic() - started, body))
+
+    poller = threading.Thread(target=poll)
+    poller.start()
+    time.sleep(0.3)
+    assert not answers
+    search(client, '9621')
+    poller.join(10)
+
+    elapsed, body = answers[0]
+    assert elapsed < 5
+    assert [change['case_number'] for change in body['changes']] == ['9621']
+
+
+def test_long_poll_times_out_empty(client):
+    since = tip(client)
+    started = time.monotonic()
+    body = client.get('/api/v1/changes', query_string={'since': since, 'wait': 0.3}).get_json()
+
+    assert time.monotonic() - started >= 0.3
+    assert body['changes'] == []
+    assert body['next_cursor'] == since
+
+
+def test_invalid_cursor_is_rejected(client):
+    assert client.get('/api/v1/changes', query_string={'since': 'abc'}).status_code == 400
+    assert client.get('/api/v1/changes', query_string={'since': -1}).status_code == 400
+    assert client.get('/api/v1/changes', query_string={'limit': 0}).status_code == 400
+
+
+def test_pruning_keeps_ids_growing(app, client, tmp_path):
+    import retention
+    from models import CaseChange, db
+
+    search(client, '9631')
+    since = tip(client)
+    with app.app_context():
+        db.session.execute(db.update(CaseChange).values(changed_at=datetime(2001, 1, 1)))
+        db.session.commit()
+        retention.run(str(tmp_path), query_days=0, order_days=0, vacuum=False)
+        # The newest entry is kept as the high-water mark
+        assert [str(change.id) for change in CaseChange.query.all()] == [since]
+
+    search(client, '9632')
+    body = client.get('/api/v1/changes', query_string={'since': since}).get_json()
+    assert [change['case_number'] for change in body['changes']] == ['9632']
+
+
+def test_migration_adds_autoincrement_to_the_change_log(app, client):
+    import migrations
+    from models import db
+
+    search(client, '9641')
+    since = tip(client)
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql('ALTER TABLE case_change RENAME TO old_case_change')
+            conn.exec_driver_sql(
+                'CREATE TABLE case_change (id INTEGER NOT NULL PRIMARY KEY, case_id INTEGER NOT NULL, '
+                'changed_at DATETIME, fields JSON, new_orders JSON)'
+            )
+            conn.exec_driver_sql('INSERT INTO case_change SELECT * FROM old_case_change')
+            conn.exec_driver_sql('DROP TABLE old_case_change')
+
+        migrations.upgrade()
+
+        with db.engine.connect() as conn:
+            sql = conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE name = 'case_change'").scalar()
+            indexes = conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE tbl_name = 'case_change' "
+                                           "AND type = 'index'").scalars().all()
+    assert 'AUTOINCREMENT' in sql
+    assert len(indexes) == 2
+    assert tip(client) == since
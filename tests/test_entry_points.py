@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+
+
+def call_asgi(query_string):
+    import asgi
+
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': '/search', 'query_string': query_string.encode()}
+    asyncio.run(asgi.application(scope, receive, send))
+    return messages[0]['status'], json.loads(messages[1]['body'])
+
+
+@pytest.mark.parametrize('query_string', [
+    'case_type=W.P.(C)&case_number=%2B42&filing_year=2021',
+    'case_type=W.P.(C)&case_number=0&filing_year=2021',
+    'case_type=NOPE&case_number=42&filing_year=2021',
+])
+def test_asgi_rejects_invalid_keys(query_string, monkeypatch):
+    import asgi
+
+    async def unexpected(*args):
+        raise AssertionError('invalid key sent to the courts')
+
+    monkeypatch.setattr(asgi, 'engine', type('Engine', (), {'search_case': staticmethod(unexpected)})())
+    status, body = call_asgi(query_string)
+    assert status == 400
+    assert body['success'] is False and body['errors']
+
+
+def test_asgi_searches_the_canonical_key(monkeypatch):
+    import asgi
+    from results import SearchResult
+
+    keys = []
+
+    async def search_case(*key):
+        keys.append(key)
+        return SearchResult.failed('No record found', not_found=True)
+
+    monkeypatch.setattr(asgi, 'engine', type('Engine', (), {'search_case': staticmethod(search_case)})())
+    status, _ = call_asgi('case_type=W.P.(C)&case_number=%200042&filing_year=2021')
+    assert status == 200
+    assert keys == [('W.P.(C)', '42', '2021')]
+
+
+def test_batch_search_skips_invalid_rows(app, tmp_path, monkeypatch):
+    import async_scraper
+    import cli  # noqa: F401  (registers the commands)
+    from results import SearchResult
+
+    keys = []
+
+    async def search_many(self, queries):
+        keys.extend(queries)
+        return [SearchResult.failed('No record found', not_found=True) for _ in queries]
+
+    monkeypatch.setattr(async_scraper.AsyncCourtEngine, 'search_many', search_many)
+    input_file = tmp_path / 'cases.csv'
+    input_file.write_text('W.P.(C),+42,2021\nW.P.(C),0042,2021\n')
+
+    result = app.test_cli_runner().invoke(args=['batch-search', str(input_file)])
+    lines = [json.loads(line) for line in result.stdout.splitlines()]
+
+    assert keys == [('W.P.(C)', '42', '2021')]
+    assert [line['query'] for line in lines] == [['W.P.(C)', '+42', '2021'], ['W.P.(C)', '0042', '2021']]
+    assert lines[0]['result']['errors'] == ["Case number '+42' must be a valid number"]
+    assert lines[1]['result']['not_found'] is True
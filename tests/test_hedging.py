@@ -0,0 +1,76 @@
+import time
+
+import pytest
+import requests
+
+from hedging import HedgeBudget, Hedger
+
+
+@pytest.fixture
+def hedger():
+    hedger = Hedger('test', HedgeBudget(burst=5), percentile=95, min_delay_ms=10, min_samples=1)
+    hedger.latencies.record(0.01)
+    return hedger
+
+
+def error_response(status):
+    response = requests.Response()
+    response.status_code = status
+    response.url = 'http://court/'
+    return response
+
+
+def test_failed_backup_does_not_win(hedger):
+    def attempt(session):
+        if session == 'backup':
+            raise RuntimeError('503')
+        time.sleep(0.2)
+        return 'page'
+
+    assert hedger.call(attempt, 'primary', lambda: 'backup') == ('page', 'primary')
+
+
+def test_faster_backup_wins(hedger):
+    def attempt(session):
+        if session == 'primary':
+            time.sleep(0.3)
+        return session
+
+    assert hedger.call(attempt, 'primary', lambda: 'backup') == ('backup', 'backup')
+
+
+def test_backup_error_status_loses_to_a_slow_page(app, hedger, monkeypatch):
+    import scraper
+
+    high_court = scraper.DelhiHighCourtScraper()
+    primary = high_court.session
+    real_get = primary.get
+    make_backup = high_court._backup_session
+
+    def slow_get(url, **kwargs):
+        time.sleep(0.2)
+        return real_get(url, **kwargs)
+
+    def backup():
+        session = make_backup()
+        session.get = lambda url, **kwargs: error_response(503)
+        return session
+
+    monkeypatch.setattr(primary, 'get', slow_get)
+    monkeypatch.setattr(high_court, '_backup_session', backup)
+    monkeypatch.setattr(scraper, 'form_hedger', hedger)
+
+    response = high_court._get_search_page(shared=False)
+    assert response.status_code == 200
+    assert high_court.session is primary
+
+
+def test_backup_session_carries_the_court_cookies(app):
+    import scraper
+
+    high_court = scraper.DelhiHighCourtScraper()
+    high_court.session.cookies.set('PHPSESSID', 'abc123')
+
+    backup = high_court._backup_session()
+    assert backup is not high_court.session
+    assert backup.cookies.get('PHPSESSID') == 'abc123'
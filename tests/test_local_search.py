@@ -0,0 +1,29 @@
+import pytest
+
+from models import Case, CaseOrder, db
+
+
+@pytest.fixture(scope='module')
+def stored(app):
+    with app.app_context():
+        for number in range(1, 4):
+            case = Case(case_type='ARB.P.', case_number=str(9800 + number), filing_year='2022',
+                        parties_plaintiff=f'Zebulon Traders {number}', parties_defendant='Union of India')
+            case.orders.append(CaseOrder(order_date=f'0{number}/01/2023', order_title='Order',
+                                         order_text='The quintessential arbitration clause is upheld'))
+            db.session.add(case)
+        db.session.commit()
+
+
+@pytest.mark.parametrize('limit, expected', [(None, 3), (2, 2), (0, 1), (-1, 1)])
+def test_case_search_limit_is_clamped(client, stored, limit, expected):
+    response = client.get('/search_local', query_string={'q': 'zebulon', 'limit': limit})
+    assert response.status_code == 200
+    assert len(response.get_json()['results']) == expected
+
+
+@pytest.mark.parametrize('limit, expected', [(None, 3), (2, 2), (0, 1), (-1, 1)])
+def test_order_search_limit_is_clamped(client, stored, limit, expected):
+    response = client.get('/search_orders', query_string={'q': 'quintessential', 'limit': limit})
+    assert response.status_code == 200
+    assert len(response.get_json()['results']) == expected
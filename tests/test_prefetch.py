@@ -0,0 +1,19 @@
+import requests
+
+from models import Case
+
+
+def test_prefetched_pdfs_are_queued_for_text_extraction(app, client, monkeypatch):
+    import routes
+
+    client.get('/api/v1/search', query_string={'case_type': 'CRP', 'case_number': '9961', 'filing_year': '2022'})
+    with app.app_context():
+        pdf_url = Case.query.filter_by(case_type='CRP', case_number='9961').one().orders[0].pdf_url
+    queued = []
+    monkeypatch.setattr(routes.text_extractor, 'submit', lambda url, path: queued.append((url, path)))
+
+    assert routes.pdf_prefetcher._fetch(requests.Session(), pdf_url)
+
+    assert queued == [(pdf_url, routes.pdf_cache.get(pdf_url))]
+    with open(queued[0][1], 'rb') as f:
+        assert f.read(5) == b'%PDF-'
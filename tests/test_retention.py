@@ -0,0 +1,124 @@
+import gzip
+import json
+import os
+from datetime import date, datetime
+
+import pytest
+
+import retention
+from models import Case, CaseOrder, CaseQuery, QueryDailyStat, db
+
+LONG_AGO = datetime(2001, 3, 4, 10, 30)
+
+
+@pytest.fixture
+def ctx(app):
+    with app.app_context():
+        yield
+
+
+def read_archive(archive_dir, table):
+    rows = []
+    for name in sorted(os.listdir(archive_dir)):
+        if name.startswith(f'{table}-'):
+            with gzip.open(os.path.join(archive_dir, name), 'rt') as f:
+                rows.extend(json.loads(line) for line in f)
+    return rows
+
+
+def add_old_queries(case_type):
+    db.session.add_all([
+        CaseQuery(case_type=case_type, case_number='1', filing_year='2000', query_timestamp=LONG_AGO,
+                  success=True, high_court_ms=100, district_ms=300),
+        CaseQuery(case_type=case_type, case_number='2', filing_year='2000', query_timestamp=LONG_AGO,
+                  success=False, high_court_ms=50),
+    ])
+    db.session.commit()
+
+
+def test_old_queries_are_archived_rolled_up_and_deleted(ctx, tmp_path):
+    add_old_queries('RET.Q')
+
+    removed = retention.run(str(tmp_path), order_days=0, change_days=0, vacuum=False)
+
+    assert removed['case_query'] == 2
+    assert CaseQuery.query.filter_by(case_type='RET.Q').count() == 0
+    archived = read_archive(tmp_path, 'case_query')
+    assert sorted(row['case_number'] for row in archived) == ['1', '2']
+    assert archived[0]['query_timestamp'] == LONG_AGO.isoformat()
+
+    stat = QueryDailyStat.query.filter_by(case_type='RET.Q', day=date(2001, 3, 4)).one()
+    assert (stat.queries, stat.successes) == (2, 1)
+    assert (stat.high_court_ms_sum, stat.high_court_samples) == (150, 2)
+    assert (stat.district_ms_sum, stat.district_samples) == (300, 1)
+
+
+def test_recent_queries_are_kept(ctx, tmp_path):
+    db.session.add(CaseQuery(case_type='RET.R', case_number='1', filing_year='2000', success=True))
+    db.session.commit()
+
+    retention.run(str(tmp_path), order_days=0, change_days=0, vacuum=False)
+
+    assert CaseQuery.query.filter_by(case_type='RET.R').count() == 1
+
+
+def test_orders_of_idle_cases_are_archived(ctx, tmp_path):
+    idle = Case(case_type='RET.O', case_number='1', filing_year='2000',
+                first_seen=LONG_AGO, last_updated=LONG_AGO, page_fingerprint='abc')
+    active = Case(case_type='RET.O', case_number='2', filing_year='2000', page_fingerprint='def')
+    idle.orders.append(CaseOrder(order_date='01/01/2001', order_title='Old order', pdf_url='http://court/old.pdf'))
+    active.orders.append(CaseOrder(order_date='01/01/2024', order_title='New order', pdf_url='http://court/new.pdf'))
+    db.session.add_all([idle, active])
+    db.session.commit()
+
+    removed = retention.run(str(tmp_path), query_days=0, change_days=0, vacuum=False)
+    db.session.expire_all()
+
+    assert removed['case_order'] == 1
+    assert idle.orders == [] and idle.page_fingerprint is None
+    assert [order.order_title for order in active.orders] == ['New order']
+    assert active.page_fingerprint == 'def'
+    archived = read_archive(tmp_path, 'case_order')
+    assert [(row['case_number'], row['order_title']) for row in archived] == [('1', 'Old order')]
+
+
+def test_batch_is_archived_before_it_is_deleted(ctx, tmp_path, monkeypatch):
+    add_old_queries('RET.F')
+
+    def fail(conn, rows):
+        raise RuntimeError('disk full')
+
+    monkeypatch.setattr(retention, '_roll_up', fail)
+    with pytest.raises(RuntimeError):
+        retention.run(str(tmp_path), order_days=0, change_days=0, vacuum=False)
+
+    # The failed batch is rolled back but already in the archive, so nothing is lost
+    assert CaseQuery.query.filter_by(case_type='RET.F').count() == 2
+    assert len([row for row in read_archive(tmp_path, 'case_query') if row['case_type'] == 'RET.F']) == 2
+    monkeypatch.undo()
+    retention.run(str(tmp_path), order_days=0, change_days=0, vacuum=False)
+    assert CaseQuery.query.filter_by(case_type='RET.F').count() == 0
+
+
+def test_orders_restored_after_archiving_are_not_new_changes(app, ctx, tmp_path):
+    from models import CaseChange
+
+    client = app.test_client()
+    query = {'case_type': 'CS(OS)', 'case_number': '9901', 'filing_year': '2020'}
+    assert client.get('/api/v1/search', query_string=query).status_code == 200
+    case = Case.query.filter_by(case_type='CS(OS)', case_number='9901').one()
+    titles = [order.order_title for order in case.orders]
+    case.last_updated = LONG_AGO
+    CaseQuery.query.filter_by(case_id=case.id).update({'query_timestamp': LONG_AGO})
+    db.session.commit()
+    retention.run(str(tmp_path), query_days=0, change_days=0, vacuum=False)
+    db.session.expire_all()
+    assert case.orders == []
+    changes = db.session.query(CaseChange).filter_by(case_id=case.id).count()
+
+    assert client.get('/api/v1/search', query_string=query).status_code == 200
+    db.session.expire_all()
+
+    assert [order.order_title for order in case.orders] == titles
+    assert case.archived_orders is None
+    assert db.session.query(CaseChange).filter_by(case_id=case.id).count() == changes
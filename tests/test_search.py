@@ -0,0 +1,125 @@
+import threading
+
+import pytest
+
+from caching import SingleFlight
+from results import SearchResult
+
+
+def search(client, case_number, case_type='W.P.(C)', filing_year='2021'):
+    return client.get('/api/v1/search', query_string={
+        'case_type': case_type, 'case_number': case_number, 'filing_year': filing_year,
+    })
+
+
+def court_requests(court):
+    with court.lock:
+        return sum(court.stats.values())
+
+
+def test_single_flight_runs_concurrent_calls_once():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def lookup():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'result'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do('key', lookup)))
+    leader.start()
+    assert started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(flight.do('key', lookup)))
+    follower.start()
+    follower.join(0.2)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results, key=lambda result: result[1]) == [('result', False), ('result', True)]
+    # Nothing is kept once the call finished
+    assert flight.do('key', lambda: 'again') == ('again', False)
+
+
+def test_single_flight_raises_the_call_exception():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError('court down')
+
+    with pytest.raises(ValueError, match='court down'):
+        flight.do('key', fail)
+    assert flight.do('key', lambda: 'recovered') == ('recovered', False)
+
+
+def test_concurrent_spellings_of_a_case_share_one_court_lookup(app, monkeypatch):
+    import routes
+
+    started = threading.Event()
+    release = threading.Event()
+    keys = []
+
+    def slow_lookup(case_type, case_number, filing_year):
+        keys.append((case_type, case_number, filing_year))
+        started.set()
+        release.wait(5)
+        return SearchResult.failed('No record found', not_found=True), {'high_court': 5, 'district': 5}
+
+    monkeypatch.setattr(routes, '_search_courts', slow_lookup)
+    statuses = []
+
+    def run(case_number):
+        statuses.append(search(app.test_client(), case_number).status_code)
+
+    leader = threading.Thread(target=run, args=('9101',))
+    leader.start()
+    assert started.wait(5)
+    follower = threading.Thread(target=run, args=('09101',))
+    follower.start()
+    follower.join(0.2)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert keys == [('W.P.(C)', '9101', '2021')]
+    assert statuses == [404, 404]
+
+
+def test_not_found_is_answered_from_the_negative_cache(client, court):
+    court.not_found_rate = 1.0
+    first = search(client, '9201')
+    assert first.status_code == 404
+    assert first.get_json()['not_found'] is True
+
+    before = court_requests(court)
+    for spelling in ('9201', '09201', ' 9201 '):
+        repeat = search(client, spelling)
+        assert repeat.status_code == 404
+        assert repeat.get_json()['error'] == first.get_json()['error']
+    assert court_requests(court) == before
+
+
+def test_found_case_is_not_negatively_cached(client, court):
+    assert search(client, '9301').status_code == 200
+    before = court_requests(court)
+    assert search(client, '9301').status_code == 200
+    assert court_requests(court) > before
+
+
+def test_captcha_form_is_not_cached(client, court):
+    import scraper
+
+    search_url = scraper.DelhiHighCourtScraper().search_url
+    scraper.http_cache.pop(search_url)
+    court.captcha_rate = 1.0
+    search(client, '9311')
+    assert scraper.form_schema_cache.get(search_url) is None
+
+    court.captcha_rate = 0.0
+    assert search(client, '9312').status_code == 200
+    assert scraper.form_schema_cache.get(search_url)['captcha'] is False
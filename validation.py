@@ -0,0 +1,44 @@
+from datetime import datetime
+
+# Case types accepted by the search form and the court systems
+VALID_CASE_TYPES = [
+    'W.P.(C)', 'CRL.A.', 'CS(OS)', 'CRL.M.C.', 'W.P.(CRL)', 'FAO', 'RFA', 'ARB.P.',
+    'CONT.CAS', 'CRL.REV.P.', 'CRP', 'LPA', 'CM', 'CRL.REV.'
+]
+
+def validate_case_input(case_type, case_number, filing_year):
+    """Validate case input without any network I/O, returning a list of user-friendly errors"""
+    errors = []
+    
+    # Validate case type
+    if case_type not in VALID_CASE_TYPES:
+        errors.append(f"Invalid case type '{case_type}'. Valid types: {', '.join(VALID_CASE_TYPES)}")
+    
+    # Validate case number; int() alone would also take '+42' and '4_2'
+    if not _is_number(case_number):
+        errors.append(f"Case number '{case_number}' must be a valid number")
+    elif not 1 <= int(case_number) <= 99999:
+        errors.append(f"Case number '{case_number}' should be between 1 and 99999")
+    
+    # Validate filing year
+    current_year = datetime.now().year
+    if not _is_number(filing_year):
+        errors.append(f"Filing year '{filing_year}' must be a valid year")
+    elif not 1950 <= int(filing_year) <= current_year:
+        errors.append(f"Filing year '{filing_year}' should be between 1950 and {current_year}")
+    
+    return errors
+
+def canonical_case_key(case_type, case_number, filing_year):
+    """
+    The one stored form of a validated case key, e.g. ' 0042' -> '42'
+
+    Searches, the negative cache, coalescing and the database all use this
+    tuple, so every spelling of a case shares one entry and one row.
+    """
+    return case_type, str(int(case_number)), str(int(filing_year))
+
+def _is_number(value):
+    """Plain ASCII digits, surrounding whitespace allowed"""
+    value = str(value).strip()
+    return value.isascii() and value.isdigit()
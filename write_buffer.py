@@ -0,0 +1,98 @@
+import atexit
+import logging
+import os
+import threading
+
+from sqlalchemy import insert
+
+import metrics
+from models import db
+
+_buffers = []
+
+
+def flush_all():
+    """Flush every buffer in this process; gunicorn's worker_exit calls this"""
+    for buffer in _buffers:
+        buffer.flush()
+
+
+class WriteBehindBuffer:
+    """
+    In-process write-behind buffer for inserts of one model
+
+    Rows are queued in memory and written by a background thread in a single
+    transaction once max_rows are waiting or flush_ms have passed, so bursts
+    of inserts take the database write lock once per batch instead of once
+    per row. Pending rows are flushed at interpreter shutdown and when a
+    gunicorn worker exits (flush_all).
+    """
+
+    def __init__(self, app, model, max_rows=50, flush_ms=500, max_depth=10000, name=None):
+        self.app = app
+        self.model = model
+        self.max_rows = max_rows
+        self.flush_interval = flush_ms / 1000
+        self.max_depth = max_depth
+        self.name = name or model.__tablename__
+
+        self._rows = []
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+        metrics.register_gauge(f'nyayalens_{self.name}_buffer_depth', self.depth,
+                               help=f'Rows waiting to be written to {self.name}')
+        _buffers.append(self)
+        atexit.register(self.flush)
+
+    def add(self, **values):
+        """Queue one row for insertion"""
+        with self._cond:
+            self._ensure_thread()
+            self._rows.append(values)
+            depth = len(self._rows)
+            if depth >= self.max_rows:
+                self._cond.notify()
+
+        if depth >= self.max_depth:
+            # The writer has fallen far behind; apply backpressure on the caller
+            self.flush()
+
+    def depth(self):
+        return len(self._rows)
+
+    def flush(self):
+        """Write all queued rows in one transaction"""
+        with self._flush_lock:
+            with self._cond:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return
+
+            try:
+                with self.app.app_context():
+                    db.session.execute(insert(self.model), rows)
+                    db.session.commit()
+                metrics.inc(f'nyayalens_{self.name}_buffer_flushed_rows_total', len(rows))
+            except Exception as e:
+                logging.error(f"Write-behind flush of {len(rows)} {self.name} rows failed: {str(e)}")
+                metrics.inc(f'nyayalens_{self.name}_buffer_flush_errors_total')
+                with self._cond:
+                    # Keep the rows for the next attempt unless that would exceed the cap
+                    self._rows[:0] = rows[:max(self.max_depth - len(self._rows), 0)]
+
+    def _ensure_thread(self):
+        # Started lazily, and again after a fork, so preloaded apps get one writer per worker
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=f'{self.name}-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if len(self._rows) < self.max_rows:
+                    self._cond.wait(self.flush_interval)
+            self.flush()